@@ -1,20 +1,232 @@
-from os import remove, walk, startfile
-from os.path import exists, join, relpath, basename, isdir, getsize
-from psutil import process_iter, NoSuchProcess, AccessDenied, ZombieProcess, virtual_memory, Process, \
-    HIGH_PRIORITY_CLASS, cpu_count, cpu_freq, cpu_percent
+from os import remove, replace, walk, getpid, scandir, stat, sep, fsync, environ, makedirs
+from os.path import exists, join, relpath, basename, isdir, dirname, normpath, splitext, expanduser
+from psutil import NoSuchProcess, AccessDenied, ZombieProcess, virtual_memory, Process, \
+    cpu_count, cpu_freq, cpu_percent, pids, boot_time, swap_memory, disk_io_counters, net_io_counters
 from subprocess import CalledProcessError, run, DEVNULL, Popen, PIPE
-from zipfile import ZipFile, ZIP_DEFLATED
-from ctypes import windll
-import winreg
-from json import load, dump
-from time import sleep
-from threading import Thread
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED, ZIP_LZMA, ZIP_BZIP2
+from zlib import compressobj, compress, crc32, DEFLATED, Z_FINISH, Z_SYNC_FLUSH
+from shutil import rmtree
+from tempfile import gettempdir
+from json import load, dump, loads, dumps
+from time import sleep, time, thread_time, perf_counter, monotonic, localtime
+from threading import Thread, Lock, Event, Timer
+from queue import Queue, LifoQueue
+from heapq import heappush, heapreplace
+from bisect import bisect_left
+from functools import wraps
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from hashlib import blake2b
+from mmap import mmap, ACCESS_READ
+from statistics import median
+from collections import deque
+from array import array
+from itertools import count
+from atexit import register as atexit_register
+from locale import getpreferredencoding
+from re import compile as re_compile, escape, error as re_error, UNICODE as RE_UNICODE
+from fnmatch import translate
+import sqlite3
+import asyncio
+import socket
+import struct
+import numpy as np
+
+try:
+    from os import startfile
+except ImportError:
+    startfile = None
+
+try:
+    from ctypes import windll
+except ImportError:
+    windll = None
+
+try:
+    import winreg
+except ImportError:
+    winreg = None
+
+try:
+    from os import sched_setaffinity, sched_getaffinity
+except ImportError:
+    sched_setaffinity = None
+
+try:
+    from os import posix_fadvise, POSIX_FADV_DONTNEED
+except ImportError:
+    posix_fadvise = None
+
+try:
+    from time import clock_gettime, CLOCK_BOOTTIME
+except ImportError:
+    CLOCK_BOOTTIME = None
+
+try:
+    from psutil import HIGH_PRIORITY_CLASS, ABOVE_NORMAL_PRIORITY_CLASS, NORMAL_PRIORITY_CLASS, \
+        BELOW_NORMAL_PRIORITY_CLASS, IDLE_PRIORITY_CLASS
+except ImportError:
+    HIGH_PRIORITY_CLASS = -10
+    ABOVE_NORMAL_PRIORITY_CLASS = -5
+    NORMAL_PRIORITY_CLASS = 0
+    BELOW_NORMAL_PRIORITY_CLASS = 10
+    IDLE_PRIORITY_CLASS = 19
+
+try:
+    from psutil import IOPRIO_CLASS_IDLE, IOPRIO_CLASS_BE
+except ImportError:
+    IOPRIO_CLASS_IDLE = IOPRIO_CLASS_BE = None
+
+try:
+    from psutil import IOPRIO_VERYLOW, IOPRIO_LOW, IOPRIO_NORMAL, IOPRIO_HIGH
+except ImportError:
+    IOPRIO_VERYLOW = IOPRIO_LOW = IOPRIO_NORMAL = IOPRIO_HIGH = None
 
 try:
     import GPUtil
 except ImportError:
     GPUtil = None
 
+try:
+    import pynvml
+except ImportError:
+    pynvml = None
+
+
+class Metrics:
+    """
+    Process-wide latency histograms and counters for the backend, rendered in the
+    Prometheus text format. Methods opt in with @timed; @timed(tick=True) records
+    background-loop iterations with their CPU cost. An observation is one bisect
+    and a few additions under a lock. Nothing is recorded until `enabled` is set,
+    which starting a MetricsExporter does.
+    """
+
+    BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+               1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, prefix="optimise"):
+        self.prefix = prefix
+        self.enabled = False
+        self.started = time()
+        # name -> [bucket counts..., +Inf count, sum, count, errors or cpu seconds]
+        self._calls = {}
+        self._ticks = {}
+        self._lock = Lock()
+
+    def _record(self, table, key, seconds, extra):
+        i = bisect_left(self.BUCKETS, seconds)
+        with self._lock:
+            row = table.get(key)
+            if row is None:
+                row = table[key] = [0] * (len(self.BUCKETS) + 1) + [0.0, 0, 0]
+            row[i] += 1
+            row[-3] += seconds
+            row[-2] += 1
+            row[-1] += extra
+
+    def observe(self, name, seconds, error=False):
+        self._record(self._calls, name, seconds, 1 if error else 0)
+
+    def tick(self, loop, seconds, cpu_seconds):
+        self._record(self._ticks, loop, seconds, cpu_seconds)
+
+    def reset(self):
+        with self._lock:
+            self._calls.clear()
+            self._ticks.clear()
+
+    def stats(self):
+        """{name: {calls, errors, avg_ms}} for calls and {loop: {ticks, avg_ms, cpu_seconds}} for ticks."""
+        with self._lock:
+            calls = {k: {"calls": r[-2], "errors": r[-1], "avg_ms": r[-3] / r[-2] * 1000} for k, r in self._calls.items()}
+            ticks = {k: {"ticks": r[-2], "avg_ms": r[-3] / r[-2] * 1000, "cpu_seconds": r[-1]} for k, r in self._ticks.items()}
+        return {"calls": calls, "ticks": ticks}
+
+    def _histogram(self, lines, name, label, rows):
+        lines.append(f"# TYPE {name} histogram")
+        bounds = [repr(b) for b in self.BUCKETS] + ["+Inf"]
+        for key, row in sorted(rows.items()):
+            total = 0
+            for bound, n in zip(bounds, row):
+                total += n
+                lines.append(f'{name}_bucket{{{label}="{key}",le="{bound}"}} {total}')
+            lines.append(f'{name}_sum{{{label}="{key}"}} {row[-3]!r}')
+            lines.append(f'{name}_count{{{label}="{key}"}} {row[-2]}')
+
+    def render(self):
+        p = self.prefix
+        with self._lock:
+            calls = {k: list(v) for k, v in self._calls.items()}
+            ticks = {k: list(v) for k, v in self._ticks.items()}
+        lines = [f"# HELP {p}_call_duration_seconds Wall time of backend Function methods."]
+        self._histogram(lines, f"{p}_call_duration_seconds", "function", calls)
+        lines += [f"# HELP {p}_call_errors_total Calls that raised or returned an ErrorResult.",
+                  f"# TYPE {p}_call_errors_total counter"]
+        lines += [f'{p}_call_errors_total{{function="{k}"}} {r[-1]}' for k, r in sorted(calls.items())]
+        lines.append(f"# HELP {p}_tick_duration_seconds Wall time of one background loop iteration.")
+        self._histogram(lines, f"{p}_tick_duration_seconds", "loop", ticks)
+        lines += [f"# HELP {p}_tick_cpu_seconds_total CPU time spent in background loop iterations.",
+                  f"# TYPE {p}_tick_cpu_seconds_total counter"]
+        lines += [f'{p}_tick_cpu_seconds_total{{loop="{k}"}} {r[-1]!r}' for k, r in sorted(ticks.items())]
+        try:
+            me = Process()
+            with me.oneshot():
+                rss, cpu, threads = me.memory_info().rss, sum(me.cpu_times()[:2]), me.num_threads()
+            lines += [f"# TYPE {p}_process_resident_memory_bytes gauge", f"{p}_process_resident_memory_bytes {rss}",
+                      f"# TYPE {p}_process_cpu_seconds_total counter", f"{p}_process_cpu_seconds_total {cpu!r}",
+                      f"# TYPE {p}_process_threads gauge", f"{p}_process_threads {threads}"]
+        except (NoSuchProcess, AccessDenied):
+            pass
+        lines += [f"# TYPE {p}_start_time_seconds gauge", f"{p}_start_time_seconds {self.started!r}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Writes the exposition atomically (e.g. for node_exporter's textfile collector)."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        replace(tmp, path)
+
+
+metrics = Metrics()
+
+
+class ErrorResult(str):
+    """A failure message for the UI. @timed methods returning one are counted as errors."""
+
+
+def timed(fn=None, tick=False):
+    """
+    Records a method's calls in `metrics` as "Class.method", with an error when it
+    raises or returns an ErrorResult. With tick=True each call is one iteration of
+    a background loop, recorded under the class name together with its CPU time.
+    """
+    if fn is None:
+        return lambda f: timed(f, tick)
+    owner, _, method = fn.__qualname__.rpartition(".")
+    owner = owner.rpartition(".")[2]
+    name = owner if tick else f"{owner}.{method}"
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not metrics.enabled:
+            return fn(*args, **kwargs)
+        cpu = thread_time() if tick else 0.0
+        start = perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            metrics.observe(name, perf_counter() - start, True)
+            raise
+        elapsed = perf_counter() - start
+        if tick:
+            metrics.tick(name, elapsed, thread_time() - cpu)
+        else:
+            metrics.observe(name, elapsed, isinstance(result, ErrorResult))
+        return result
+    return wrapper
+
 
 class Function:
     def __init__(self):
@@ -24,66 +236,1115 @@ class Function:
         print(f"[{self.__class__.__name__}] {msg}")
 
 
+def state_dir():
+    """Per-user directory (%LOCALAPPDATA% or $XDG_STATE_HOME) for files nobody picked a path for."""
+    base = environ.get("LOCALAPPDATA") or environ.get("XDG_STATE_HOME") or join(expanduser("~"), ".local", "state")
+    path = join(base, "optimise")
+    makedirs(path, exist_ok=True)
+    return path
+
+
+class MetricsExporter(Function):
+    """
+    Publishes `metrics` in the Prometheus text format: served at
+    http://host:port/metrics (localhost only by default) and/or rewritten to `path`
+    every `interval` seconds. A port or path of None disables that output.
+    """
+
+    def __init__(self, registry=None, host="127.0.0.1", port=9464, path="optimise_metrics.prom", interval=15.0):
+        super().__init__()
+        self.registry = registry or metrics
+        self.host = host
+        self.port = port
+        self.path = path
+        self.interval = interval
+        self.running = False
+        self._server = None
+        self._stop = Event()
+
+    def start(self):
+        if self.running:
+            return "Metrics exporter already running"
+        self.running = True
+        self.registry.enabled = True
+        self._stop.clear()
+        out = []
+        if self.port is not None:
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = registry.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            try:
+                self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+                self._server.daemon_threads = True
+                Thread(target=self._server.serve_forever, daemon=True).start()
+                out.append(f"http://{self.host}:{self._server.server_port}/metrics")
+            except OSError as e:
+                self.log(f"Could not bind {self.host}:{self.port}: {e}")
+                self._server = None
+        if self.path:
+            Thread(target=self._write_loop, daemon=True).start()
+            out.append(self.path)
+        self.log(f"Exporting metrics to {', '.join(out) or 'nowhere'}.")
+        return f"Exporting metrics to {', '.join(out)}" if out else ErrorResult("Error: no metrics output available")
+
+    def _write_loop(self):
+        while True:
+            try:
+                self.registry.write(self.path)
+            except OSError as e:
+                self.log(f"Could not write {self.path}: {e}")
+            if self._stop.wait(self.interval):
+                break
+
+    def stop(self):
+        self.running = False
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class ProcessSnapshot:
+    """
+    Immutable, array-backed view of the process table taken in a single scan.
+    Row i describes the process pid[i]; `procs[i]` is the cached psutil.Process for actions.
+    """
+
+    def __init__(self, taken, rows, scan_seconds):
+        self.taken = taken
+        self.scan_seconds = scan_seconds
+        columns = list(zip(*rows)) if rows else [()] * 7
+        self.pid = self._frozen(columns[0], np.int64)
+        self.create_time = self._frozen(columns[1], np.float64)
+        self.rss = self._frozen(columns[2], np.uint64)
+        self.cpu_percent = self._frozen(columns[3], np.float64)
+        self.ppid = self._frozen(columns[4], np.int64)
+        self.names = tuple(columns[5])
+        self.procs = tuple(columns[6])
+        self._index = None
+
+    @staticmethod
+    def _frozen(values, dtype):
+        arr = np.fromiter(values, dtype=dtype, count=len(values))
+        arr.flags.writeable = False
+        return arr
+
+    def __len__(self):
+        return len(self.names)
+
+    def age_ms(self):
+        return (monotonic() - self.taken) * 1000
+
+    def index_of(self, pid):
+        if self._index is None:
+            self._index = {p: i for i, p in enumerate(self.pid.tolist())}
+        return self._index.get(pid)
+
+    def row(self, i):
+        return {
+            "pid": int(self.pid[i]),
+            "name": self.names[i],
+            "create_time": float(self.create_time[i]),
+            "rss": int(self.rss[i]),
+            "cpu_percent": float(self.cpu_percent[i]),
+            "ppid": int(self.ppid[i])
+        }
+
+    def top_by_rss(self, limit=10):
+        order = np.argsort(self.rss)[::-1][:limit]
+        return [self.row(i) for i in order]
+
+
+class ProcessTable:
+    """
+    Shared process-table snapshot service.
+    Scans at most once per freshness window and keeps psutil.Process objects alive
+    across scans, keyed by (pid, create_time) so a reused pid never inherits the old
+    process's object, cpu_percent works without blocking and oneshot() reads each
+    /proc entry once. cpu_percent is measured since the previous scan, which every
+    consumer shares, so scans are never closer than `min_interval_ms`: a forced
+    refresh cannot shrink the governor's or the affinity manager's CPU window.
+    """
+
+    def __init__(self, min_interval_ms=250):
+        self.min_interval_ms = min_interval_ms
+        self._cache = {}
+        self._lock = Lock()
+        self._snapshot = None
+        self.scans = 0
+        self.total_scan_seconds = 0.0
+
+    def get(self, max_age_ms=1000):
+        """Returns a snapshot no older than `max_age_ms` (floored at `min_interval_ms`), rescanning only if needed."""
+        max_age_ms = max(max_age_ms, self.min_interval_ms)
+        snap = self._snapshot
+        if snap is not None and snap.age_ms() <= max_age_ms:
+            return snap
+        with self._lock:
+            snap = self._snapshot
+            if snap is not None and snap.age_ms() <= max_age_ms:
+                return snap
+            return self._scan()
+
+    def latest(self):
+        """The newest snapshot without scanning (None before the first scan)."""
+        return self._snapshot
+
+    def process(self, pid, created=None):
+        """
+        Process for `pid`; the cached one if its (pid, create_time) still matches.
+        With `created` the caller already knows the identity, so a cached entry is
+        returned without touching /proc (psutil re-checks it before sending signals);
+        otherwise, or if it is not cached, the pid is opened once and NoSuchProcess is
+        raised when it no longer belongs to the process created at `created`.
+        """
+        if created is not None:
+            proc = self._cache.get((pid, created))
+            if proc is not None:
+                return proc
+        fresh = Process(pid)
+        key = (pid, fresh.create_time())
+        if created is not None and key[1] != created:
+            raise NoSuchProcess(pid)
+        return self._cache.get(key) or fresh
+
+    def _scan(self):
+        start = perf_counter()
+        cache = self._cache
+        alive = {}
+        rows = []
+        for pid in pids():
+            try:
+                fresh = Process(pid)
+                key = (pid, fresh.create_time())
+                proc = cache.get(key, fresh)
+                with proc.oneshot():
+                    name = proc.name()
+                    ppid = proc.ppid()
+                    try:
+                        rss = proc.memory_info().rss
+                    except AccessDenied:
+                        rss = 0
+                    try:
+                        cpu = proc.cpu_percent()
+                    except AccessDenied:
+                        cpu = 0.0
+            except (NoSuchProcess, AccessDenied, ZombieProcess):
+                continue
+            alive[key] = proc
+            rows.append((pid, key[1], rss, cpu, ppid, name, proc))
+
+        self._cache = alive
+        elapsed = perf_counter() - start
+        self.scans += 1
+        self.total_scan_seconds += elapsed
+        self._snapshot = ProcessSnapshot(monotonic(), rows, elapsed)
+        return self._snapshot
+
+    def stats(self):
+        snap = self._snapshot
+        return {
+            "scans": self.scans,
+            "last_scan_ms": snap.scan_seconds * 1000 if snap else None,
+            "avg_scan_ms": self.total_scan_seconds / self.scans * 1000 if self.scans else None,
+            "processes": len(snap) if snap else 0
+        }
+
+
+process_table = ProcessTable()
+
+
+class RingBuffer:
+    """Fixed-size NumPy ring buffer of timestamped rows."""
+
+    def __init__(self, capacity, width=1):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.data = np.zeros((capacity, width), dtype=np.float64)
+        self.count = 0
+        self._head = 0
+        self._lock = Lock()
+
+    def append(self, t, values):
+        with self._lock:
+            self.times[self._head] = t
+            self.data[self._head] = values
+            self._head = (self._head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def latest(self):
+        """Returns (time, row) of the newest sample or None."""
+        with self._lock:
+            if not self.count:
+                return None
+            i = (self._head - 1) % self.capacity
+            return self.times[i], self.data[i].copy()
+
+    def history(self, n=None):
+        """Returns (times, rows) oldest first, at most `n` samples."""
+        with self._lock:
+            n = self.count if n is None else min(n, self.count)
+            idx = (np.arange(self._head - n, self._head)) % self.capacity
+            return self.times[idx], self.data[idx]
+
+
+class TelemetrySampler(Function):
+    """
+    Background thread sampling CPU, frequency, memory, swap, disk and network
+    counters into ring buffers, so the UI never waits on psutil.
+    Counters (disk/net) are stored as per-second rates.
+    """
+
+    def __init__(self, interval=1.0, capacity=600, max_overhead=0.01):
+        super().__init__()
+        self.interval = interval
+        self.capacity = capacity
+        self.max_overhead = max_overhead
+        self.running = False
+        self.physical_cores = cpu_count(logical=False)
+        self.logical_cores = cpu_count(logical=True) or 1
+        self.columns = {
+            "cpu": ["total"] + [f"core{i}" for i in range(self.logical_cores)],
+            "freq": ["current_mhz"],
+            "memory": ["percent", "used", "available"],
+            "swap": ["percent", "used"],
+            "disk": ["read_bps", "write_bps"],
+            "net": ["sent_bps", "recv_bps"]
+        }
+        self.series = {name: RingBuffer(capacity, len(cols)) for name, cols in self.columns.items()}
+        self.last_memory = None
+        self.samples = 0
+        self.sample_cpu_time = 0.0
+        self.last_sample_ms = 0.0
+        self._prev = None
+        self._lock = Lock()
+        self.listeners = []
+
+    def start(self):
+        """Returns at once; the first sample is taken on the sampler thread (readers see nothing until then)."""
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+        Thread(target=self._loop, daemon=True).start()
+        self.log(f"Telemetry sampler started ({self.interval}s interval).")
+
+    def stop(self):
+        self.running = False
+
+    def _loop(self):
+        # primes cpu_percent so the first real sample is meaningful
+        cpu_percent(percpu=True)
+        self._sample()
+        while self.running:
+            sleep(self.interval)
+            start = thread_time()
+            self._sample()
+            cost = thread_time() - start
+            # keep sampler CPU below max_overhead of one core
+            if cost > self.interval * self.max_overhead:
+                self.interval = min(cost / self.max_overhead, 10.0)
+
+    @timed(tick=True)
+    def _sample(self):
+        start = perf_counter()
+        cpu_start = thread_time()
+        now = time()
+
+        cores = cpu_percent(percpu=True)
+        total = sum(cores) / len(cores) if cores else 0.0
+        self.series["cpu"].append(now, [total] + cores[:self.logical_cores])
+
+        freq = cpu_freq()
+        self.series["freq"].append(now, [freq.current if freq else np.nan])
+
+        mem = virtual_memory()
+        self.last_memory = mem
+        self.series["memory"].append(now, [mem.percent, mem.used, mem.available])
+
+        swap = swap_memory()
+        self.series["swap"].append(now, [swap.percent, swap.used])
+
+        disk = disk_io_counters()
+        net = net_io_counters()
+        if self._prev is not None:
+            p_time, p_disk, p_net = self._prev
+            dt = max(now - p_time, 1e-6)
+            if disk and p_disk:
+                self.series["disk"].append(now, [(disk.read_bytes - p_disk.read_bytes) / dt,
+                                                 (disk.write_bytes - p_disk.write_bytes) / dt])
+            if net and p_net:
+                self.series["net"].append(now, [(net.bytes_sent - p_net.bytes_sent) / dt,
+                                                (net.bytes_recv - p_net.bytes_recv) / dt])
+        self._prev = (now, disk, net)
+
+        for listener in self.listeners:
+            try:
+                listener(now, self)
+            except Exception as e:
+                self.log(f"Listener error: {e}")
+
+        self.samples += 1
+        self.sample_cpu_time += thread_time() - cpu_start
+        self.last_sample_ms = (perf_counter() - start) * 1000
+
+    def latest(self, name):
+        """Latest row of a series as a {column: value} dict (empty if not sampled yet)."""
+        sample = self.series[name].latest()
+        if sample is None:
+            return {}
+        return dict(zip(self.columns[name], sample[1].tolist()))
+
+    def history(self, name, seconds=None):
+        times, rows = self.series[name].history()
+        if seconds is not None and len(times):
+            keep = times >= times[-1] - seconds
+            times, rows = times[keep], rows[keep]
+        return times, rows
+
+    def stats(self):
+        return {
+            "samples": self.samples,
+            "interval": self.interval,
+            "last_sample_ms": self.last_sample_ms,
+            "avg_sample_cpu_ms": self.sample_cpu_time / self.samples * 1000 if self.samples else None,
+            "overhead_percent": (self.sample_cpu_time / self.samples / self.interval * 100) if self.samples else None
+        }
+
+
+telemetry = TelemetrySampler()
+
+
+class MetricsStore:
+    """
+    Round-robin time-series file with raw, 1-minute and 1-hour tiers.
+    The file is created at full size and memory-mapped, so disk usage never grows.
+    Every slot holds (time, min[c], avg[c], max[c]) for up to `max_columns` metrics;
+    raw samples store the same value in all three. Names in `reserved` (the system
+    series) always have a column; other names share the rest, and when they run out
+    the least recently recorded one is evicted and its history cleared.
+    """
+    MAGIC = 0x4F50544D
+    VERSION = 1
+    HEADER_BYTES = 65536
+    NAMES_OFFSET = 256
+    TIERS = (("raw", 0), ("minute", 60), ("hour", 3600))
+
+    def __init__(self, path, max_columns=48, capacities=(3600, 10080, 8760), reserved=()):
+        self.path = path
+        self._lock = Lock()
+        if exists(path):
+            self._open_existing()
+        else:
+            self._create(max_columns, capacities)
+        self._pending = [None, None]
+        if len(reserved) > self.max_columns:
+            raise ValueError(f"{len(reserved)} reserved series do not fit in {self.max_columns} columns")
+        self.reserved = frozenset(reserved)
+        # name -> time it was last recorded, for eviction
+        self._used = {}
+        self.evicted = []
+        for name in reserved:
+            self.column(name)
+
+    def _layout(self):
+        self.width = 1 + 3 * self.max_columns
+        self.tiers = {}
+        offset = self.HEADER_BYTES
+        for i, (name, _) in enumerate(self.TIERS):
+            cap = int(self.control[4 + i])
+            self.tiers[name] = np.memmap(self.path, dtype=np.float64, mode="r+", offset=offset, shape=(cap, self.width))
+            offset += cap * self.width * 8
+
+    def _create(self, max_columns, capacities):
+        width = 1 + 3 * max_columns
+        size = self.HEADER_BYTES + sum(capacities) * width * 8
+        with open(self.path, "wb") as f:
+            f.truncate(size)
+        self.control = np.memmap(self.path, dtype=np.int64, mode="r+", offset=0, shape=(16,))
+        self.control[:7] = [self.MAGIC, self.VERSION, max_columns, 0, *capacities]
+        self.max_columns = max_columns
+        self.columns = []
+        self._layout()
+        for tier in self.tiers.values():
+            tier[:] = np.nan
+        self._write_names()
+
+    def _open_existing(self):
+        self.control = np.memmap(self.path, dtype=np.int64, mode="r+", offset=0, shape=(16,))
+        if self.control[0] != self.MAGIC or self.control[1] != self.VERSION:
+            raise ValueError(f"{self.path} is not a metrics store")
+        self.max_columns = int(self.control[2])
+        with open(self.path, "rb") as f:
+            f.seek(self.NAMES_OFFSET)
+            raw = f.read(self.HEADER_BYTES - self.NAMES_OFFSET).rstrip(b"\0")
+        self.columns = loads(raw) if raw else []
+        self._layout()
+
+    def _write_names(self):
+        data = dumps(self.columns).encode()
+        with open(self.path, "r+b") as f:
+            f.seek(self.NAMES_OFFSET)
+            f.write(data.ljust(self.HEADER_BYTES - self.NAMES_OFFSET, b"\0"))
+
+    # head/count per tier live in control[8:14]
+    def _head(self, t):
+        return int(self.control[8 + 2 * t]), int(self.control[9 + 2 * t])
+
+    def _push(self, t, row):
+        name = self.TIERS[t][0]
+        tier = self.tiers[name]
+        head, count = self._head(t)
+        tier[head] = row
+        self.control[8 + 2 * t] = (head + 1) % len(tier)
+        self.control[9 + 2 * t] = min(count + 1, len(tier))
+
+    def column(self, name):
+        """Index of a metric column, registering it if needed. Evicted names are appended to `evicted`."""
+        try:
+            return self.columns.index(name)
+        except ValueError:
+            pass
+        dynamic = [n for n in self.columns if n not in self.reserved]
+        if len(self.columns) < self.max_columns and \
+                (name in self.reserved or len(dynamic) < self.max_columns - len(self.reserved)):
+            self.columns.append(name)
+            self._write_names()
+            return len(self.columns) - 1
+        victim = min(dynamic, key=lambda n: self._used.get(n, 0.0))
+        i = self.columns.index(victim)
+        self._clear(i)
+        self.columns[i] = name
+        self._used.pop(victim, None)
+        self.evicted.append(victim)
+        self._write_names()
+        return i
+
+    def _clear(self, i):
+        """Forgets everything stored in column i, so its next owner starts empty."""
+        c = self.max_columns
+        for tier in self.tiers.values():
+            tier[:, [1 + i, 1 + c + i, 1 + 2 * c + i]] = np.nan
+        for pending in self._pending:
+            if pending is not None:
+                pending[1][i], pending[2][i], pending[3][i], pending[4][i] = np.nan, 0.0, 0.0, np.nan
+
+    def record(self, t, values):
+        """Stores one raw sample ({metric: value}) and rolls finished buckets up."""
+        with self._lock:
+            vals = np.full(self.max_columns, np.nan)
+            for name, value in values.items():
+                vals[self.column(name)] = value
+                self._used[name] = t
+            row = np.empty(self.width)
+            row[0] = t
+            row[1:].reshape(3, -1)[:] = vals
+            self._push(0, row)
+            self._rollup(1, t, vals, vals, vals, 1)
+
+    def _rollup(self, level, t, lo, avg, hi, weight):
+        """Accumulates into the bucket of tier `level`, flushing it when `t` crosses a boundary."""
+        step = self.TIERS[level][1]
+        bucket = t - t % step
+        pending = self._pending[level - 1]
+        if pending is not None and pending[0] != bucket:
+            p_bucket, p_lo, p_sum, p_n, p_hi, p_w = pending
+            with np.errstate(invalid="ignore", divide="ignore"):
+                p_avg = p_sum / p_n
+            row = np.concatenate(([p_bucket], p_lo, p_avg, p_hi))
+            self._push(level, row)
+            if level + 1 < len(self.TIERS):
+                self._rollup(level + 1, p_bucket, p_lo, p_avg, p_hi, p_w)
+            else:
+                self.flush()
+            pending = None
+        if pending is None:
+            pending = [bucket, np.full(self.max_columns, np.nan), np.zeros(self.max_columns),
+                       np.zeros(self.max_columns), np.full(self.max_columns, np.nan), 0]
+        seen = ~np.isnan(avg)
+        pending[1] = np.fmin(pending[1], lo)
+        pending[2][seen] += avg[seen] * weight
+        pending[3][seen] += weight
+        pending[4] = np.fmax(pending[4], hi)
+        pending[5] += weight
+        self._pending[level - 1] = pending
+
+    def flush(self):
+        self.control.flush()
+        for tier in self.tiers.values():
+            tier.flush()
+
+    def _order(self, t):
+        """Slot indices of tier `t`, oldest first."""
+        head, count = self._head(t)
+        return np.arange(head - count, head) % len(self.tiers[self.TIERS[t][0]])
+
+    def query(self, names, start, end=None, tier=None):
+        """
+        Returns {"tier", "time", "<name>": {"min", "avg", "max"}} arrays for start <= time <= end.
+        Picks the finest tier that still covers `start` unless `tier` is given.
+        """
+        end = time() if end is None else end
+        tier_names = [n for n, _ in self.TIERS]
+        with self._lock:
+            if tier is None:
+                tier = tier_names[-1]
+                for t, name in enumerate(tier_names):
+                    head, count = self._head(t)
+                    if count and self.tiers[name][(head - count) % len(self.tiers[name]), 0] <= start:
+                        tier = name
+                        break
+            t = tier_names.index(tier)
+            data = self.tiers[tier]
+            idx = self._order(t)
+            times = data[idx, 0]
+            lo, hi = np.searchsorted(times, start, "left"), np.searchsorted(times, end, "right")
+            rows = data[idx[lo:hi]]
+        result = {"tier": tier, "time": rows[:, 0]}
+        c = self.max_columns
+        for name in names:
+            if name in self.columns:
+                i = self.columns.index(name)
+                result[name] = {"min": rows[:, 1 + i], "avg": rows[:, 1 + c + i], "max": rows[:, 1 + 2 * c + i]}
+        return result
+
+
+class MetricsHistory_F(Function):
+    """Feeds telemetry samples (and the top processes by RSS) into a MetricsStore."""
+    SYSTEM_METRICS = [("cpu", "total"), ("freq", "current_mhz"), ("memory", "percent"), ("memory", "used"),
+                      ("swap", "percent"), ("disk", "read_bps"), ("disk", "write_bps"),
+                      ("net", "sent_bps"), ("net", "recv_bps")]
+
+    def __init__(self, sampler, path="metrics_history.dat", process_every=10, top_processes=5):
+        super().__init__()
+        self.store = MetricsStore(path, reserved=[f"{series}.{col}" for series, col in self.SYSTEM_METRICS])
+        self.process_every = process_every
+        self.top_processes = top_processes
+        self._ticks = 0
+        sampler.listeners.append(self.on_sample)
+        self.log(f"Metrics history at {path} ({len(self.store.columns)} series).")
+
+    def on_sample(self, now, sampler):
+        values = {}
+        for series, col in self.SYSTEM_METRICS:
+            latest = sampler.latest(series)
+            if col in latest:
+                values[f"{series}.{col}"] = latest[col]
+        self._ticks += 1
+        if self._ticks % self.process_every == 0:
+            for p in process_table.get(max_age_ms=sampler.interval * 1000).top_by_rss(self.top_processes):
+                values[f"proc.{p['name']}.rss"] = p["rss"]
+        self.store.record(now, values)
+        while self.store.evicted:
+            self.log(f"Metrics store full: dropped the least recently seen series {self.store.evicted.pop()}.")
+
+    @timed
+    def summary(self, name, seconds):
+        """Min/avg/max of one metric over the last `seconds`."""
+        data = self.store.query([name], time() - seconds)
+        if name not in data or not len(data["time"]):
+            return None
+        with np.errstate(all="ignore"):
+            return {"min": float(np.nanmin(data[name]["min"])), "avg": float(np.nanmean(data[name]["avg"])),
+                    "max": float(np.nanmax(data[name]["max"]))}
+
+
+class RuleSet:
+    """
+    Compiles blacklist/whitelist entries into a single matcher.
+
+    Entry syntax:
+        chrome.exe             exact name (hash lookup)
+        chrome*.exe            name glob
+        re:steam.*             name regex (matched from the start)
+        exe:C:\\Games\\*         executable path glob
+        cmd:--type=renderer    command line substring
+        user:guest             username
+        parent:explorer.exe    parent process name glob
+    """
+    GLOB_CHARS = "*?["
+
+    def __init__(self, entries=()):
+        self.compile(entries)
+
+    def compile(self, entries):
+        self.entries = list(entries)
+        self.errors = []
+        self.exact = {}
+        self.users = {}
+        self.hits = dict.fromkeys(self.entries, 0)
+        self.eval_time = dict.fromkeys(self.entries, 0.0)
+        self.evaluations = 0
+        self.total_time = 0.0
+        self.samples = deque(maxlen=256)
+        self._patterns = {}
+        self._groups = {}
+
+        parts = {"name": [], "exe": [], "parent": [], "cmdline": []}
+        alone = {field: [] for field in parts}
+        for i, entry in enumerate(self.entries):
+            kind, sep, value = entry.partition(":")
+            if not sep or kind not in ("re", "exe", "cmd", "user", "parent"):
+                kind, value = "name", entry
+
+            if kind == "user":
+                self.users.setdefault(value, entry)
+                continue
+            if kind == "name" and not any(c in value for c in self.GLOB_CHARS):
+                self.exact.setdefault(value, entry)
+                continue
+
+            if kind == "re":
+                field, pattern = "name", value
+            elif kind == "cmd":
+                field, pattern = "cmdline", escape(value)
+            else:
+                field, pattern = ("name" if kind == "name" else kind), translate(value)
+
+            try:
+                compiled = re_compile(pattern)
+            except re_error as e:
+                self.errors.append(f"Invalid rule '{entry}': {e}")
+                continue
+            self._patterns[entry] = (field, compiled)
+            # groups (named or backreferenced) and inline global flags change meaning
+            # once concatenated, so those patterns are matched on their own
+            if compiled.groups or compiled.flags & ~RE_UNICODE:
+                alone[field].append((entry, compiled))
+                continue
+            group = f"r{i}"
+            self._groups[group] = entry
+            parts[field].append((entry, f"(?P<{group}>{pattern})"))
+
+        self._matchers = []
+        for field, alternatives in parts.items():
+            # substrings may appear anywhere, everything else is anchored
+            search = field == "cmdline"
+            if alternatives:
+                try:
+                    regex = re_compile("|".join(p for _, p in alternatives))
+                    self._matchers.append((field, self._combined(regex, search)))
+                except re_error:
+                    alone[field] = [(e, self._patterns[e][1]) for e, _ in alternatives] + alone[field]
+            if alone[field]:
+                self._matchers.append((field, self._each(alone[field], search)))
+
+    def _combined(self, regex, search):
+        test, groups = (regex.search if search else regex.match), self._groups
+
+        def match(value):
+            m = test(value)
+            return groups[m.lastgroup] if m else None
+        return match
+
+    @staticmethod
+    def _each(rules, search):
+        tests = [(entry, pattern.search if search else pattern.match) for entry, pattern in rules]
+
+        def match(value):
+            for entry, test in tests:
+                if test(value):
+                    return entry
+            return None
+        return match
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _field(self, proc, field, name):
+        if field == "name":
+            return name
+        if field == "exe":
+            return proc.exe()
+        if field == "cmdline":
+            return " ".join(proc.cmdline())
+        if field == "username":
+            return proc.username()
+        parent = proc.parent()
+        return parent.name() if parent else ""
+
+    def match(self, proc, name):
+        """
+        Returns the first matching entry or None.
+        Attributes other than the name are only read when some rule needs them.
+        """
+        start = perf_counter()
+        rule = self.exact.get(name)
+        if rule is None:
+            if self.users:
+                try:
+                    rule = self.users.get(proc.username())
+                except (NoSuchProcess, AccessDenied, ZombieProcess):
+                    pass
+            if rule is None:
+                for field, matcher in self._matchers:
+                    try:
+                        value = self._field(proc, field, name)
+                    except (NoSuchProcess, AccessDenied, ZombieProcess):
+                        continue
+                    if value is None:
+                        continue
+                    self.samples.append((field, value))
+                    rule = matcher(value)
+                    if rule is not None:
+                        break
+        self.total_time += perf_counter() - start
+        self.evaluations += 1
+        if rule is not None:
+            self.hits[rule] += 1
+        return rule
+
+    def profile(self):
+        """Times each pattern rule on its own against recently seen values (seconds per evaluation)."""
+        samples = list(self.samples)
+        for entry, (field, pattern) in self._patterns.items():
+            values = [v for f, v in samples if f == field]
+            if not values:
+                continue
+            test = pattern.search if field == "cmdline" else pattern.match
+            start = perf_counter()
+            for v in values:
+                test(v)
+            self.eval_time[entry] = (perf_counter() - start) / len(values)
+        return self.eval_time
+
+    def stats(self):
+        """Per-rule hits and evaluation cost, most expensive first."""
+        self.profile()
+        rows = [{"rule": e, "hits": self.hits[e], "eval_us": self.eval_time[e] * 1e6} for e in self.entries]
+        return sorted(rows, key=lambda r: r["eval_us"], reverse=True)
+
+
+def create_time_skew():
+    """
+    On Linux psutil derives create_time from the whole-second btime in /proc/stat,
+    so it can be off by up to a second. Returns the offset to subtract.
+    """
+    if CLOCK_BOOTTIME is None:
+        return 0.0
+    return boot_time() - (time() - clock_gettime(CLOCK_BOOTTIME))
+
+
+class ProcConnector:
+    """
+    Linux netlink proc connector subscription.
+    Delivers fork/exec events as they happen (requires root / CAP_NET_ADMIN).
+    """
+    NETLINK_CONNECTOR = 11
+    CN_IDX_PROC = 1
+    CN_VAL_PROC = 1
+    PROC_CN_MCAST_LISTEN = 1
+    PROC_CN_MCAST_IGNORE = 2
+    PROC_EVENT_FORK = 0x00000001
+    PROC_EVENT_EXEC = 0x00000002
+
+    NLMSG_HDR = struct.Struct("=IHHII")
+    CN_MSG_HDR = struct.Struct("=IIIIHH")
+    PROC_EVENT_HDR = struct.Struct("=IIQ")
+    FORK_EVENT = struct.Struct("=IIII")
+    EXEC_EVENT = struct.Struct("=II")
+
+    def __init__(self, timeout=0.5):
+        self.sock = None
+        self.timeout = timeout
+
+    @staticmethod
+    def available():
+        return hasattr(socket, "AF_NETLINK")
+
+    def _control(self, op):
+        payload = struct.pack("=I", op)
+        cn_msg = self.CN_MSG_HDR.pack(self.CN_IDX_PROC, self.CN_VAL_PROC, 0, 0, len(payload), 0) + payload
+        nl_len = self.NLMSG_HDR.size + len(cn_msg)
+        # NLMSG_DONE (3) marks a single-part message
+        self.sock.send(self.NLMSG_HDR.pack(nl_len, 3, 0, 0, getpid()) + cn_msg)
+
+    def open(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, self.NETLINK_CONNECTOR)
+        try:
+            self.sock.bind((getpid(), self.CN_IDX_PROC))
+            self._control(self.PROC_CN_MCAST_LISTEN)
+            self.sock.settimeout(self.timeout)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self._control(self.PROC_CN_MCAST_IGNORE)
+            except OSError:
+                pass
+            self.sock.close()
+            self.sock = None
+
+    def read_events(self):
+        """Blocks up to `timeout` and returns a list of (event, pid) tuples."""
+        try:
+            data = self.sock.recv(65536)
+        except socket.timeout:
+            return []
+
+        events = []
+        offset = 0
+        while offset + self.NLMSG_HDR.size <= len(data):
+            nl_len = self.NLMSG_HDR.unpack_from(data, offset)[0]
+            if nl_len < self.NLMSG_HDR.size:
+                break
+            ev_off = offset + self.NLMSG_HDR.size + self.CN_MSG_HDR.size
+            what = self.PROC_EVENT_HDR.unpack_from(data, ev_off)[0]
+            body = ev_off + self.PROC_EVENT_HDR.size
+            if what == self.PROC_EVENT_FORK:
+                _, _, child_pid, child_tgid = self.FORK_EVENT.unpack_from(data, body)
+                if child_pid == child_tgid:
+                    events.append(("fork", child_tgid))
+            elif what == self.PROC_EVENT_EXEC:
+                _, tgid = self.EXEC_EVENT.unpack_from(data, body)
+                events.append(("exec", tgid))
+            # netlink messages are 4-byte aligned
+            offset += (nl_len + 3) & ~3
+        return events
+
+
+class ProcessListStore(Function):
+    """
+    Blacklist/whitelist storage backed by insertion-ordered dicts (hashed sets).
+    Readers use `view(name)`, an immutable tuple swapped in on every change, so the
+    monitor thread never takes the lock. Every change bumps `version` and is
+    recorded in a bounded journal; saves are debounced and atomic (temp file + rename).
+    """
+
+    LISTS = ("blacklist", "whitelist")
+
+    def __init__(self, path="process_config.json", save_delay=0.5, journal_size=1000):
+        super().__init__()
+        self.path = path
+        self.save_delay = save_delay
+        self.version = 0
+        self.saves = 0
+        self.journal = deque(maxlen=journal_size)
+        self.listeners = []
+        self._sets = {name: {} for name in self.LISTS}
+        self._views = {name: () for name in self.LISTS}
+        self._lock = Lock()
+        self._timer = None
+        # a change made just before exit would otherwise be lost with the daemon timer
+        atexit_register(self.flush_pending)
+
+    def view(self, name):
+        return self._views[name]
+
+    def load(self):
+        if not exists(self.path):
+            return False
+        with open(self.path, "r") as f:
+            data = load(f)
+        with self._lock:
+            for name in self.LISTS:
+                self._sets[name] = dict.fromkeys(data.get(name, []))
+                self._views[name] = tuple(self._sets[name])
+            self.version += 1
+            self.journal.append((self.version, time(), "load", None, ()))
+        self._notify("load", None, ())
+        return True
+
+    def add(self, name, entries):
+        """Adds entries to a list; returns the ones that were not already present."""
+        return self._change("add", name, entries)
+
+    def remove(self, name, entries):
+        """Removes entries from a list; returns the ones that were present."""
+        return self._change("remove", name, entries)
+
+    def import_file(self, name, path):
+        """Adds one entry per non-empty line (or a JSON list) from `path`; persisted once."""
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        entries = loads(text) if text.lstrip().startswith("[") else text.splitlines()
+        return self.add(name, (e.strip() for e in entries if e.strip() and not e.lstrip().startswith("#")))
+
+    def _change(self, op, name, entries):
+        with self._lock:
+            current = self._sets[name]
+            if op == "add":
+                changed = [e for e in dict.fromkeys(entries) if e not in current]
+                current.update(dict.fromkeys(changed))
+            else:
+                changed = [e for e in dict.fromkeys(entries) if e in current]
+                for e in changed:
+                    del current[e]
+            if not changed:
+                return []
+            self._views[name] = tuple(current)
+            self.version += 1
+            self.journal.append((self.version, time(), op, name, tuple(changed)))
+            self._schedule_save()
+        self._notify(op, name, changed)
+        return changed
+
+    def changes_since(self, version):
+        """Journal entries newer than `version` (None when the journal no longer reaches back that far)."""
+        entries = [e for e in self.journal if e[0] > version]
+        if version < self.version and (not entries or entries[0][0] != version + 1):
+            return None
+        return entries
+
+    def _notify(self, op, name, changed):
+        for fn in self.listeners:
+            try:
+                fn(op, name, changed)
+            except Exception as e:
+                self.log(f"List listener error: {e}")
+
+    def _schedule_save(self):
+        if self._timer is None:
+            self._timer = Timer(self.save_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush_pending(self):
+        if self._timer is not None:
+            self.flush()
+
+    def flush(self):
+        """Writes the current lists now (temp file + atomic rename)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            data = {name: list(self._views[name]) for name in self.LISTS}
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                dump(data, f, indent=4)
+            replace(tmp, self.path)
+            self.saves += 1
+        except OSError as e:
+            self.log(f"Error saving config: {e}")
+
+
 class ProcessMonitor_F(Function):
     def __init__(self):
         super().__init__()
         self.config_file = "process_config.json"
-        self.blacklist = []
-        self.whitelist = []
+        self.store = ProcessListStore(self.config_file)
         self.monitoring = False
+        self.min_poll_interval = 0.1
+        self.max_poll_interval = 2.0
+        self.engine = None
+        self.kill_latencies = deque(maxlen=1000)
+        # seconds a terminated process gets before it is killed outright
+        self.kill_grace = 3.0
+        # (pid, create_time) -> monotonic time of the last signal
+        self._killed = {}
+        self.loop_cpu_time = 0.0
+        self.loop_started = 0.0
+        self._known = {}
+        self._rescan = True
+        self._skew = 0.0
+        self.black_rules = RuleSet()
+        self.white_rules = RuleSet()
+        self.table = process_table
+        self.store.listeners.append(self._lists_changed)
         self.load_config()
 
+    @property
+    def blacklist(self):
+        return self.store.view("blacklist")
+
+    @property
+    def whitelist(self):
+        return self.store.view("whitelist")
+
     def load_config(self):
         try:
-            if exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    data = load(f)
-                    self.blacklist = data.get("blacklist", [])
-                    self.whitelist = data.get("whitelist", [])
+            if self.store.load():
                 self.log(f"Config loaded. Blacklist: {len(self.blacklist)}, Whitelist: {len(self.whitelist)}")
         except Exception as e:
             self.log(f"Error loading config: {e}")
 
     def save_config(self):
-        try:
-            with open(self.config_file, 'w') as f:
-                dump({"blacklist": self.blacklist, "whitelist": self.whitelist}, f, indent=4)
-            self.log("Config saved successfully.")
-        except Exception as e:
-            self.log(f"Error saving config: {e}")
+        """Persists immediately; list changes are otherwise saved debounced by the store."""
+        self.store.flush()
+        self.log("Config saved successfully.")
+
+    def _lists_changed(self, op, name, entries):
+        self.compile_rules()
+        # a new blacklist entry or a lifted whitelist entry can hit already running processes
+        if op == "load" or (name, op) in (("blacklist", "add"), ("whitelist", "remove")):
+            self._rescan = True
+
+    def compile_rules(self):
+        """Rebuilds the matchers. Only called when the lists change."""
+        black, white = RuleSet(self.blacklist), RuleSet(self.whitelist)
+        for err in black.errors + white.errors:
+            self.log(err)
+        self.black_rules, self.white_rules = black, white
+
+    def get_rule_stats(self):
+        return {"blacklist": self.black_rules.stats(), "whitelist": self.white_rules.stats()}
 
     def add_to_blacklist(self, name):
-        if name not in self.blacklist:
-            self.blacklist.append(name)
-            self.save_config()
+        if self.store.add("blacklist", [name]):
             self.log(f"Added '{name}' to blacklist.")
             return True
         return False
 
     def remove_from_blacklist(self, name):
-        if name in self.blacklist:
-            self.blacklist.remove(name)
-            self.save_config()
+        if self.store.remove("blacklist", [name]):
             self.log(f"Removed '{name}' from blacklist.")
             return True
         return False
 
     def add_to_whitelist(self, name):
-        if name not in self.whitelist:
-            self.whitelist.append(name)
-            self.save_config()
+        if self.store.add("whitelist", [name]):
             self.log(f"Added '{name}' to whitelist.")
             return True
         return False
 
     def remove_from_whitelist(self, name):
-        if name in self.whitelist:
-            self.whitelist.remove(name)
-            self.save_config()
+        if self.store.remove("whitelist", [name]):
             self.log(f"Removed '{name}' from whitelist.")
             return True
         return False
 
+    def add_many(self, list_name, names):
+        """Bulk add to 'blacklist' or 'whitelist'; rules are rebuilt and saved once."""
+        added = self.store.add(list_name, names)
+        self.log(f"Added {len(added)} entries to {list_name}.")
+        return added
+
+    def remove_many(self, list_name, names):
+        removed = self.store.remove(list_name, names)
+        self.log(f"Removed {len(removed)} entries from {list_name}.")
+        return removed
+
+    @timed
+    def import_list(self, list_name, path):
+        """Imports a text file (one entry per line) or JSON list into a list."""
+        try:
+            added = self.store.import_file(list_name, path)
+        except (OSError, ValueError) as e:
+            self.log(f"Import failed: {e}")
+            return ErrorResult(f"Import failed: {e}")
+        self.log(f"Imported {len(added)} new entries into {list_name} from {basename(path)}.")
+        return f"Imported {len(added)} new entries"
+
     def start_monitoring(self):
         if not self.monitoring:
             self.monitoring = True
@@ -97,93 +1358,879 @@ class ProcessMonitor_F(Function):
         self.log("Process monitoring stop requested.")
         return "Monitoring Stopped"
 
+    def get_stats(self):
+        """Returns enforcement latency and monitor CPU cost."""
+        elapsed = time() - self.loop_started if self.loop_started else 0
+        return {
+            "engine": self.engine,
+            "kills": len(self.kill_latencies),
+            "median_kill_latency_ms": median(self.kill_latencies) * 1000 if self.kill_latencies else None,
+            "cpu_seconds": self.loop_cpu_time,
+            "cpu_percent": (self.loop_cpu_time / elapsed * 100) if elapsed else 0.0,
+            "tracked_processes": len(self._known)
+        }
+
+    def _enforce(self, proc, name):
+        rule = self.black_rules.match(proc, name)
+        if rule is not None and self.white_rules.match(proc, name) is None:
+            key = (proc.pid, proc.create_time())
+            if key in self._killed:
+                # _escalate() follows up once the grace period is over
+                return True
+            proc.terminate()
+            self._killed[key] = monotonic()
+            self.kill_latencies.append(max(0.0, time() - (key[1] - self._skew)))
+            self.log(f"ACTION: Auto-Terminated blacklisted process '{name}' (PID: {proc.pid}, rule: '{rule}')")
+            return True
+        return False
+
+    def _escalate(self):
+        """Kills terminated processes still alive after `kill_grace`; forgets the ones that exited."""
+        now = monotonic()
+        for key, sent in list(self._killed.items()):
+            if now - sent < self.kill_grace:
+                continue
+            try:
+                proc = self.table.process(key[0], created=key[1])
+                proc.kill()
+                self._killed[key] = now
+                self.log(f"ACTION: PID {key[0]} ignored SIGTERM for {self.kill_grace:.0f}s, killed.")
+            except (NoSuchProcess, ZombieProcess):
+                del self._killed[key]
+            except AccessDenied:
+                self.log(f"Cannot kill PID {key[0]}: access denied.")
+                del self._killed[key]
+
+    def _check_pid(self, pid):
+        try:
+            proc = self.table.process(pid)
+            self._enforce(proc, proc.name())
+        except (NoSuchProcess, AccessDenied, ZombieProcess):
+            pass
+
+    def _sweep(self):
+        """Full process table pass, used on start and after the lists change."""
+        self._rescan = False
+        self._known = {}
+        snap = self.table.get(max_age_ms=0)
+        for i, proc in enumerate(snap.procs):
+            try:
+                self._known[proc.pid] = self._enforce(proc, snap.names[i])
+            except AccessDenied:
+                # remembered so the poller does not retry it every tick
+                self._known[proc.pid] = None
+            except (NoSuchProcess, ZombieProcess):
+                pass
+
     def _monitor_loop(self):
         self.log("Background monitoring loop active.")
-        while self.monitoring:
-            for proc in process_iter(['pid', 'name']):
-                try:
-                    if proc.info['name'] in self.blacklist:
-                        if proc.info['name'] not in self.whitelist:
-                            proc.terminate()
-                            self.log(f"ACTION: Auto-Terminated blacklisted process '{proc.info['name']}' (PID: {proc.info['pid']})")
-                except (NoSuchProcess, AccessDenied, ZombieProcess):
-                    pass
-            sleep(2)
+        self.loop_started = time()
+        self.loop_cpu_time = 0.0
+        self._skew = create_time_skew()
+        connector = None
+        if ProcConnector.available():
+            try:
+                connector = ProcConnector()
+                connector.open()
+            except OSError as e:
+                self.log(f"Proc connector unavailable ({e}), falling back to adaptive polling.")
+                connector = None
+
+        try:
+            if connector:
+                self._event_loop(connector)
+            else:
+                self._poll_loop()
+        finally:
+            if connector:
+                connector.close()
         self.log("Background monitoring loop terminated.")
 
+    def _event_loop(self, connector):
+        self.engine = "netlink"
+        self.log("Enforcement engine: netlink proc connector (exec/fork events).")
+        while self.monitoring:
+            cpu_start = thread_time()
+            events = connector.read_events()
+            start = perf_counter()
+            if self._rescan:
+                self._sweep()
+            for _, pid in events:
+                self._check_pid(pid)
+            if self._killed:
+                self._escalate()
+            cost = thread_time() - cpu_start
+            self.loop_cpu_time += cost
+            metrics.tick(self.__class__.__name__, perf_counter() - start, cost)
 
-class FocusMode_F(Function):
-    def toggle_focus_mode(self, enable=True):
+    def _poll(self):
         """
-        Simulates Focus Mode by minimizing background windows (simplistic approach)
-        or checking for Windows Focus Assist (requires winreg).
-        Here we toggle a registry key for 'Focus Assist' (Priority Only).
+        One poller pass: the pid list is diffed against the previous pass and only new
+        pids are opened. Returns how many were new. Pids are reused only after the
+        kernel's pid counter wraps, and signalled processes are still tracked by
+        (pid, create_time) in `_killed`.
         """
-        key_path = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Notifications\Settings"
-        self.log(f"Toggling Focus Mode: {'ON' if enable else 'OFF'}")
-        try:
-            val = 1 if enable else 0
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, winreg.KEY_SET_VALUE)
-            winreg.SetValueEx(key, "NOC_GLOBAL_SETTING_TOASTS_ENABLED", 0, winreg.REG_DWORD, val)
-            winreg.CloseKey(key)
-            self.log("Registry updated: NOC_GLOBAL_SETTING_TOASTS_ENABLED")
-            return f"Focus Assist {'Enabled' if enable else 'Disabled'}"
-        except Exception as e:
-            self.log(f"Error accessing registry: {e}")
-            return f"Registry access failed: {e}. (Try running as Admin)"
+        known, seen, new = self._known, {}, 0
+        for pid in pids():
+            if pid in known:
+                seen[pid] = known[pid]
+                continue
+            new += 1
+            try:
+                proc = self.table.process(pid)
+                seen[pid] = self._enforce(proc, proc.name())
+            except (AccessDenied, ZombieProcess):
+                # remembered so it is not retried every tick
+                seen[pid] = None
+            except NoSuchProcess:
+                pass
+        self._known = seen
+        return new
 
+    def _poll_loop(self):
+        """Adaptive poller: the interval doubles while the process table is stable and snaps back on change."""
+        self.engine = "poll"
+        self.log("Enforcement engine: adaptive poller.")
+        interval = self.min_poll_interval
+        while self.monitoring:
+            cpu_start, start = thread_time(), perf_counter()
+            if self._rescan:
+                self._sweep()
+                interval = self.min_poll_interval
 
-class RegistryTweaks_F(Function):
-    def apply_tweak(self, tweak_name):
-        """Applies specific performance registry tweaks."""
-        self.log(f"Applying tweak: {tweak_name}")
+            new = self._poll()
+            if self._killed:
+                self._escalate()
+
+            interval = self.min_poll_interval if new else min(interval * 2, self.max_poll_interval)
+            cost = thread_time() - cpu_start
+            self.loop_cpu_time += cost
+            metrics.tick(self.__class__.__name__, perf_counter() - start, cost)
+            sleep(interval)
+
+
+class ResourceGovernor(Function):
+    """
+    Watches every process each tick and escalates against ones that stay over the
+    CPU/RSS thresholds: lower priority -> restrict affinity -> suspend -> terminate.
+    A process moves up one level per `sustain_seconds` over the limit and is
+    released (actions reverted) only once it drops below `release_ratio` of the
+    thresholds, which keeps it from flapping around the limit. Restricting affinity
+    confines a process to `restrict_cpus` (default: the last CPU it was allowed on).
+    """
+
+    ACTIONS = ("lower_priority", "restrict_affinity", "suspend", "terminate")
+
+    def __init__(self, cpu_threshold=90.0, rss_threshold_mb=None, sustain_seconds=30, release_ratio=0.7,
+                 suspend_seconds=10, max_level=4, interval=1.0, exempt=None, restrict_cpus=None):
+        super().__init__()
+        self.cpu_threshold = cpu_threshold
+        self.rss_threshold_mb = rss_threshold_mb
+        self.sustain_seconds = sustain_seconds
+        self.release_ratio = release_ratio
+        self.suspend_seconds = suspend_seconds
+        self.max_level = max_level
+        self.interval = interval
+        self.restrict_cpus = restrict_cpus
+        # callable returning a RuleSet (e.g. the monitor's whitelist); matches are never touched
+        self.exempt = exempt
+        self.table = process_table
+        self.running = False
+        self.tracked = {}
+        self.decisions = deque(maxlen=500)
+        self.ticks = 0
+        self.eval_seconds = 0.0
+        self.last_eval_ms = 0.0
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            Thread(target=self._loop, daemon=True).start()
+            self.log(f"Governor started (cpu>{self.cpu_threshold}% for {self.sustain_seconds}s).")
+
+    def stop(self):
+        self.running = False
+        for key in list(self.tracked):
+            self._release(key, "governor stopped")
+
+    def _loop(self):
+        while self.running:
+            try:
+                self.tick()
+            except Exception as e:
+                self.log(f"Governor tick failed: {e}")
+            sleep(self.interval)
+
+    @timed(tick=True)
+    def tick(self, snap=None, now=None):
+        """Evaluates one snapshot; the comparison itself is vectorised over all processes."""
+        snap = snap if snap is not None else self.table.get(max_age_ms=self.interval * 500)
+        now = monotonic() if now is None else now
+        start = perf_counter()
+
+        over = snap.cpu_percent >= self.cpu_threshold
+        calm = snap.cpu_percent < self.cpu_threshold * self.release_ratio
+        if self.rss_threshold_mb:
+            limit = self.rss_threshold_mb * 1024 * 1024
+            over |= snap.rss >= limit
+            calm &= snap.rss < limit * self.release_ratio
+
+        seen = set()
+        for i in np.flatnonzero(over).tolist():
+            key = (int(snap.pid[i]), float(snap.create_time[i]))
+            seen.add(key)
+            state = self.tracked.get(key)
+            if state is None:
+                if self._is_exempt(snap, i):
+                    continue
+                self.tracked[key] = state = {"pid": key[0], "name": snap.names[i], "proc": snap.procs[i],
+                                             "since": now, "last_step": now, "level": 0, "saved": {}}
+            state["cpu"], state["rss"] = float(snap.cpu_percent[i]), int(snap.rss[i])
+            if (not state.get("suspended") and state["level"] < self.max_level
+                    and now - state["last_step"] >= self.sustain_seconds):
+                self._escalate(key, state, now)
+
+        for key, state in list(self.tracked.items()):
+            if key not in seen:
+                i = snap.index_of(key[0])
+                if i is None or snap.create_time[i] != key[1]:
+                    del self.tracked[key]
+                    continue
+            if state.get("suspended"):
+                # suspension is timed whether or not the process still reads over the limit
+                # (a suspended one keeps its RSS); let it run again and keep watching
+                if now - state["last_step"] >= self.suspend_seconds:
+                    self._apply(state, "resume")
+                    state["suspended"], state["last_step"] = False, now
+            elif key not in seen and calm[i]:
+                self._release(key, f"cpu {snap.cpu_percent[i]:.0f}%, rss {snap.rss[i] / (1024*1024):.0f} MB")
+
+        elapsed = perf_counter() - start
+        self.ticks += 1
+        self.eval_seconds += elapsed
+        self.last_eval_ms = elapsed * 1000
+
+    def _is_exempt(self, snap, i):
+        pid = int(snap.pid[i])
+        if pid in (0, 1, 4) or pid == getpid():
+            return True
+        rules = self.exempt() if self.exempt else None
+        if rules is None:
+            return False
         try:
-            if tweak_name == "NetworkThrottling":
-                key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\Multimedia\SystemProfile", 0, winreg.KEY_SET_VALUE)
-                winreg.SetValueEx(key, "NetworkThrottlingIndex", 0, winreg.REG_DWORD, 0xffffffff)
-                winreg.CloseKey(key)
-                self.log("Registry: NetworkThrottlingIndex set to 0xffffffff")
-                return "Network Throttling Disabled"
-            
-            elif tweak_name == "SystemResponsiveness":
-                key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\Multimedia\SystemProfile", 0, winreg.KEY_SET_VALUE)
-                winreg.SetValueEx(key, "SystemResponsiveness", 0, winreg.REG_DWORD, 0)
-                winreg.CloseKey(key)
-                self.log("Registry: SystemResponsiveness set to 0")
-                return "System Responsiveness Optimized"
-            
-            elif tweak_name == "MenuShowDelay":
-                key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Control Panel\Desktop", 0, winreg.KEY_SET_VALUE)
-                winreg.SetValueEx(key, "MenuShowDelay", 0, winreg.REG_SZ, "0")
-                winreg.CloseKey(key)
-                self.log("Registry: MenuShowDelay set to 0")
-                return "Menu Delay Reduced"
-
-            elif tweak_name == "VisualEffects":
-                key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Explorer\VisualEffects", 0, winreg.KEY_SET_VALUE)
-                winreg.SetValueEx(key, "VisualFXSetting", 0, winreg.REG_DWORD, 2)
-                winreg.CloseKey(key)
-                self.log("Registry: VisualFXSetting set to 2 (Best Performance)")
-                return "Visual Effects Optimized"
-
-            elif tweak_name == "GameMode":
-                key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Microsoft\GameBar", 0, winreg.KEY_SET_VALUE)
-                winreg.SetValueEx(key, "AutoGameModeEnabled", 0, winreg.REG_DWORD, 1)
-                winreg.CloseKey(key)
-                self.log("Registry: AutoGameModeEnabled set to 1")
-                return "Game Mode Enabled"
-                
-            return "Unknown Tweak"
+            return rules.match(snap.procs[i], snap.names[i]) is not None
+        except (NoSuchProcess, AccessDenied, ZombieProcess):
+            return True
+
+    def _escalate(self, key, state, now):
+        action = self.ACTIONS[state["level"]]
+        ok = self._apply(state, action)
+        state["suspended"] = ok and action == "suspend"
+        state["level"] += 1
+        state["last_step"] = now
+        self._decide(state, action if ok else f"{action} (failed)", now)
+        if action == "terminate":
+            self.tracked.pop(key, None)
+
+    def _decide(self, state, action, now):
+        entry = {"time": time(), "pid": state["pid"], "name": state["name"], "action": action,
+                 "cpu_percent": state.get("cpu"), "rss_mb": state.get("rss", 0) / (1024*1024),
+                 "over_seconds": now - state["since"]}
+        self.decisions.append(entry)
+        self.log(f"{action}: '{entry['name']}' (PID {entry['pid']}) cpu {entry['cpu_percent']:.0f}%, "
+                 f"rss {entry['rss_mb']:.0f} MB, over limit for {entry['over_seconds']:.0f}s")
+
+    def _apply(self, state, action):
+        proc, saved = state["proc"], state["saved"]
+        try:
+            if action == "lower_priority":
+                saved.setdefault("nice", proc.nice())
+                proc.nice(BELOW_NORMAL_PRIORITY_CLASS if windll is not None else 10)
+            elif action == "restrict_affinity":
+                if not hasattr(proc, "cpu_affinity"):
+                    return False
+                cpus = saved.setdefault("affinity", proc.cpu_affinity())
+                # only CPUs the process could already use, so a cgroup/cpuset limit is never widened
+                target = [c for c in self.restrict_cpus or () if c in cpus] or cpus[-1:]
+                proc.cpu_affinity(target)
+            elif action == "suspend":
+                proc.suspend()
+            elif action == "resume":
+                proc.resume()
+            elif action == "terminate":
+                proc.terminate()
+            return True
+        except (NoSuchProcess, AccessDenied, ZombieProcess, OSError) as e:
+            self.log(f"{action} failed for PID {state['pid']}: {e}")
+            return False
+
+    def _release(self, key, reason):
+        state = self.tracked.pop(key)
+        if state["level"] == 0:
+            return
+        proc, saved = state["proc"], state["saved"]
+        try:
+            if state.get("suspended"):
+                proc.resume()
+            if "affinity" in saved:
+                proc.cpu_affinity(saved["affinity"])
+            if "nice" in saved:
+                proc.nice(saved["nice"])
+        except (NoSuchProcess, AccessDenied, ZombieProcess, OSError) as e:
+            self.log(f"Restore failed for PID {state['pid']}: {e}")
+        self.decisions.append({"time": time(), "pid": state["pid"], "name": state["name"], "action": "release",
+                               "reason": reason})
+        self.log(f"release: '{state['name']}' (PID {state['pid']}) back under limits ({reason})")
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "tracked": len(self.tracked),
+            "throttled": sum(1 for s in self.tracked.values() if s["level"] > 0),
+            "decisions": len(self.decisions),
+            "last_eval_ms": self.last_eval_ms,
+            "avg_eval_ms": self.eval_seconds / self.ticks * 1000 if self.ticks else 0.0
+        }
+
+
+governor = ResourceGovernor()
+
+
+TWEAK_PROFILES = {
+    "NetworkThrottling": [
+        {"key": r"HKLM\SOFTWARE\Microsoft\Windows NT\CurrentVersion\Multimedia\SystemProfile",
+         "name": "NetworkThrottlingIndex", "type": "REG_DWORD", "value": 0xffffffff}
+    ],
+    "SystemResponsiveness": [
+        {"key": r"HKLM\SOFTWARE\Microsoft\Windows NT\CurrentVersion\Multimedia\SystemProfile",
+         "name": "SystemResponsiveness", "type": "REG_DWORD", "value": 0}
+    ],
+    "MenuShowDelay": [
+        {"key": r"HKCU\Control Panel\Desktop", "name": "MenuShowDelay", "type": "REG_SZ", "value": "0"}
+    ],
+    "VisualEffects": [
+        {"key": r"HKCU\Software\Microsoft\Windows\CurrentVersion\Explorer\VisualEffects",
+         "name": "VisualFXSetting", "type": "REG_DWORD", "value": 2}
+    ],
+    "GameMode": [
+        {"key": r"HKCU\Software\Microsoft\GameBar", "name": "AutoGameModeEnabled", "type": "REG_DWORD", "value": 1}
+    ],
+    "FocusAssistOn": [
+        {"key": r"HKCU\SOFTWARE\Microsoft\Windows\CurrentVersion\Notifications\Settings",
+         "name": "NOC_GLOBAL_SETTING_TOASTS_ENABLED", "type": "REG_DWORD", "value": 1}
+    ],
+    "FocusAssistOff": [
+        {"key": r"HKCU\SOFTWARE\Microsoft\Windows\CurrentVersion\Notifications\Settings",
+         "name": "NOC_GLOBAL_SETTING_TOASTS_ENABLED", "type": "REG_DWORD", "value": 0}
+    ],
+    "LargeSystemCache": [
+        {"key": r"HKLM\SYSTEM\CurrentControlSet\Control\Session Manager\Memory Management",
+         "name": "LargeSystemCache", "type": "REG_DWORD", "value": 1},
+        {"key": r"HKLM\SYSTEM\CurrentControlSet\Control\Session Manager\Memory Management",
+         "name": "DisablePagingExecutive", "type": "REG_DWORD", "value": 1}
+    ],
+    "NTFS": [
+        {"key": r"HKLM\SYSTEM\CurrentControlSet\Control\FileSystem",
+         "name": "NtfsDisableLastAccessUpdate", "type": "REG_DWORD", "value": 1},
+        {"key": r"HKLM\SYSTEM\CurrentControlSet\Control\FileSystem",
+         "name": "NtfsDisable8dot3NameCreation", "type": "REG_DWORD", "value": 1}
+    ],
+    "HwSchMode": [
+        {"key": r"HKLM\SYSTEM\CurrentControlSet\Control\GraphicsDrivers", "name": "HwSchMode", "type": "REG_DWORD", "value": 2}
+    ]
+}
+
+
+class WinRegistry:
+    """Registry backend over winreg. open() returns a handle with get/set/delete/close."""
+
+    HIVES = {"HKLM": "HKEY_LOCAL_MACHINE", "HKCU": "HKEY_CURRENT_USER", "HKCR": "HKEY_CLASSES_ROOT", "HKU": "HKEY_USERS"}
+
+    class Handle:
+        def __init__(self, key):
+            self.key = key
+
+        def get(self, name):
+            """Returns (type, value) or None when the value does not exist."""
+            try:
+                value, kind = winreg.QueryValueEx(self.key, name)
+                return kind, value
+            except FileNotFoundError:
+                return None
+
+        def set(self, name, kind, value):
+            winreg.SetValueEx(self.key, name, 0, kind, value)
+
+        def delete(self, name):
+            winreg.DeleteValue(self.key, name)
+
+        def close(self):
+            winreg.CloseKey(self.key)
+
+    def type_code(self, name):
+        return getattr(winreg, name)
+
+    def open(self, path):
+        hive, _, sub = path.partition("\\")
+        root = getattr(winreg, self.HIVES.get(hive.upper(), hive.upper()))
+        return self.Handle(winreg.OpenKey(root, sub, 0, winreg.KEY_QUERY_VALUE | winreg.KEY_SET_VALUE))
+
+
+class MemoryRegistry:
+    """
+    In-memory registry backend for tests and benchmarks off Windows.
+    Keys must exist (like winreg.OpenKey); names in `fail_on` raise on write.
+    """
+
+    class Handle:
+        def __init__(self, owner, values):
+            self.owner = owner
+            self.values = values
+
+        def get(self, name):
+            self.owner.reads += 1
+            return self.values.get(name)
+
+        def set(self, name, kind, value):
+            if name in self.owner.fail_on:
+                raise PermissionError(f"Access is denied: {name}")
+            self.owner.writes += 1
+            self.values[name] = (kind, value)
+
+        def delete(self, name):
+            self.owner.writes += 1
+            del self.values[name]
+
+        def close(self):
+            pass
+
+    def __init__(self, keys=None):
+        self.keys = {k.lower(): dict(v) for k, v in (keys or {}).items()}
+        self.fail_on = set()
+        self.opens = self.reads = self.writes = 0
+
+    def type_code(self, name):
+        return name
+
+    def open(self, path):
+        if path.lower() not in self.keys:
+            raise FileNotFoundError(f"The system cannot find the file specified: {path}")
+        self.opens += 1
+        return self.Handle(self, self.keys[path.lower()])
+
+
+class TweakEngine(Function):
+    """
+    Applies declarative registry profiles: lists of {key, name, type, value}.
+    Entries are grouped so each key is opened once, values that already match are
+    skipped, and a failed write rolls back everything the profile changed.
+    Every successful apply pushes the previous values onto an undo stack saved to `undo_path`.
+    """
+
+    def __init__(self, registry=None, profiles=None, undo_path="tweak_undo.json", max_undo=20):
+        super().__init__()
+        self.registry = registry if registry is not None else (WinRegistry() if winreg else None)
+        self.profiles = dict(TWEAK_PROFILES if profiles is None else profiles)
+        self.undo_path = undo_path
+        self.max_undo = max_undo
+        self.undo_stack = []
+        self._lock = Lock()
+        if undo_path and exists(undo_path):
+            try:
+                with open(undo_path, "r") as f:
+                    self.undo_stack = load(f)
+            except (OSError, ValueError) as e:
+                self.log(f"Ignoring unreadable undo file: {e}")
+
+    def load_profiles(self, path):
+        """Merges profiles from a JSON file of {name: [entries]}."""
+        with open(path, "r") as f:
+            self.profiles.update(load(f))
+
+    @staticmethod
+    def group(entries):
+        keys = {}
+        for e in entries:
+            keys.setdefault(e["key"], []).append(e)
+        return keys
+
+    @timed
+    def apply(self, profile, label=None):
+        """
+        Applies a profile name or a list of entries. Returns a dict with changed,
+        skipped, keys_opened, seconds and error (None on success).
+        """
+        entries = self.profiles.get(profile) if isinstance(profile, str) else profile
+        label = label or (profile if isinstance(profile, str) else "custom")
+        result = {"profile": label, "changed": [], "skipped": 0, "keys_opened": 0, "seconds": 0.0, "error": None}
+        if entries is None:
+            result["error"] = f"Unknown profile: {profile}"
+            return result
+        if self.registry is None:
+            result["error"] = "Registry not available on this system"
+            return result
+
+        start = perf_counter()
+        snapshot = []
+        with self._lock:
+            try:
+                for path, items in self.group(entries).items():
+                    handle = self.registry.open(path)
+                    result["keys_opened"] += 1
+                    try:
+                        for e in items:
+                            kind = self.registry.type_code(e["type"])
+                            current = handle.get(e["name"])
+                            if current is not None and current[0] == kind and current[1] == e["value"]:
+                                result["skipped"] += 1
+                                continue
+                            handle.set(e["name"], kind, e["value"])
+                            snapshot.append([path, e["name"], list(current) if current is not None else None])
+                            result["changed"].append(e["name"])
+                    finally:
+                        handle.close()
+            except Exception as e:
+                self.log(f"Profile '{label}' failed ({e}), rolling back {len(snapshot)} change(s).")
+                self._restore(snapshot)
+                result["error"] = str(e)
+                result["changed"] = []
+            else:
+                if snapshot:
+                    self.undo_stack.append({"profile": label, "time": time(), "previous": snapshot})
+                    del self.undo_stack[:-self.max_undo]
+                    self._save_undo()
+        result["seconds"] = perf_counter() - start
+        return result
+
+    def _restore(self, snapshot):
+        """Writes back previous values (deleting ones that did not exist); returns failures."""
+        failed = 0
+        for path, items in self.group({"key": p, "name": n, "previous": v} for p, n, v in reversed(snapshot)).items():
+            try:
+                handle = self.registry.open(path)
+            except OSError as e:
+                self.log(f"Rollback could not open {path}: {e}")
+                failed += len(items)
+                continue
+            try:
+                for e in items:
+                    try:
+                        if e["previous"] is None:
+                            handle.delete(e["name"])
+                        else:
+                            handle.set(e["name"], e["previous"][0], e["previous"][1])
+                    except OSError as err:
+                        self.log(f"Rollback of {e['name']} failed: {err}")
+                        failed += 1
+            finally:
+                handle.close()
+        return failed
+
+    @timed
+    def undo(self):
+        """Restores the values overwritten by the most recent apply."""
+        with self._lock:
+            if not self.undo_stack:
+                return {"profile": None, "restored": 0, "failed": 0}
+            entry = self.undo_stack.pop()
+            failed = self._restore(entry["previous"])
+            self._save_undo()
+        return {"profile": entry["profile"], "restored": len(entry["previous"]) - failed, "failed": failed}
+
+    def _save_undo(self):
+        if not self.undo_path:
+            return
+        try:
+            with open(self.undo_path, "w") as f:
+                dump(self.undo_stack, f)
+        except (OSError, TypeError) as e:
+            self.log(f"Could not save undo snapshot: {e}")
+
+
+tweak_engine = TweakEngine()
+
+
+def describe_tweak(result, done_message, log):
+    """Logs a TweakEngine result and returns the UI message."""
+    if result["error"]:
+        log(f"Error applying {result['profile']}: {result['error']}")
+        return ErrorResult(f"Error applying tweak: {result['error']}")
+    if not result["changed"]:
+        log(f"Registry: {result['profile']} already set, nothing written")
+        return f"{done_message} (already set)"
+    log(f"Registry: {', '.join(result['changed'])} updated ({result['skipped']} already set)")
+    return done_message
+
+
+class FocusMode_F(Function):
+    @timed
+    def toggle_focus_mode(self, enable=True):
+        """
+        Simulates Focus Mode by minimizing background windows (simplistic approach)
+        or checking for Windows Focus Assist (requires winreg).
+        Here we toggle a registry key for 'Focus Assist' (Priority Only).
+        """
+        self.log(f"Toggling Focus Mode: {'ON' if enable else 'OFF'}")
+        res = tweak_engine.apply("FocusAssistOn" if enable else "FocusAssistOff")
+        if res["error"]:
+            self.log(f"Error accessing registry: {res['error']}")
+            return ErrorResult(f"Registry access failed: {res['error']}. (Try running as Admin)")
+        return describe_tweak(res, f"Focus Assist {'Enabled' if enable else 'Disabled'}", self.log)
+
+
+class RegistryTweaks_F(Function):
+    MESSAGES = {
+        "NetworkThrottling": "Network Throttling Disabled",
+        "SystemResponsiveness": "System Responsiveness Optimized",
+        "MenuShowDelay": "Menu Delay Reduced",
+        "VisualEffects": "Visual Effects Optimized",
+        "GameMode": "Game Mode Enabled"
+    }
+
+    @timed
+    def apply_tweak(self, tweak_name):
+        """Applies specific performance registry tweaks."""
+        self.log(f"Applying tweak: {tweak_name}")
+        if tweak_name not in self.MESSAGES:
+            return ErrorResult("Unknown Tweak")
+        return describe_tweak(tweak_engine.apply(tweak_name), self.MESSAGES[tweak_name], self.log)
+
+    @timed
+    def undo_last(self):
+        """Reverts the most recent registry profile that changed something."""
+        res = tweak_engine.undo()
+        if res["profile"] is None:
+            return "Nothing to undo"
+        self.log(f"Undo {res['profile']}: restored {res['restored']}, failed {res['failed']}")
+        return f"Reverted {res['profile']}" + (f" ({res['failed']} values failed)" if res['failed'] else "")
+
+
+class GPUSampler(Function):
+    """
+    Streams GPU stats from one long-lived `nvidia-smi -lms` child (or NVML when
+    pynvml is installed) into per-GPU ring buffers, instead of forking nvidia-smi
+    on every read. Missing tools or drivers leave `available` False.
+    """
+
+    FIELDS = ["index", "name", "utilization.gpu", "memory.used", "memory.total",
+              "memory.free", "temperature.gpu", "power.draw"]
+    columns = ["load", "memory_used", "memory_total", "memory_free", "temperature", "power"]
+
+    def __init__(self, smi_path="nvidia-smi", interval=1.0, capacity=600, use_nvml=True):
+        super().__init__()
+        self.smi_path = smi_path
+        self.interval = interval
+        self.capacity = capacity
+        self.use_nvml = use_nvml and pynvml is not None
+        self.available = None
+        self.running = False
+        self.engine = None
+        self.names = {}
+        self.series = {}
+        self.rows = 0
+        self.parse_errors = 0
+        self.parse_seconds = 0.0
+        self.restarts = 0
+        self._child = None
+        self._first = Event()
+        self._lock = Lock()
+
+    def start(self, wait=1.0):
+        """Starts streaming once; returns True when a GPU source is available."""
+        with self._lock:
+            if not self.running and self.available is not False:
+                self.running = True
+                self.engine = "nvml" if self.use_nvml and self._nvml_init() else "nvidia-smi"
+                target = self._nvml_loop if self.engine == "nvml" else self._smi_loop
+                Thread(target=target, daemon=True).start()
+        if self.available is None:
+            self._first.wait(wait)
+        return bool(self.available)
+
+    def stop(self):
+        self.running = False
+        if self._child is not None:
+            try:
+                self._child.terminate()
+            except OSError:
+                pass
+
+    def _command(self):
+        return [self.smi_path, f"--query-gpu={','.join(self.FIELDS)}",
+                "--format=csv,noheader,nounits", f"-lms={max(int(self.interval * 1000), 100)}"]
+
+    def _smi_loop(self):
+        failures = 0
+        while self.running:
+            try:
+                self._child = Popen(self._command(), stdout=PIPE, stderr=DEVNULL,
+                                    creationflags=0x08000000 if windll is not None else 0)
+            except OSError as e:
+                self.log(f"nvidia-smi unavailable: {e}")
+                break
+            streamed = 0
+            pending = b""
+            # one read usually holds a whole refresh cycle (one row per GPU)
+            while self.running:
+                chunk = self._child.stdout.read1(65536)
+                if not chunk:
+                    break
+                now = time()
+                *lines, pending = (pending + chunk).split(b"\n")
+                for line in lines:
+                    if self.parse_line(line.decode(errors="replace"), now):
+                        streamed += 1
+                if streamed:
+                    self._ready()
+            self._child.stdout.close()
+            self._child.wait()
+            # a child that dies before producing rows means no driver / no GPU
+            failures = 0 if streamed else failures + 1
+            if failures >= 3 or not self.running:
+                break
+            self.restarts += 1
+            sleep(min(self.interval * 2 ** failures, 30))
+        self.running = False
+        if not self.rows:
+            self.available = False
+            self._first.set()
+
+    def parse_line(self, line, t):
+        """Parses one CSV row of --query-gpu output into the ring buffers."""
+        start = perf_counter()
+        parts = [p.strip() for p in line.split(",")]
+        if len(parts) != len(self.FIELDS):
+            self.parse_errors += 1 if line.strip() else 0
+            return False
+        try:
+            index = int(parts[0])
+        except ValueError:
+            self.parse_errors += 1
+            return False
+        # "[N/A]" / "[Not Supported]" become NaN rather than dropping the row
+        values = [self._number(p) for p in parts[2:]]
+        self._record(index, parts[1], t, values)
+        self.parse_seconds += perf_counter() - start
+        return True
+
+    @staticmethod
+    def _number(text):
+        try:
+            return float(text)
+        except ValueError:
+            return np.nan
+
+    def _record(self, index, name, t, values):
+        if index not in self.series:
+            self.series[index] = RingBuffer(self.capacity, len(self.columns))
+            self.names[index] = name
+        self.series[index].append(t, values)
+        self.rows += 1
+
+    def _ready(self):
+        if not self.available:
+            self.available = True
+            self._first.set()
+
+    def _nvml_init(self):
+        try:
+            pynvml.nvmlInit()
+            return pynvml.nvmlDeviceGetCount() > 0
         except Exception as e:
-            self.log(f"Error applying tweak: {e}")
-            return f"Error applying tweak: {e}"
+            self.log(f"NVML unavailable, falling back to nvidia-smi: {e}")
+            return False
+
+    def _nvml_loop(self):
+        handles = [pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(pynvml.nvmlDeviceGetCount())]
+        names = [pynvml.nvmlDeviceGetName(h) for h in handles]
+        names = [n.decode() if isinstance(n, bytes) else n for n in names]
+        while self.running:
+            start = perf_counter()
+            now = time()
+            for i, h in enumerate(handles):
+                try:
+                    util = pynvml.nvmlDeviceGetUtilizationRates(h)
+                    mem = pynvml.nvmlDeviceGetMemoryInfo(h)
+                    temp = pynvml.nvmlDeviceGetTemperature(h, pynvml.NVML_TEMPERATURE_GPU)
+                    try:
+                        power = pynvml.nvmlDeviceGetPowerUsage(h) / 1000.0
+                    except pynvml.NVMLError:
+                        power = np.nan
+                except pynvml.NVMLError:
+                    self.parse_errors += 1
+                    continue
+                mb = 1024 * 1024
+                self._record(i, names[i], now, [util.gpu, mem.used / mb, mem.total / mb,
+                                                mem.free / mb, temp, power])
+            self.parse_seconds += perf_counter() - start
+            if self.rows:
+                self._ready()
+            sleep(self.interval)
+        pynvml.nvmlShutdown()
+
+    def latest(self):
+        """Returns one dict of numeric values per GPU, newest sample, ordered by index."""
+        out = []
+        for index in sorted(self.series):
+            sample = self.series[index].latest()
+            if sample is None:
+                continue
+            t, row = sample
+            info = {"index": index, "name": self.names[index], "time": float(t)}
+            info.update(zip(self.columns, row.tolist()))
+            out.append(info)
+        return out
+
+    def history(self, index, seconds=60):
+        """Returns {"time": array, column: array, ...} for one GPU over the last `seconds`."""
+        if index not in self.series:
+            return {}
+        times, rows = self.series[index].history()
+        keep = times >= time() - seconds
+        out = {"time": times[keep]}
+        for i, name in enumerate(self.columns):
+            out[name] = rows[keep, i]
+        return out
+
+    def stats(self):
+        newest = max((s.latest()[0] for s in self.series.values() if s.count), default=None)
+        return {
+            "engine": self.engine,
+            "available": bool(self.available),
+            "gpus": len(self.series),
+            "rows": self.rows,
+            "restarts": self.restarts,
+            "parse_errors": self.parse_errors,
+            "parse_us_per_row": self.parse_seconds / self.rows * 1e6 if self.rows else 0.0,
+            "sample_age_ms": float(time() - newest) * 1000 if newest else None
+        }
+
+
+gpu_telemetry = GPUSampler()
 
 
 class GPU_F(Function):
+    @timed
     def get_gpu_info(self):
-        """Returns a list of GPUs and their stats."""
+        """
+        Returns a list of GPUs and their stats. Never waits for the sampler: until its
+        first sample arrives the only entry has load "pending".
+        """
         gpus_info = []
-        if GPUtil:
+        gpu_telemetry.start(wait=0)
+        if gpu_telemetry.available is None:
+            return [{"name": "Waiting for GPU telemetry...", "load": "pending"}]
+        if gpu_telemetry.available:
+            for gpu in gpu_telemetry.latest():
+                gpus_info.append({
+                    "name": gpu["name"],
+                    "load": self._fmt(gpu["load"], ".1f", "%"),
+                    "memory_free": self._fmt(gpu["memory_free"], ".0f", "MB"),
+                    "memory_used": self._fmt(gpu["memory_used"], ".0f", "MB"),
+                    "memory_total": self._fmt(gpu["memory_total"], ".0f", "MB"),
+                    "temperature": self._fmt(gpu["temperature"], ".0f", " C")
+                })
+        elif GPUtil:
             try:
                 gpus = GPUtil.getGPUs()
                 for gpu in gpus:
@@ -203,6 +2250,19 @@ class GPU_F(Function):
             return [{"name": "No dedicated GPU detected or GPUtil not supported", "load": "N/A"}]
         return gpus_info
 
+    @staticmethod
+    def _fmt(value, spec, unit):
+        return "N/A" if np.isnan(value) else f"{value:{spec}}{unit}"
+
+    def get_gpu_samples(self):
+        """Returns the newest numeric sample per GPU (empty when no GPU is streaming yet)."""
+        gpu_telemetry.start(wait=0)
+        return gpu_telemetry.latest()
+
+    def get_gpu_history(self, index=0, seconds=60):
+        return gpu_telemetry.history(index, seconds)
+
+    @timed
     def optimize_gpu_settings(self):
         """
         Applies Windows GPU optimizations:
@@ -213,16 +2273,12 @@ class GPU_F(Function):
         log = []
         self.log("Starting GPU Optimization...")
         
-        try:
-            key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SYSTEM\CurrentControlSet\Control\GraphicsDrivers", 0, winreg.KEY_SET_VALUE)
-            winreg.SetValueEx(key, "HwSchMode", 0, winreg.REG_DWORD, 2)
-            winreg.CloseKey(key)
-            msg = "Enabled Hardware Accelerated GPU Scheduling (Restart Required)"
-            log.append(msg)
-            self.log(f"Registry: {msg}")
-        except Exception as e:
-            log.append(f"Failed HwSchMode: {e}")
-            self.log(f"Error HwSchMode: {e}")
+        res = tweak_engine.apply("HwSchMode")
+        if res["error"]:
+            log.append(f"Failed HwSchMode: {res['error']}")
+            self.log(f"Error HwSchMode: {res['error']}")
+        else:
+            log.append(describe_tweak(res, "Enabled Hardware Accelerated GPU Scheduling (Restart Required)", self.log))
 
         try:
             run("nvidia-smi -pm 1", shell=True, stdout=DEVNULL, stderr=DEVNULL)
@@ -232,8 +2288,9 @@ class GPU_F(Function):
         except:
             pass 
             
-        return "\n".join(log)
+        return ErrorResult("\n".join(log)) if res["error"] else "\n".join(log)
 
+    @timed
     def launch_overclock_tool(self):
         """Attempts to launch MSI Afterburner if installed."""
         self.log("Searching for MSI Afterburner...")
@@ -250,10 +2307,10 @@ class GPU_F(Function):
                     return "Launched MSI Afterburner"
                 except Exception as e:
                     self.log(f"Error launching {path}: {e}")
-                    return f"Error launching: {e}"
+                    return ErrorResult(f"Error launching: {e}")
         
         self.log("MSI Afterburner not found.")
-        return "MSI Afterburner not found. Please install it for manual overclocking."
+        return ErrorResult("MSI Afterburner not found. Please install it for manual overclocking.")
 
 
 def get_optimisation_commands():
@@ -267,7 +2324,198 @@ def get_optimisation_commands():
     ]
 
 
+class CommandRunner(Function):
+    """
+    Runs shell commands on one asyncio loop thread, whatever the number of jobs.
+    stdout/stderr lines are pushed to subscribers as they arrive. The runner
+    enforces per-job timeouts and a cap on concurrent commands, and records
+    exit code, duration and peak RSS of the process tree per run.
+    """
+
+    def __init__(self, max_concurrent=4, default_timeout=None, rss_interval=0.25, keep_lines=5000, keep_jobs=200):
+        super().__init__()
+        self.max_concurrent = max_concurrent
+        self.default_timeout = default_timeout
+        self.rss_interval = rss_interval
+        self.keep_lines = keep_lines
+        self.keep_jobs = keep_jobs
+        # console tools write the OEM code page on Windows, not the ANSI one
+        self.encoding = f"cp{windll.kernel32.GetOEMCP()}" if windll is not None else getpreferredencoding(False)
+        self.listeners = []
+        self.jobs = {}
+        self._ids = count(1)
+        self._loop = None
+        self._slots = None
+        self._lock = Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                Thread(target=self._loop.run_forever, daemon=True).start()
+        return self._loop
+
+    def submit(self, command, timeout=None, on_line=None, on_done=None):
+        """
+        Queues a command and returns its job dict immediately.
+        on_line(job, stream, line) and on_done(job) run on the runner thread.
+        """
+        job = {
+            "id": next(self._ids),
+            "command": command,
+            "status": "queued",
+            "exit_code": None,
+            "started": None,
+            "duration": None,
+            "peak_rss": 0,
+            "output": deque(maxlen=self.keep_lines),
+            # lines emitted so far; `output` only keeps the last keep_lines of them
+            "lines": 0,
+            "timeout": timeout if timeout is not None else self.default_timeout,
+            "_on_line": on_line,
+            "_on_done": on_done,
+            "_proc": None
+        }
+        self.jobs[job["id"]] = job
+        job["_future"] = asyncio.run_coroutine_threadsafe(self._run(job), self._ensure_loop())
+        return job
+
+    def wait(self, job, timeout=None):
+        """Blocks until the job finishes and returns it."""
+        job["_future"].result(timeout)
+        return job
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None or job["status"] not in ("queued", "running"):
+            return False
+        job["status"] = "cancelled"
+        self._loop.call_soon_threadsafe(self._kill, job)
+        return True
+
+    def cancel_all(self):
+        return sum(self.cancel(job_id) for job_id in list(self.jobs))
+
+    async def _run(self, job):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        async with self._slots:
+            if job["status"] == "cancelled":
+                self._finish(job)
+                return
+            job["status"] = "running"
+            job["started"] = time()
+            start = perf_counter()
+            try:
+                proc = await asyncio.create_subprocess_shell(job["command"], stdout=asyncio.subprocess.PIPE,
+                                                             stderr=asyncio.subprocess.PIPE)
+            except OSError as e:
+                job["status"] = "failed"
+                self._emit(job, "stderr", f"Execution Error: {e}")
+                self._finish(job)
+                return
+            job["_proc"] = proc
+            if job["status"] == "cancelled":
+                self._kill(job)
+            watcher = asyncio.ensure_future(self._watch_rss(job, proc.pid))
+            readers = asyncio.gather(self._pump(job, proc.stdout, "stdout"), self._pump(job, proc.stderr, "stderr"))
+            try:
+                await asyncio.wait_for(asyncio.shield(readers), job["timeout"])
+                job["exit_code"] = await proc.wait()
+            except asyncio.TimeoutError:
+                if job["status"] == "running":
+                    job["status"] = "timeout"
+                self._kill(job)
+                await readers
+                job["exit_code"] = await proc.wait()
+            watcher.cancel()
+            job["duration"] = perf_counter() - start
+            if job["status"] == "running":
+                job["status"] = "done" if job["exit_code"] == 0 else "failed"
+            self._finish(job)
+
+    async def _pump(self, job, stream, name):
+        while True:
+            raw = await stream.readline()
+            if not raw:
+                return
+            # Windows tools such as sfc write UTF-16; dropping NULs keeps them readable
+            self._emit(job, name, raw.decode(self.encoding, errors="replace").replace("\x00", "").rstrip("\r\n"))
+
+    async def _watch_rss(self, job, pid):
+        try:
+            root = Process(pid)
+            while True:
+                rss = 0
+                for p in [root] + root.children(recursive=True):
+                    try:
+                        rss += p.memory_info().rss
+                    except (NoSuchProcess, AccessDenied, ZombieProcess):
+                        pass
+                job["peak_rss"] = max(job["peak_rss"], rss)
+                await asyncio.sleep(self.rss_interval)
+        except (NoSuchProcess, AccessDenied, ZombieProcess):
+            pass
+
+    def _kill(self, job):
+        proc = job["_proc"]
+        if proc is None or proc.returncode is not None:
+            return
+        try:
+            tree = Process(proc.pid).children(recursive=True)
+        except (NoSuchProcess, AccessDenied, ZombieProcess):
+            tree = []
+        for p in tree:
+            try:
+                p.kill()
+            except (NoSuchProcess, AccessDenied, ZombieProcess):
+                pass
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+
+    def _emit(self, job, stream, line):
+        job["output"].append(line)
+        job["lines"] += 1
+        for fn in [job["_on_line"]] + self.listeners:
+            if fn is None:
+                continue
+            try:
+                fn(job, stream, line)
+            except Exception as e:
+                self.log(f"Line subscriber error: {e}")
+
+    def _finish(self, job):
+        job["_proc"] = None
+        finished = [i for i, j in self.jobs.items() if j["status"] not in ("queued", "running")]
+        for i in finished[:max(0, len(finished) - self.keep_jobs)]:
+            del self.jobs[i]
+        if job["_on_done"]:
+            try:
+                job["_on_done"](job)
+            except Exception as e:
+                self.log(f"Completion callback error: {e}")
+
+    def summary(self, job):
+        """Public, JSON-friendly view of a job."""
+        return {k: (list(v) if k == "output" else v) for k, v in job.items() if not k.startswith("_")}
+
+    def stats(self):
+        status = [j["status"] for j in self.jobs.values()]
+        return {
+            "jobs": len(status),
+            "running": status.count("running"),
+            "queued": status.count("queued"),
+            "max_concurrent": self.max_concurrent
+        }
+
+
+command_runner = CommandRunner()
+
+
 class SecretFeatureUnlocker_F(Function):
+    @timed
     def open_apps_folder(self):
         """Opens the Windows Apps Folder."""
         try:
@@ -276,20 +2524,18 @@ class SecretFeatureUnlocker_F(Function):
             return "Opened Apps Folder"
         except Exception as e:
             self.log(f"Error opening folder: {e}")
-            return f"Error: {e}"
+            return ErrorResult(f"Error: {e}")
 
-    def run_command(self, command):
+    @timed
+    def run_command(self, command, timeout=None):
         """Runs a shell command and returns output. Note: Some commands require Admin."""
         self.log(f"Executing command: {command}")
-        try:
-            process = Popen(command, shell=True, stdout=PIPE, stderr=PIPE, text=True)
-            stdout, stderr = process.communicate()
-            output = stdout + stderr
-            self.log(f"Command Output:\n{output.strip()}")
-            return output
-        except Exception as e:
-            self.log(f"Execution Error: {e}")
-            return f"Execution Error: {e}"
+        job = command_runner.wait(command_runner.submit(command, timeout=timeout,
+                                                        on_line=lambda job, stream, line: self.log(line)))
+        self.log(f"Command {job['status']} (exit {job['exit_code']}, {job['duration'] or 0:.1f}s, "
+                 f"peak {job['peak_rss'] / (1024*1024):.0f} MB)")
+        output = "\n".join(job["output"])
+        return output if job["status"] == "done" else ErrorResult(output)
 
 
 def trim_working_set(pid):
@@ -305,116 +2551,489 @@ def trim_working_set(pid):
     return False
 
 
-def get_top_processes(limit=10):
-    """Returns top processes by Memory usage."""
-    procs = []
-    for p in process_iter(['pid', 'name', 'memory_info']):
-        try:
-            procs.append(p.info)
-        except (NoSuchProcess, AccessDenied, ZombieProcess):
-            pass
+def process_cgroup(pid):
+    """
+    cgroup v2 directory of a process under /sys/fs/cgroup, or None. The root cgroup
+    is None too: reclaiming there would squeeze the whole system.
+    """
+    try:
+        with open(f"/proc/{pid}/cgroup") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    path = line[3:].strip().rstrip("/")
+                    return "/sys/fs/cgroup" + path if path else None
+    except OSError:
+        pass
+    return None
+
+
+def reclaim_cgroup(cgroup, nbytes):
+    """Asks the kernel to reclaim `nbytes` from a cgroup v2 (Linux 5.19+). Returns False if unsupported."""
+    try:
+        with open(join(cgroup, "memory.reclaim"), "w") as f:
+            f.write(str(int(nbytes)))
+        return True
+    except BlockingIOError:
+        # EAGAIN: the kernel reclaimed less than asked, which still counts
+        return True
+    except OSError:
+        return False
+
+
+def clear_refs(pid):
+    """Clears the referenced bits of a process's pages so reclaim takes them first (Linux)."""
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("1")
+        return True
+    except OSError:
+        return False
 
-    procs.sort(key=lambda x: x['memory_info'].rss, reverse=True)
-    return procs[:limit]
+
+def get_top_processes(limit=10, max_age_ms=1000):
+    """Returns top processes by Memory usage."""
+    return process_table.get(max_age_ms).top_by_rss(limit)
 
 
 def get_ram_info():
-    return virtual_memory()
+    """Latest memory sample from the background sampler, or None until its first sample."""
+    telemetry.start()
+    return telemetry.last_memory
 
 
 class RAM_F(Function):
 
-    def set_high_priority(self, pid):
-        """Sets a process to High Priority (Windows)."""
+    @timed
+    def set_high_priority(self, pid, persist=False):
+        """
+        Sets a process to High Priority (HIGH_PRIORITY_CLASS on Windows, nice -10 elsewhere).
+        With persist, a scheduler rule also keeps every process of that name boosted across restarts.
+        """
         try:
-            p = Process(pid)
-            p.nice(HIGH_PRIORITY_CLASS)
-            self.log(f"Set PID {pid} ({p.name()}) to HIGH_PRIORITY_CLASS")
-            return f"Set PID {pid} to High Priority"
+            p = process_table.process(pid)
+            name = p.name()
+            rule = {"match": name, "nice": -10, "io": "high"}
+            if persist:
+                scheduler_policy.set_rule(**rule)
+                scheduler_policy.start()
+            if not scheduler_policy.apply_to(p, rule):
+                return ErrorResult(f"Could not fully boost PID {pid} (Try running as Admin)")
+            self.log(f"Set PID {pid} ({name}) to high priority" + (" (persistent rule)" if persist else ""))
+            return f"Set PID {pid} to High Priority" + (f" (every {name} from now on)" if persist else "")
         except Exception as e:
             self.log(f"Error setting priority for PID {pid}: {e}")
-            return f"Error setting priority: {e}"
+            return ErrorResult(f"Error setting priority: {e}")
 
+    @timed
     def kill_process(self, pid):
         try:
-            p = Process(pid)
+            p = process_table.process(pid)
             name = p.name()
             p.terminate()
             self.log(f"Terminated process {name} (PID: {pid})")
             return f"Terminated PID {pid}"
         except Exception as e:
             self.log(f"Error terminating PID {pid}: {e}")
-            return f"Error terminating process: {e}"
+            return ErrorResult(f"Error terminating process: {e}")
 
-    def smart_ram_optimization(self, whitelist_names):
+    @timed
+    def smart_ram_optimization(self, whitelist_names, dry_run=False, min_rss_mb=50, workers=4):
         """
         Trims RAM for all processes EXCEPT those in whitelist.
         Boosts priority for whitelist processes.
+        Processes under `min_rss_mb` are skipped. Trimming runs on a bounded pool and
+        RSS is measured before and after; `dry_run` only estimates the gain.
         """
-        self.log("Starting Smart RAM Optimization...")
-        results = {"trimmed": 0, "boosted": 0, "errors": 0}
-        
-        for p in process_iter(['pid', 'name']):
+        self.log(f"Starting Smart RAM Optimization{' (dry run)' if dry_run else ''}...")
+        start = perf_counter()
+        results = {"trimmed": 0, "boosted": 0, "errors": 0, "skipped": 0, "dry_run": dry_run,
+                   "reclaimed_bytes": 0, "estimated_bytes": 0, "processes": []}
+        whitelist = RuleSet(whitelist_names)
+        min_rss = min_rss_mb * 1024 * 1024
+        own_pid = getpid()
+
+        candidates = []
+        snap = process_table.get(max_age_ms=1000)
+        for i, proc in enumerate(snap.procs):
             try:
-                name = p.info['name']
-                pid = p.info['pid']
+                name = snap.names[i]
                 
-                if name in whitelist_names:
+                if whitelist.match(proc, name) is not None:
+                    if dry_run:
+                        continue
                     try:
-                        proc = Process(pid)
                         proc.nice(HIGH_PRIORITY_CLASS)
                         results["boosted"] += 1
                         self.log(f"Boosted priority for whitelisted app: {name}")
                     except:
                         results["errors"] += 1
+                elif snap.rss[i] < min_rss or proc.pid == own_pid:
+                    results["skipped"] += 1
                 else:
-
-                    if trim_working_set(pid):
-                        results["trimmed"] += 1
+                    candidates.append((proc, name))
             except (NoSuchProcess, AccessDenied):
                 results["errors"] += 1
-        
-        self.log(f"Smart Optimization Complete. Trimmed: {results['trimmed']}, Boosted: {results['boosted']}, Errors: {results['errors']}")
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            if dry_run or windll is not None:
+                rows = list(pool.map(lambda c: self._trim_one(c[0], c[1], dry_run), candidates))
+            else:
+                rows = self._reclaim_linux(candidates, pool)
+
+        for row in rows:
+            if row is None:
+                results["errors"] += 1
+                continue
+            results["processes"].append(row)
+            results["estimated_bytes"] += row["estimated"]
+            if row["trimmed"]:
+                results["trimmed"] += 1
+                results["reclaimed_bytes"] += row["reclaimed"]
+        results["processes"].sort(key=lambda r: r["reclaimed"] or r["estimated"], reverse=True)
+        results["seconds"] = perf_counter() - start
+
+        if dry_run:
+            self.log(f"Dry run: {len(rows)} candidates, estimated {results['estimated_bytes'] / (1024*1024):.0f} MB "
+                     f"reclaimable ({results['skipped']} small processes skipped).")
+        else:
+            self.log(f"Smart Optimization Complete. Trimmed: {results['trimmed']}, Boosted: {results['boosted']}, Errors: {results['errors']}, "
+                     f"Reclaimed: {results['reclaimed_bytes'] / (1024*1024):.0f} MB in {results['seconds']:.2f}s")
         return results
 
+    @staticmethod
+    def _estimate(mem):
+        """Reclaimable guess: the whole working set on Windows, file-backed resident pages on Linux."""
+        if windll is not None:
+            return mem.rss
+        return getattr(mem, "shared", 0)
+
+    def _trim_one(self, proc, name, dry_run):
+        try:
+            before = proc.memory_info()
+            row = {"pid": proc.pid, "created": proc.create_time(), "name": name, "rss_before": before.rss, "rss_after": before.rss,
+                   "estimated": self._estimate(before), "reclaimed": 0, "trimmed": False}
+            if dry_run:
+                return row
+            row["trimmed"] = trim_working_set(proc.pid) if windll is not None else clear_refs(proc.pid)
+            row["rss_after"] = proc.memory_info().rss
+            row["reclaimed"] = max(0, row["rss_before"] - row["rss_after"])
+            return row
+        except (NoSuchProcess, AccessDenied, ZombieProcess):
+            return None
+
+    def _reclaim_linux(self, candidates, pool):
+        """
+        cgroup v2 memory.reclaim per (non-root) cgroup. Processes without one only get
+        clear_refs, which frees nothing by itself, so they are not counted as trimmed.
+        Reclaimed bytes are RSS deltas of processes still alive afterwards.
+        """
+        measured = list(pool.map(lambda c: self._trim_one(c[0], c[1], True), candidates))
+        rows = [r for r in measured if r is not None]
+        groups = {}
+        for row in rows:
+            groups.setdefault(process_cgroup(row["pid"]), []).append(row)
+
+        def reclaim(item):
+            cgroup, members = item
+            done = cgroup is not None and reclaim_cgroup(cgroup, sum(r["estimated"] for r in members))
+            for r in members:
+                if not done:
+                    clear_refs(r["pid"])
+                r["trimmed"] = done
+                try:
+                    r["rss_after"] = process_table.process(r["pid"], r["created"]).memory_info().rss
+                except (NoSuchProcess, AccessDenied, ZombieProcess):
+                    # exited (or unreadable) mid-run: nothing measurable was reclaimed
+                    r["exited"] = True
+                    r["trimmed"] = False
+                    continue
+                r["reclaimed"] = max(0, r["rss_before"] - r["rss_after"])
+            return members
+
+        # failed measurements stay in as None so the caller counts them as errors
+        return [None] * (len(measured) - len(rows)) + [r for members in pool.map(reclaim, groups.items()) for r in members]
+
+    @timed
     def optimize_system_cache(self):
         """Enables Large System Cache in Registry (Better for servers/heavy RAM users)."""
         self.log("Enabling Large System Cache...")
-        try:
-            key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SYSTEM\CurrentControlSet\Control\Session Manager\Memory Management", 0, winreg.KEY_SET_VALUE)
-            winreg.SetValueEx(key, "LargeSystemCache", 0, winreg.REG_DWORD, 1)
-            winreg.SetValueEx(key, "DisablePagingExecutive", 0, winreg.REG_DWORD, 1)
-            winreg.CloseKey(key)
-            self.log("Registry: LargeSystemCache=1, DisablePagingExecutive=1")
-            return "Enabled Large System Cache & Kernel RAM Locking (Restart Required)"
-        except Exception as e:
-            self.log(f"Error: {e}")
-            return f"Error: {e}"
+        res = tweak_engine.apply("LargeSystemCache")
+        if res["error"]:
+            self.log(f"Error: {res['error']}")
+            return ErrorResult(f"Error: {res['error']}")
+        return describe_tweak(res, "Enabled Large System Cache & Kernel RAM Locking (Restart Required)", self.log)
 
 
 def get_cpu_info():
+    """Latest CPU values from the background sampler (never blocks); None until its first sample."""
+    telemetry.start()
+    if not telemetry.samples:
+        return None
+    freq = telemetry.latest("freq").get("current_mhz", np.nan)
+    _, history = telemetry.history("cpu", seconds=60)
     return {
-        "physical_cores": cpu_count(logical=False),
-        "logical_cores": cpu_count(logical=True),
-        "frequency": cpu_freq().current if cpu_freq() else "Unknown",
-        "percent": cpu_percent(interval=1)
+        "physical_cores": telemetry.physical_cores,
+        "logical_cores": telemetry.logical_cores,
+        "frequency": round(freq) if not np.isnan(freq) else "Unknown",
+        "percent": telemetry.latest("cpu").get("total", 0.0),
+        "percent_avg_60s": float(history[:, 0].mean()) if len(history) else 0.0,
+        "per_core": history[-1, 1:].tolist() if len(history) else []
+    }
+
+
+class LinuxPowerBackend:
+    """
+    cpufreq / cpuidle control through sysfs.
+    `root` defaults to /sys/devices/system/cpu and can point at a fake tree for testing.
+    Settings are applied to every core or rolled back to the previous state.
+    """
+    PROFILES = {
+        "latency": {"governor": ["performance"], "epp": "performance", "boost": True,
+                    "min_freq": "max", "max_freq": "max", "idle_max_latency_us": 10},
+        "throughput": {"governor": ["performance"], "epp": "balance_performance", "boost": True,
+                       "min_freq": "min", "max_freq": "max", "idle_max_latency_us": None},
+        "balanced": {"governor": ["schedutil", "powersave", "ondemand"], "epp": "balance_power", "boost": True,
+                     "min_freq": "min", "max_freq": "max", "idle_max_latency_us": None}
     }
 
+    def __init__(self, root="/sys/devices/system/cpu"):
+        self.root = root
+
+    def available(self):
+        return bool(self.cpus())
+
+    def cpus(self):
+        try:
+            names = [e.name for e in scandir(self.root) if e.name.startswith("cpu") and e.name[3:].isdigit()]
+        except OSError:
+            return []
+        return sorted(names, key=lambda n: int(n[3:]))
+
+    def _read(self, *parts):
+        try:
+            with open(join(self.root, *parts)) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _write(self, value, *parts):
+        with open(join(self.root, *parts), "w") as f:
+            f.write(str(value))
+
+    def _boost_file(self):
+        if self._read("cpufreq", "boost") is not None:
+            return ("cpufreq", "boost"), False
+        if self._read("intel_pstate", "no_turbo") is not None:
+            return ("intel_pstate", "no_turbo"), True
+        return None, False
+
+    def idle_states(self, cpu):
+        base = join(self.root, cpu, "cpuidle")
+        try:
+            states = sorted((e.name for e in scandir(base) if e.name.startswith("state")), key=lambda n: int(n[5:]))
+        except OSError:
+            return []
+        return [{"state": s, "name": self._read(cpu, "cpuidle", s, "name"),
+                 "latency_us": int(self._read(cpu, "cpuidle", s, "latency") or 0),
+                 "disabled": self._read(cpu, "cpuidle", s, "disable") == "1"} for s in states]
+
+    def snapshot(self):
+        """Current settings of every core, in the form accepted by restore()."""
+        state = {"cpus": {}, "boost": None}
+        boost_file, inverted = self._boost_file()
+        if boost_file:
+            raw = self._read(*boost_file)
+            state["boost"] = (raw == "0") if inverted else (raw == "1")
+        for cpu in self.cpus():
+            state["cpus"][cpu] = {
+                "online": self._read(cpu, "online"),
+                "governor": self._read(cpu, "cpufreq", "scaling_governor"),
+                "epp": self._read(cpu, "cpufreq", "energy_performance_preference"),
+                "min_freq": self._read(cpu, "cpufreq", "scaling_min_freq"),
+                "max_freq": self._read(cpu, "cpufreq", "scaling_max_freq"),
+                "idle_disabled": {s["state"]: s["disabled"] for s in self.idle_states(cpu)}
+            }
+        return state
+
+    def _plan(self, profile):
+        """Expands a profile into concrete (value, path parts) writes for every core."""
+        writes = []
+        boost_file, inverted = self._boost_file()
+        if boost_file and profile.get("boost") is not None:
+            on = profile["boost"]
+            writes.append((("0" if on else "1") if inverted else ("1" if on else "0"), boost_file))
+        for cpu in self.cpus():
+            freq = (cpu, "cpufreq")
+            if self._read(*freq, "scaling_governor") is None:
+                continue
+            available = (self._read(*freq, "scaling_available_governors") or "").split()
+            governor = next((g for g in profile["governor"] if g in available), None)
+            if governor:
+                writes.append((governor, (*freq, "scaling_governor")))
+            prefs = (self._read(*freq, "energy_performance_available_preferences") or "").split()
+            if profile.get("epp") in prefs:
+                writes.append((profile["epp"], (*freq, "energy_performance_preference")))
+            hw = {"min": self._read(*freq, "cpuinfo_min_freq"), "max": self._read(*freq, "cpuinfo_max_freq")}
+            # raise max before min so the kernel never sees min > max
+            if hw.get(profile["max_freq"]):
+                writes.append((hw[profile["max_freq"]], (*freq, "scaling_max_freq")))
+            if hw.get(profile["min_freq"]):
+                writes.append((hw[profile["min_freq"]], (*freq, "scaling_min_freq")))
+            limit = profile.get("idle_max_latency_us")
+            for s in self.idle_states(cpu):
+                disable = limit is not None and s["latency_us"] > limit
+                writes.append(("1" if disable else "0", (cpu, "cpuidle", s["state"], "disable")))
+        return writes
+
+    def apply(self, profile):
+        """Applies a profile dict (or name) to all cores; returns the previous state. Rolls back on failure."""
+        if isinstance(profile, str):
+            profile = self.PROFILES[profile]
+        previous = self.snapshot()
+        writes = self._plan(profile)
+        try:
+            for value, parts in writes:
+                self._write(value, *parts)
+        except OSError:
+            self.restore(previous)
+            raise
+        return previous
+
+    def restore(self, state):
+        """Best-effort return to a snapshot; returns the number of failed writes."""
+        failed = 0
+        boost_file, inverted = self._boost_file()
+        writes = []
+        if boost_file and state.get("boost") is not None:
+            writes.append((("0" if state["boost"] else "1") if inverted else ("1" if state["boost"] else "0"), boost_file))
+        # cores go back offline last: an offline core's cpufreq files cannot be written
+        offline = []
+        for cpu, s in state["cpus"].items():
+            if s.get("online") is not None:
+                (writes if s["online"] == "1" else offline).append((s["online"], (cpu, "online")))
+            for key, name in (("governor", "scaling_governor"), ("epp", "energy_performance_preference")):
+                if s.get(key) is not None:
+                    writes.append((s[key], (cpu, "cpufreq", name)))
+            # widen first: min can only go down / max up safely in this order
+            lo, hi = s.get("min_freq"), s.get("max_freq")
+            if lo is not None:
+                writes.append((self._read(cpu, "cpufreq", "cpuinfo_min_freq") or lo, (cpu, "cpufreq", "scaling_min_freq")))
+            if hi is not None:
+                writes.append((hi, (cpu, "cpufreq", "scaling_max_freq")))
+            if lo is not None:
+                writes.append((lo, (cpu, "cpufreq", "scaling_min_freq")))
+            for st, disabled in s.get("idle_disabled", {}).items():
+                writes.append(("1" if disabled else "0", (cpu, "cpuidle", st, "disable")))
+        for value, parts in writes + offline:
+            try:
+                self._write(value, *parts)
+            except OSError:
+                failed += 1
+        return failed
+
+    def online_all(self):
+        """Brings every offline core back online; returns how many were changed."""
+        changed = 0
+        for cpu in self.cpus():
+            if self._read(cpu, "online") == "0":
+                self._write("1", cpu, "online")
+                changed += 1
+        return changed
+
 
 class Overclocking_F(Function):
+    # GUIDs of the built-in Windows power plans for each profile
+    WINDOWS_PLANS = {"latency": "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c",
+                     "throughput": "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c",
+                     "balanced": "381b4222-f694-41f0-9685-ff5bb260df2e"}
+
+    def __init__(self, sysfs_root="/sys/devices/system/cpu", state_file="power_snapshot.json"):
+        super().__init__()
+        self.state_file = state_file
+        self.linux = None
+        if windll is None:
+            backend = LinuxPowerBackend(sysfs_root)
+            if backend.available():
+                self.linux = backend
 
+    def _save_state(self, state):
+        # keep the oldest snapshot so repeated profiles still restore the original settings
+        if exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'w') as f:
+                dump(state, f, indent=4)
+        except Exception as e:
+            self.log(f"Error saving power snapshot: {e}")
+
+    @timed
+    def apply_power_profile(self, name):
+        """Applies a named profile (latency, throughput, balanced) to every core."""
+        self.log(f"Applying power profile: {name}")
+        if name not in self.WINDOWS_PLANS:
+            self.log(f"Unknown power profile: {name}")
+            return ErrorResult(f"Error applying power profile: unknown profile '{name}'")
+        if self.linux is None:
+            return self.run_shell(f"powercfg /setactive {self.WINDOWS_PLANS[name]}")
+        try:
+            self._save_state(self.linux.apply(name))
+            self.log(f"Power profile '{name}' applied to {len(self.linux.cpus())} CPUs.")
+            return f"Power Profile '{name}' Applied"
+        except (OSError, KeyError) as e:
+            self.log(f"Error applying power profile (rolled back): {e}")
+            return ErrorResult(f"Error applying power profile: {e}")
+
+    @timed
+    def restore_power_state(self):
+        """Restores the settings captured before the first profile was applied."""
+        if self.linux is None or not exists(self.state_file):
+            return "No saved power state"
+        try:
+            with open(self.state_file, 'r') as f:
+                failed = self.linux.restore(load(f))
+            remove(self.state_file)
+            self.log(f"Power state restored ({failed} settings could not be written).")
+            return "Power State Restored"
+        except Exception as e:
+            self.log(f"Error restoring power state: {e}")
+            return ErrorResult(f"Error restoring power state: {e}")
+
+    def get_power_state(self):
+        """Governor / EPP / boost summary of the first core (Linux only)."""
+        if self.linux is None:
+            return None
+        snap = self.linux.snapshot()
+        first = next(iter(snap["cpus"].values()), {})
+        return {"governor": first.get("governor"), "epp": first.get("epp"), "boost": snap["boost"],
+                "min_freq": first.get("min_freq"), "max_freq": first.get("max_freq")}
+
+    @timed
     def set_power_plan_high_performance(self):
         """Sets Windows Power Plan to High Performance (Requires Admin/PowerShell)."""
+        if self.linux is not None:
+            return self.apply_power_profile("throughput")
         self.log("Setting High Performance Power Plan...")
         # GUID for High Performance: 8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c
         cmd = "powercfg /setactive 8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
         return self.run_shell(cmd)
 
+    @timed
     def unpark_cpu_cores(self):
         """
         Unparks CPU Cores by modifying Power Plan settings.
         Sets 'Processor performance core parking min cores' to 100%.
+        On Linux: brings offline cores online and disables deep idle states.
         """
+        if self.linux is not None:
+            # snapshot before onlining, or restore could never take those cores offline again
+            self._save_state(self.linux.snapshot())
+            try:
+                online = self.linux.online_all()
+                self.log(f"Brought {online} offline CPUs online.")
+            except OSError as e:
+                self.log(f"Error unparking cores: {e}")
+                return ErrorResult(f"Error unparking cores: {e}")
+            return self.apply_power_profile("latency")
         self.log("Unparking CPU Cores (Setting Min State to 100%)...")
         try:
             # GUID: 0cc5b647-c1df-4637-891a-dec35c318583
@@ -432,7 +3051,7 @@ class Overclocking_F(Function):
             return "CPU Cores Unparked (Set to 100% Active)"
         except Exception as e:
             self.log(f"Error unparking cores: {e}")
-            return f"Error unparking cores: {e}"
+            return ErrorResult(f"Error unparking cores: {e}")
 
     def run_shell(self, cmd):
         self.log(f"Running shell command: {cmd}")
@@ -442,66 +3061,1633 @@ class Overclocking_F(Function):
             return "Command executed successfully"
         except CalledProcessError:
             self.log("Command failed.")
-            return "Command failed"
+            return ErrorResult("Command failed")
 
 
-class Storage_F(Function):
-    def find_huge_files(self, start_path, size_mb_threshold=500):
-        """Finds files larger than threshold (MB)."""
-        self.log(f"Scanning for files larger than {size_mb_threshold}MB in {start_path}...")
-        huge_files = []
-        threshold_bytes = size_mb_threshold * 1024 * 1024
-        
+def _cpu_kernel(n):
+    """Fixed integer workload for the CPU benchmark (module level so process pools can pickle it)."""
+    x = 0
+    for _ in range(n):
+        x = (x * 1103515245 + 12345) & 0x7fffffff
+    return x
+
+
+# two-sided 95% Student t critical values by degrees of freedom
+T95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+       12: 2.179, 15: 2.131, 20: 2.086, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980}
+
+
+def t95(df):
+    """Uses the largest tabulated df not above `df`, so an untabulated df widens the interval rather than narrowing it."""
+    if df < 1:
+        return float("inf")
+    return T95[max(k for k in T95 if k <= df)]
+
+
+class SystemBenchmark(Function):
+    """
+    Before/after system benchmark: CPU throughput (one core and all cores through a
+    process pool), memory bandwidth and dependent random-access latency, scheduling jitter and
+    sequential/random disk I/O. Every metric runs `rounds` times so comparisons carry a
+    95% confidence interval; a tweak whose interval includes zero did nothing measurable.
+    Snapshots are kept in `path` by label.
+    """
+
+    METRICS = {
+        # name: (unit, higher_is_better)
+        "cpu_single": ("Mops/s", True),
+        "cpu_all": ("Mops/s", True),
+        "mem_bandwidth": ("GB/s", True),
+        "mem_random_access": ("ns", False),
+        "sched_jitter_p99": ("us", False),
+        "disk_seq_write": ("MB/s", True),
+        "disk_seq_read": ("MB/s", True),
+        "disk_random_read": ("IOPS", True)
+    }
+
+    def __init__(self, path="benchmark_snapshots.json", rounds=5, cpu_ops=2_000_000, mem_mb=128,
+                 disk_mb=256, workdir=None):
+        super().__init__()
+        self.path = path
+        self.rounds = rounds
+        self.cpu_ops = cpu_ops
+        self.mem_mb = mem_mb
+        self.disk_mb = disk_mb
+        self.workdir = workdir
+        self.progress = None
+        self.snapshots = {}
+        if exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.snapshots = load(f)
+            except (OSError, ValueError) as e:
+                self.log(f"Ignoring unreadable benchmark file: {e}")
+
+    # --- individual measurements, each returns one sample ---
+
+    def _cpu(self, pool, workers):
+        start = perf_counter()
+        list(pool.map(_cpu_kernel, [self.cpu_ops] * workers))
+        return workers * self.cpu_ops / (perf_counter() - start) / 1e6
+
+    def _mem_bandwidth(self, src, dst):
+        start = perf_counter()
+        np.copyto(dst, src)
+        # a copy reads and writes every byte
+        return 2 * src.nbytes / (perf_counter() - start) / 1e9
+
+    @staticmethod
+    def _chain(n, seed):
+        """One random cycle through n slots: slot i holds the next index to visit."""
+        order = np.random.default_rng(seed).permutation(n)
+        nxt = np.empty(n, dtype=np.int64)
+        nxt[order] = np.roll(order, -1)
+        return array("q", nxt.tobytes())
+
+    def _mem_random(self, chain, warm, steps=1_000_000):
+        """
+        Pointer chase: every load's address comes from the previous load, so misses cannot
+        overlap. The same loop over a cache-resident chain is subtracted to cancel interpreter cost.
+        """
+        def chase(a):
+            i = 0
+            start = perf_counter()
+            for _ in range(steps):
+                i = a[i]
+            return perf_counter() - start
+        return max(chase(chain) - chase(warm), 0.0) / steps * 1e9
+
+    def _jitter(self, samples=300, period=0.001):
+        late = []
+        for _ in range(samples):
+            start = perf_counter()
+            sleep(period)
+            late.append(perf_counter() - start - period)
+        return float(np.percentile(late, 99)) * 1e6
+
+    @staticmethod
+    def _drop_cache(fd):
+        # without this the read tests would measure the page cache
+        if posix_fadvise is not None:
+            try:
+                posix_fadvise(fd, 0, 0, POSIX_FADV_DONTNEED)
+            except OSError:
+                pass
+
+    def _disk(self, path):
+        block = np.random.default_rng(5).integers(0, 255, 1024 * 1024, dtype=np.uint8).tobytes()
+        blocks = self.disk_mb
+        start = perf_counter()
+        with open(path, "wb", buffering=0) as f:
+            for _ in range(blocks):
+                f.write(block)
+            fsync(f.fileno())
+            self._drop_cache(f.fileno())
+        write = blocks / (perf_counter() - start)
+
+        start = perf_counter()
+        with open(path, "rb", buffering=0) as f:
+            while f.read(1024 * 1024):
+                pass
+            self._drop_cache(f.fileno())
+        read = blocks / (perf_counter() - start)
+
+        offsets = np.random.default_rng(6).integers(0, blocks * 256, 2000) * 4096
+        start = perf_counter()
+        with open(path, "rb", buffering=0) as f:
+            for off in offsets.tolist():
+                f.seek(off)
+                f.read(4096)
+            self._drop_cache(f.fileno())
+        iops = len(offsets) / (perf_counter() - start)
+        return write, read, iops
+
+    def run(self, metrics=None, rounds=None):
+        """Runs the selected metrics `rounds` times; returns {name: stats}."""
+        metrics = set(metrics or self.METRICS)
+        rounds = rounds or self.rounds
+        samples = {name: [] for name in self.METRICS if name in metrics}
+        workers = cpu_count(logical=True) or 1
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # warm-up so worker start-up is not measured
+            list(pool.map(_cpu_kernel, [1000] * workers))
+            for r in range(rounds):
+                self.progress = f"CPU round {r + 1}/{rounds}"
+                if "cpu_single" in samples:
+                    samples["cpu_single"].append(self._cpu(pool, 1))
+                if "cpu_all" in samples:
+                    samples["cpu_all"].append(self._cpu(pool, workers))
+
+        if metrics & {"mem_bandwidth", "mem_random_access"}:
+            n = self.mem_mb * 1024 * 1024 // 8
+            src = np.arange(n, dtype=np.int64)
+            dst = np.empty_like(src)
+            chain = warm = None
+            if "mem_random_access" in samples:
+                # 4096 slots (32 KB) stay in cache
+                chain, warm = self._chain(n, 7), self._chain(4096, 8)
+            for r in range(rounds):
+                self.progress = f"Memory round {r + 1}/{rounds}"
+                if "mem_bandwidth" in samples:
+                    samples["mem_bandwidth"].append(self._mem_bandwidth(src, dst))
+                if "mem_random_access" in samples:
+                    samples["mem_random_access"].append(self._mem_random(chain, warm))
+            del src, dst, chain, warm
+
+        if "sched_jitter_p99" in samples:
+            for r in range(rounds):
+                self.progress = f"Jitter round {r + 1}/{rounds}"
+                samples["sched_jitter_p99"].append(self._jitter())
+
+        disk = [m for m in ("disk_seq_write", "disk_seq_read", "disk_random_read") if m in samples]
+        if disk:
+            path = join(self.workdir or gettempdir(), f"optimise_bench_{getpid()}.tmp")
+            try:
+                for r in range(rounds):
+                    self.progress = f"Disk round {r + 1}/{rounds}"
+                    for name, value in zip(("disk_seq_write", "disk_seq_read", "disk_random_read"), self._disk(path)):
+                        if name in samples:
+                            samples[name].append(value)
+            finally:
+                if exists(path):
+                    remove(path)
+
+        self.progress = None
+        return {name: self._stats(values) for name, values in samples.items()}
+
+    def _stats(self, values):
+        a = np.asarray(values, dtype=np.float64)
+        sd = float(a.std(ddof=1)) if len(a) > 1 else 0.0
+        return {"mean": float(a.mean()), "stdev": sd, "n": len(a),
+                "ci95": t95(len(a) - 1) * sd / len(a) ** 0.5 if len(a) > 1 else float("inf"),
+                "samples": a.tolist()}
+
+    @timed
+    def snapshot(self, label="before", metrics=None):
+        """Runs the benchmark and stores it under `label`."""
+        self.log(f"Benchmarking ({label})...")
+        self.progress = "Starting"
+        try:
+            results = self.run(metrics)
+        finally:
+            self.progress = None
+        self.snapshots[label] = {"time": time(), "results": results}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            dump(self.snapshots, f, indent=2)
+        replace(tmp, self.path)
+        return results
+
+    def compare(self, before="before", after="after"):
+        """
+        Per metric: change in % with its 95% CI (Welch), and a verdict of
+        'better', 'worse' or 'no change' when the interval includes zero.
+        """
+        a, b = self.snapshots[before]["results"], self.snapshots[after]["results"]
+        out = {}
+        for name in a.keys() & b.keys():
+            x, y = a[name], b[name]
+            unit, higher = self.METRICS[name]
+            diff = y["mean"] - x["mean"]
+            vx, vy = x["stdev"] ** 2 / x["n"], y["stdev"] ** 2 / y["n"]
+            se = (vx + vy) ** 0.5
+            df = (vx + vy) ** 2 / ((vx ** 2 / (x["n"] - 1) if x["n"] > 1 else 0) + (vy ** 2 / (y["n"] - 1) if y["n"] > 1 else 0)) \
+                if se else 0
+            half = t95(int(df)) * se if se else 0.0
+            if abs(diff) <= half:
+                verdict = "no change"
+            else:
+                verdict = "better" if (diff > 0) == higher else "worse"
+            base = x["mean"] or 1.0
+            out[name] = {"unit": unit, "before": x["mean"], "after": y["mean"],
+                         "delta_pct": diff / base * 100, "ci95_pct": half / abs(base) * 100, "verdict": verdict}
+        return out
+
+    def around(self, apply, label="tweak", metrics=None):
+        """Benchmarks, calls `apply()`, benchmarks again and returns (apply result, comparison)."""
+        self.snapshot(f"{label}:before", metrics)
+        result = apply()
+        self.snapshot(f"{label}:after", metrics)
+        return result, self.compare(f"{label}:before", f"{label}:after")
+
+    @staticmethod
+    def format(comparison):
+        lines = []
+        for name, c in sorted(comparison.items()):
+            lines.append(f"{name:18s} {c['before']:10.2f} -> {c['after']:10.2f} {c['unit']:6s} "
+                         f"{c['delta_pct']:+6.1f}% ±{c['ci95_pct']:.1f}%  {c['verdict']}")
+        return "\n".join(lines)
+
+
+system_benchmark = SystemBenchmark()
+
+
+def parse_cpu_list(text):
+    """'0-3,8,10-11' -> [0, 1, 2, 3, 8, 10, 11]"""
+    cpus = []
+    for part in (text or "").strip().split(","):
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        cpus.extend(range(int(lo), int(hi or lo) + 1))
+    return cpus
+
+
+class CpuTopology:
+    """
+    Physical cores, SMT siblings and last-level-cache domains.
+    Read from sysfs on Linux (`root` can point at a fake tree); elsewhere inferred
+    from psutil counts, assuming SMT siblings are numbered next to each other.
+    """
+
+    def __init__(self, root="/sys/devices/system/cpu"):
+        self.root = root
+        self.cores = []
+        self.llc_domains = []
+        self.source = None
+        self.refresh()
+
+    def _read(self, *parts):
+        try:
+            with open(join(self.root, *parts)) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def refresh(self):
+        cpus = sorted(int(n[3:]) for n in LinuxPowerBackend(self.root).cpus())
+        cores, llc = {}, {}
+        for cpu in cpus:
+            siblings = self._read(f"cpu{cpu}", "topology", "thread_siblings_list")
+            if siblings is None:
+                continue
+            cores[tuple(parse_cpu_list(siblings))] = None
+            best = (-1, None)
+            for index in range(8):
+                level = self._read(f"cpu{cpu}", "cache", f"index{index}", "level")
+                if level is None:
+                    break
+                if int(level) > best[0]:
+                    best = (int(level), self._read(f"cpu{cpu}", "cache", f"index{index}", "shared_cpu_list"))
+            if best[1]:
+                llc[tuple(parse_cpu_list(best[1]))] = None
+
+        if cores:
+            self.source = "sysfs"
+            self.cores = sorted(cores)
+            self.llc_domains = sorted(llc) or [tuple(c for core in self.cores for c in core)]
+            return
+
+        self.source = "psutil"
+        logical = cpu_count(logical=True) or 1
+        physical = cpu_count(logical=False) or logical
+        per_core = max(1, logical // physical)
+        self.cores = [tuple(range(i, min(i + per_core, logical))) for i in range(0, logical, per_core)]
+        self.llc_domains = [tuple(range(logical))]
+
+    @property
+    def logical(self):
+        return sorted(c for core in self.cores for c in core)
+
+    def reserve(self, count):
+        """
+        Picks `count` physical cores for dedicated use, from the end of the largest
+        cache domain so they share one LLC. Returns (reserved_cpus, other_cpus).
+        """
+        if count <= 0 or count >= len(self.cores):
+            return [], self.logical
+        domain = set(max(self.llc_domains, key=len))
+        local = [core for core in self.cores if set(core) <= domain]
+        chosen = (local if len(local) >= count else self.cores)[-count:]
+        reserved = sorted(c for core in chosen for c in core)
+        return reserved, sorted(c for c in self.logical if c not in reserved)
+
+    def describe(self):
+        return {"source": self.source, "logical": len(self.logical), "physical": len(self.cores),
+                "smt": any(len(core) > 1 for core in self.cores), "llc_domains": len(self.llc_domains)}
+
+
+def sched_counters(pid):
+    """
+    (run_ns, wait_ns, migrations) summed over all threads of `pid` from /proc.
+    wait_ns is run-queue delay, i.e. time spent ready but waiting for a CPU.
+    Returns None where /proc schedstat is not available.
+    """
+    run_ns = wait_ns = migrations = 0
+    try:
+        tids = [e.name for e in scandir(f"/proc/{pid}/task")]
+    except OSError:
+        return None
+    for tid in tids:
         try:
-            for root, _, files in walk(start_path):
-                for name in files:
+            with open(f"/proc/{pid}/task/{tid}/schedstat") as f:
+                fields = f.read().split()
+            run_ns += int(fields[0])
+            wait_ns += int(fields[1])
+            with open(f"/proc/{pid}/task/{tid}/sched") as f:
+                for line in f:
+                    if line.startswith("se.nr_migrations"):
+                        migrations += int(line.rsplit(":", 1)[1])
+                        break
+        except (OSError, ValueError, IndexError):
+            continue
+    return run_ns, wait_ns, migrations
+
+
+class AffinityManager(Function):
+    """
+    Reserves dedicated physical cores (with their SMT siblings) for whitelisted
+    processes and confines everything else to the remaining cores. New processes
+    are placed on the next tick; existing threads are re-pinned every `verify_every` ticks.
+    Applied placements are cached by (pid, create_time), so each process is touched
+    once, together with the mask it had before so stop() can put it back.
+    """
+
+    def __init__(self, topology=None, reserve_cores=2, interval=2.0, verify_every=5, exempt=None):
+        super().__init__()
+        self.topology = topology or CpuTopology()
+        self.reserve_cores = reserve_cores
+        self.interval = interval
+        self.verify_every = verify_every
+        # callable returning a RuleSet of processes that get the reserved cores
+        self.exempt = exempt
+        self.table = process_table
+        self.running = False
+        self.reserved, self.others = self.topology.reserve(reserve_cores)
+        self.applied = {}
+        self.errors = 0
+        self.ticks = 0
+        self.baseline = None
+        self.measured = None
+        self._since = None
+
+    @staticmethod
+    def supported():
+        return hasattr(Process, "cpu_affinity")
+
+    @timed
+    def start(self, baseline_seconds=5.0):
+        if self.running:
+            return "Affinity manager already running"
+        if not self.supported():
+            return ErrorResult("CPU affinity is not supported on this platform")
+        if not self.reserved:
+            return ErrorResult(f"Not enough cores to reserve {self.reserve_cores} (have {len(self.topology.cores)})")
+        self.running = True
+        Thread(target=self._loop, args=(baseline_seconds,), daemon=True).start()
+        self.log(f"Reserving CPUs {self.reserved} for whitelisted apps, others on {self.others}.")
+        return "Affinity manager started"
+
+    def stop(self):
+        """Stops placing processes and gives every touched process its original CPUs back."""
+        self.running = False
+        for proc, _, original in list(self.applied.values()):
+            self._pin(proc, original)
+        self.applied = {}
+
+    def _loop(self, baseline_seconds):
+        targets = self._targets()
+        start = self._counters(targets)
+        sleep(baseline_seconds)
+        self.baseline = self._rates(start, self._counters(targets), baseline_seconds)
+        while self.running:
+            try:
+                self.tick()
+            except Exception as e:
+                self.log(f"Affinity tick failed: {e}")
+            sleep(self.interval)
+
+    def _targets(self):
+        snap = self.table.get(max_age_ms=self.interval * 500)
+        rules = self.exempt() if self.exempt else None
+        if rules is None:
+            return []
+        out = []
+        for i, proc in enumerate(snap.procs):
+            try:
+                if rules.match(proc, snap.names[i]) is not None:
+                    out.append(int(snap.pid[i]))
+            except (NoSuchProcess, AccessDenied, ZombieProcess):
+                continue
+        return out
+
+    @timed(tick=True)
+    def tick(self):
+        snap = self.table.get(max_age_ms=self.interval * 500)
+        rules = self.exempt() if self.exempt else None
+        verify = self.ticks % self.verify_every == 0
+        self.ticks += 1
+        alive = {}
+        for i, proc in enumerate(snap.procs):
+            pid = int(snap.pid[i])
+            key = (pid, float(snap.create_time[i]))
+            # kernel threads and init must stay where the kernel put them
+            if pid in (0, 1, 2) or snap.ppid[i] == 2:
+                continue
+            entry = self.applied.get(key)
+            if entry is None:
+                try:
+                    dedicated = rules is not None and rules.match(proc, snap.names[i]) is not None
+                except (NoSuchProcess, AccessDenied, ZombieProcess):
+                    continue
+                target = self.reserved if dedicated else self.others
+                original = self._pin(proc, target)
+                if original is not None:
+                    entry = (proc, target, original)
+            elif verify:
+                self._pin_threads(proc, entry[1])
+            if entry is not None:
+                alive[key] = entry
+        self.applied = alive
+
+        targets = [pid for (pid, _), (_, t, _) in alive.items() if t is self.reserved]
+        now = monotonic()
+        if self._since is None:
+            self._since = (now, self._counters(targets))
+        else:
+            self.measured = self._rates(self._since[1], self._counters(targets), now - self._since[0])
+
+    def _pin(self, proc, cpus):
+        """Confines proc (and its threads) to cpus; returns the mask it had before, None on failure."""
+        try:
+            before = proc.cpu_affinity()
+            if before != cpus:
+                proc.cpu_affinity(cpus)
+            self._pin_threads(proc, cpus)
+            return before
+        except (NoSuchProcess, AccessDenied, ZombieProcess, OSError, ValueError):
+            self.errors += 1
+            return None
+
+    @staticmethod
+    def _pin_threads(proc, cpus):
+        # on Linux affinity is per thread; threads that already exist keep the old mask
+        if sched_setaffinity is None:
+            return
+        try:
+            threads = proc.threads()
+        except (NoSuchProcess, AccessDenied, ZombieProcess):
+            return
+        target = set(cpus)
+        for t in threads:
+            try:
+                if sched_getaffinity(t.id) != target:
+                    sched_setaffinity(t.id, target)
+            except OSError:
+                continue
+
+    @staticmethod
+    def _counters(pids):
+        out = {}
+        for pid in pids:
+            c = sched_counters(pid)
+            if c is not None:
+                out[pid] = c
+        return out
+
+    @staticmethod
+    def _rates(before, after, seconds):
+        common = before.keys() & after.keys()
+        if not common or seconds <= 0:
+            return None
+        run = sum(after[p][0] - before[p][0] for p in common)
+        wait = sum(after[p][1] - before[p][1] for p in common)
+        migrations = sum(after[p][2] - before[p][2] for p in common)
+        return {
+            "processes": len(common),
+            "migrations_per_s": migrations / seconds,
+            "wait_ms_per_s": wait / 1e6 / seconds,
+            # share of runnable time spent waiting for a CPU
+            "contention": wait / (run + wait) if run + wait else 0.0
+        }
+
+    def report(self):
+        """Migration and run-queue contention of the dedicated processes, before vs. after."""
+        out = {"topology": self.topology.describe(), "reserved": self.reserved, "others": self.others,
+               "placed": len(self.applied), "errors": self.errors, "before": self.baseline, "after": self.measured}
+        if self.baseline and self.measured:
+            for name in ("migrations_per_s", "wait_ms_per_s", "contention"):
+                b = self.baseline[name]
+                out[f"{name}_drop_pct"] = (b - self.measured[name]) / b * 100 if b else None
+        return out
+
+
+affinity = AffinityManager()
+
+
+class SchedulerPolicy(Function):
+    """
+    Persistent per-process scheduling rules, re-applied to matching processes as
+    they appear. A rule is {"match": <RuleSet entry>, "nice": -20..19,
+    "io": "idle"|"low"|"normal"|"high", "oom_score_adj": -1000..1000}; any field may
+    be left out. nice maps to priority classes and io to I/O priorities on Windows;
+    oom_score_adj is Linux only.
+
+    What was applied is cached per (pid, create_time), so unchanged processes are
+    not touched again; every `verify_every` ticks the cached ones are read back
+    and re-asserted if something reset them.
+    """
+
+    IO_LINUX = {"idle": (IOPRIO_CLASS_IDLE, 0), "low": (IOPRIO_CLASS_BE, 7),
+                "normal": (IOPRIO_CLASS_BE, 4), "high": (IOPRIO_CLASS_BE, 0)}
+    IO_WINDOWS = {"idle": IOPRIO_VERYLOW, "low": IOPRIO_LOW, "normal": IOPRIO_NORMAL, "high": IOPRIO_HIGH}
+
+    def __init__(self, path="sched_rules.json", interval=2.0, verify_every=15):
+        super().__init__()
+        self.path = path
+        self.interval = interval
+        self.verify_every = verify_every
+        self.table = process_table
+        self.rules = []
+        self.matcher = RuleSet()
+        self.running = False
+        self.applied = {}
+        self.ticks = 0
+        self.counts = {"applied": 0, "reasserted": 0, "errors": 0}
+        self.last_tick_ms = 0.0
+        self._lock = Lock()
+        self.load()
+
+    def load(self):
+        if exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    self._set_rules(load(f))
+            except (OSError, ValueError) as e:
+                self.log(f"Error loading scheduler rules: {e}")
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            dump(self.rules, f, indent=4)
+        replace(tmp, self.path)
+
+    def _set_rules(self, rules):
+        with self._lock:
+            self.rules = [dict(r) for r in rules]
+            self.matcher = RuleSet([r["match"] for r in self.rules])
+            for err in self.matcher.errors:
+                self.log(err)
+            # targets may have changed, so every process is evaluated again
+            self.applied = {}
+
+    def set_rule(self, match, **settings):
+        """Adds or replaces the rule for `match` and persists it."""
+        rule = {"match": match}
+        rule.update({k: v for k, v in settings.items() if v is not None})
+        rules = [r for r in self.rules if r["match"] != match] + [rule]
+        self._set_rules(rules)
+        self.save()
+        self.log(f"Scheduler rule set: {rule}")
+        return rule
+
+    def remove_rule(self, match):
+        rules = [r for r in self.rules if r["match"] != match]
+        if len(rules) == len(self.rules):
+            return False
+        self._set_rules(rules)
+        self.save()
+        return True
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            Thread(target=self._loop, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+
+    def _loop(self):
+        while self.running:
+            try:
+                self.tick()
+            except Exception as e:
+                self.log(f"Scheduler tick failed: {e}")
+            sleep(self.interval)
+
+    @timed(tick=True)
+    def tick(self):
+        if not self.rules:
+            return
+        start = perf_counter()
+        snap = self.table.get(max_age_ms=self.interval * 500)
+        verify = self.ticks % self.verify_every == self.verify_every - 1
+        self.ticks += 1
+        with self._lock:
+            by_match = {r["match"]: r for r in self.rules}
+            applied = {}
+            for i, proc in enumerate(snap.procs):
+                key = (int(snap.pid[i]), float(snap.create_time[i]))
+                if key in self.applied:
+                    rule = self.applied[key]
+                    if rule is not None and verify and self._differs(proc, rule):
+                        if self.apply_to(proc, rule):
+                            self.counts["reasserted"] += 1
+                            self.log(f"Re-asserted '{rule['match']}' on {snap.names[i]} (PID {key[0]})")
+                else:
                     try:
-                        file_path = join(root, name)
-                        size = getsize(file_path)
-                        if size > threshold_bytes:
-                            huge_files.append((file_path, size / (1024*1024)))
-                    except OSError:
+                        entry = self.matcher.match(proc, snap.names[i])
+                    except (NoSuchProcess, AccessDenied, ZombieProcess):
                         continue
-        except Exception as e:
-            self.log(f"Error scanning: {e}")
-            print(f"Error scanning: {e}")
-            
-        self.log(f"Scan complete. Found {len(huge_files)} files.")
-        return sorted(huge_files, key=lambda x: x[1], reverse=True)
+                    rule = by_match.get(entry)
+                    if rule is not None and self.apply_to(proc, rule):
+                        self.counts["applied"] += 1
+                applied[key] = rule
+            self.applied = applied
+        self.last_tick_ms = (perf_counter() - start) * 1000
 
-    def zip_item(self, path):
-        """Zips a file or folder."""
-        self.log(f"Zipping item: {path}")
+    def _targets(self, rule):
+        """Platform-specific values for a rule: {'nice': ..., 'io': (class, value) | const, 'oom': int}."""
+        out = {}
+        if "nice" in rule:
+            n = int(rule["nice"])
+            if windll is not None:
+                out["nice"] = (HIGH_PRIORITY_CLASS if n <= -10 else ABOVE_NORMAL_PRIORITY_CLASS if n < 0 else
+                               NORMAL_PRIORITY_CLASS if n == 0 else BELOW_NORMAL_PRIORITY_CLASS if n <= 10 else IDLE_PRIORITY_CLASS)
+            else:
+                out["nice"] = n
+        if "io" in rule:
+            if windll is not None:
+                out["io"] = self.IO_WINDOWS[rule["io"]]
+            else:
+                cls, value = self.IO_LINUX[rule["io"]]
+                out["io"] = None if cls is None else (cls, value)
+        if "oom_score_adj" in rule and windll is None:
+            out["oom"] = int(rule["oom_score_adj"])
+        return out
+
+    def _current(self, proc, what):
+        if what == "nice":
+            return proc.nice()
+        if what == "io":
+            io = proc.ionice()
+            return io if windll is not None else (io.ioclass, io.value)
+        with open(f"/proc/{proc.pid}/oom_score_adj") as f:
+            return int(f.read())
+
+    def _differs(self, proc, rule):
+        try:
+            return any(target is not None and self._current(proc, what) != target
+                       for what, target in self._targets(rule).items())
+        except (NoSuchProcess, AccessDenied, ZombieProcess, OSError):
+            return False
+
+    def apply_to(self, proc, rule):
+        """Brings one process in line with `rule`, writing only values that differ."""
+        ok = True
+        for what, target in self._targets(rule).items():
+            if target is None:
+                continue
+            try:
+                if self._current(proc, what) == target:
+                    continue
+                if what == "nice":
+                    proc.nice(target)
+                elif what == "io":
+                    proc.ionice(*target) if isinstance(target, tuple) else proc.ionice(target)
+                else:
+                    with open(f"/proc/{proc.pid}/oom_score_adj", "w") as f:
+                        f.write(str(target))
+            except (NoSuchProcess, ZombieProcess):
+                return False
+            except (AccessDenied, OSError, ValueError) as e:
+                ok = False
+                self.counts["errors"] += 1
+                self.log(f"Could not set {what} for PID {proc.pid}: {e}")
+        return ok
+
+    def stats(self):
+        out = dict(self.counts)
+        out.update({"rules": len(self.rules), "matched": sum(1 for r in self.applied.values() if r is not None),
+                    "tracked": len(self.applied), "last_tick_ms": self.last_tick_ms})
+        return out
+
+
+scheduler_policy = SchedulerPolicy()
+
+
+class FileIndex:
+    """
+    Persistent SQLite index of scanned directories (with their mtimes) and the
+    files of at least `min_size` bytes found in them.
+
+    A directory's mtime only changes when entries are added, removed or renamed,
+    so an unchanged directory is not listed again: its subdirectories and large
+    files come from the index and only the subdirectories are re-stat'ed.
+    Files that grow in place inside an unchanged directory need a full rescan.
+    """
+
+    def __init__(self, path="file_index.db", min_size=50 * 1024 * 1024):
+        self.path = path
+        self._lock = Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+            CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, parent TEXT, mtime INTEGER,
+                                             file_count INTEGER, bytes INTEGER);
+            CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, dir TEXT, size INTEGER);
+            CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+            CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+            CREATE INDEX IF NOT EXISTS files_size ON files(size);
+        """)
+        row = self.db.execute("SELECT value FROM meta WHERE key='min_size'").fetchone()
+        if row is None:
+            self.db.execute("INSERT INTO meta VALUES ('min_size', ?)", (min_size,))
+            self.db.commit()
+            self.min_size = min_size
+        else:
+            self.min_size = row[0]
+
+    @staticmethod
+    def _range(path):
+        """Key range covering every path below `path`."""
+        prefix = path.rstrip("/\\") + sep
+        return prefix, prefix[:-1] + chr(ord(sep) + 1)
+
+    def lookup(self, path, mtime):
+        """Returns (subdirs, files, file_count, bytes) if `path` is indexed with this mtime, else None."""
+        with self._lock:
+            row = self.db.execute("SELECT mtime, file_count, bytes FROM dirs WHERE path=?", (path,)).fetchone()
+            if row is None or row[0] != mtime:
+                return None
+            subdirs = [r[0] for r in self.db.execute("SELECT path FROM dirs WHERE parent=?", (path,))]
+            files = self.db.execute("SELECT path, size FROM files WHERE dir=?", (path,)).fetchall()
+        return subdirs, files, row[1], row[2]
+
+    def store(self, path, mtime, subdirs, files, file_count, total_bytes):
+        """Records a freshly listed directory and drops subtrees that disappeared from it."""
+        with self._lock:
+            old = {r[0] for r in self.db.execute("SELECT path FROM dirs WHERE parent=?", (path,))}
+            for gone in old.difference(subdirs):
+                lo, hi = self._range(gone)
+                self.db.execute("DELETE FROM dirs WHERE path=? OR (path>=? AND path<?)", (gone, lo, hi))
+                self.db.execute("DELETE FROM files WHERE path>=? AND path<?", (lo, hi))
+            self.db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?)",
+                            (path, dirname(path.rstrip("/\\")) or path, mtime, file_count, total_bytes))
+            self.db.execute("DELETE FROM files WHERE dir=?", (path,))
+            self.db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                                ((fpath, path, size) for fpath, size in files))
+
+    def commit(self):
+        with self._lock:
+            self.db.commit()
+
+    def rollback(self):
+        with self._lock:
+            self.db.rollback()
+
+    def largest_under(self, path, limit=50, min_size=0):
+        """Largest indexed files below `path`, answered from the index alone."""
+        lo, hi = self._range(path)
+        with self._lock:
+            return self.db.execute("SELECT path, size FROM files WHERE path>=? AND path<? AND size>=? "
+                                   "ORDER BY size DESC LIMIT ?", (lo, hi, min_size, limit)).fetchall()
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+
+class FileScanner:
+    """
+    Parallel os.scandir walker.
+    Directories are fanned out across a fixed set of worker threads; file sizes come
+    from DirEntry.stat (no extra stat call on Windows). Matches are streamed to
+    `on_match(path, size)` as they are found. With `top_k` only the K largest are kept.
+    With a FileIndex, directories whose mtime is unchanged are served from the index.
+    """
+
+    def __init__(self, root, threshold_bytes=0, workers=8, top_k=None, index=None):
+        self.root = root
+        self.index = index
+        self.dirs_from_index = 0
+        self.threshold = threshold_bytes
+        self.workers = workers
+        self.top_k = top_k
+        self.cancelled = Event()
+        self.dirs = 0
+        self.files = 0
+        self.bytes_seen = 0
+        self.errors = 0
+        self.matches = []
+        self.started = None
+        self.finished = None
+        self._lock = Lock()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def _add_match(self, path, size, on_match):
+        with self._lock:
+            if self.top_k:
+                if len(self.matches) < self.top_k:
+                    heappush(self.matches, (size, path))
+                elif size > self.matches[0][0]:
+                    heapreplace(self.matches, (size, path))
+                else:
+                    return
+            else:
+                self.matches.append((size, path))
+        if on_match:
+            on_match(path, size)
+
+    def _from_index(self, path, pending, on_match):
         try:
-            zip_name = f"{path}.zip"
-            with ZipFile(zip_name, 'w', ZIP_DEFLATED) as zipf:
-                if isdir(path):
-                    for root, _, files in walk(path):
-                        for file in files:
-                            zipf.write(join(root, file),
-                                       relpath(join(root, file),
-                                       join(path, '..')))
+            mtime = stat(path).st_mtime_ns
+        except OSError:
+            return None, True
+        cached = self.index.lookup(path, mtime)
+        if cached is None:
+            return mtime, False
+        subdirs, files, file_count, total_bytes = cached
+        for sub in subdirs:
+            pending.put(sub)
+        for fpath, size in files:
+            if size > self.threshold:
+                self._add_match(fpath, size, on_match)
+        with self._lock:
+            self.dirs += 1
+            self.dirs_from_index += 1
+            self.files += file_count
+            self.bytes_seen += total_bytes
+        return mtime, True
+
+    def _scan_dir(self, path, pending, on_match):
+        mtime = None
+        if self.index is not None:
+            mtime, done = self._from_index(path, pending, on_match)
+            if done:
+                return
+        keep = self.index.min_size if self.index is not None else None
+        subdirs, indexed = [], []
+        files = size_total = errors = 0
+        listed = False
+        try:
+            with scandir(path) as it:
+                for entry in it:
+                    if self.cancelled.is_set():
+                        break
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.put(entry.path)
+                            subdirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            size = entry.stat(follow_symlinks=False).st_size
+                            files += 1
+                            size_total += size
+                            if size > self.threshold:
+                                self._add_match(entry.path, size, on_match)
+                            if keep is not None and size >= keep:
+                                indexed.append((entry.path, size))
+                    except OSError:
+                        errors += 1
+            listed = True
+        except OSError:
+            errors += 1
+        if self.index is not None and not self.cancelled.is_set():
+            # an incomplete listing (e.g. permission denied) is stored without an mtime: the
+            # parent still knows the directory, but it is listed again on every scan
+            complete = listed and not errors
+            self.index.store(path, mtime if complete else None, subdirs, indexed, files, size_total)
+        with self._lock:
+            self.dirs += 1
+            self.files += files
+            self.bytes_seen += size_total
+            self.errors += errors
+
+    def _worker(self, pending, on_match):
+        while True:
+            path = pending.get()
+            try:
+                if path is None:
+                    return
+                if not self.cancelled.is_set():
+                    self._scan_dir(path, pending, on_match)
+            except Exception:
+                # one bad directory (or a failing on_match/index write) must not take the worker down,
+                # or run() would wait on pending.join() forever
+                with self._lock:
+                    self.errors += 1
+            finally:
+                pending.task_done()
+
+    def run(self, on_match=None):
+        """Blocks until the walk finishes or is cancelled; returns [(path, size)] largest first."""
+        # LIFO keeps the walk depth-first so the pending queue stays small
+        pending = LifoQueue()
+        pending.put(self.root)
+        self.started = perf_counter()
+        threads = [Thread(target=self._worker, args=(pending, on_match), daemon=True) for _ in range(self.workers)]
+        for t in threads:
+            t.start()
+        pending.join()
+        for _ in threads:
+            pending.put(None)
+        if self.index is not None:
+            # a partial walk would leave directories without their children
+            if self.cancelled.is_set():
+                self.index.rollback()
+            else:
+                self.index.commit()
+        self.finished = perf_counter()
+        return self.results()
+
+    def stream(self):
+        """Runs the walk in the background and yields (path, size) as matches arrive."""
+        out = Queue()
+        done = object()
+
+        def target():
+            try:
+                self.run(lambda path, size: out.put((path, size)))
+            finally:
+                out.put(done)
+
+        Thread(target=target, daemon=True).start()
+        while True:
+            item = out.get()
+            if item is done:
+                return
+            yield item
+
+    def results(self):
+        with self._lock:
+            return [(path, size) for size, path in sorted(self.matches, reverse=True)]
+
+    def progress(self):
+        end = self.finished or perf_counter()
+        elapsed = end - self.started if self.started else 0.0
+        with self._lock:
+            return {
+                "dirs": self.dirs,
+                "files": self.files,
+                "bytes_seen": self.bytes_seen,
+                "matches": len(self.matches),
+                "errors": self.errors,
+                "elapsed": elapsed,
+                "dirs_from_index": self.dirs_from_index,
+                "dirs_per_s": self.dirs / elapsed if elapsed else 0.0,
+                "files_per_s": self.files / elapsed if elapsed else 0.0,
+                "done": self.finished is not None,
+                "cancelled": self.cancelled.is_set()
+            }
+
+
+class DuplicateFinder:
+    """
+    Tiered duplicate detection: files are bucketed by size, then by a hash of their
+    first and last blocks, and only the survivors are fully hashed (via mmap).
+    Each tier only reads files that still have a possible twin.
+    """
+    BLOCK = 64 * 1024
+    CHUNK = 8 * 1024 * 1024
+
+    def __init__(self, root, min_size=1024 * 1024, io_concurrency=4, workers=8):
+        self.root = root
+        self.min_size = max(min_size, 1)
+        self.io_concurrency = io_concurrency
+        self.workers = workers
+        self.scanner = None
+        self.bytes_read = 0
+        self.stats = {}
+        self._lock = Lock()
+
+    def cancel(self):
+        if self.scanner:
+            self.scanner.cancel()
+
+    def _read(self, n):
+        with self._lock:
+            self.bytes_read += n
+
+    def _edge_hash(self, path, size):
+        h = blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            head = f.read(self.BLOCK)
+            h.update(head)
+            read = len(head)
+            if size > 2 * self.BLOCK:
+                f.seek(size - self.BLOCK)
+                tail = f.read(self.BLOCK)
+                h.update(tail)
+                read += len(tail)
+            elif size > self.BLOCK:
+                rest = f.read()
+                h.update(rest)
+                read += len(rest)
+        self._read(read)
+        return h.digest()
+
+    def _full_hash(self, path, size):
+        h = blake2b(digest_size=32)
+        with open(path, "rb") as f:
+            # a file that changed size since the scan is no longer a candidate (and an
+            # empty one cannot be mapped at all)
+            if stat(f.fileno()).st_size != size:
+                return None
+            m = mmap(f.fileno(), 0, access=ACCESS_READ)
+        with m:
+            view = memoryview(m)
+            try:
+                for off in range(0, size, self.CHUNK):
+                    if self.scanner.cancelled.is_set():
+                        return None
+                    h.update(view[off:off + self.CHUNK])
+            finally:
+                view.release()
+        self._read(size)
+        return h.digest()
+
+    def _regroup(self, groups, hasher, pool):
+        """Splits each group by `hasher(path, size)`, keeping only sub-groups with 2+ members."""
+        jobs = {}
+        for size, paths in groups:
+            for path in paths:
+                jobs[pool.submit(hasher, path, size)] = (size, path)
+        buckets = {}
+        for future in as_completed(jobs):
+            size, path = jobs[future]
+            try:
+                digest = future.result()
+            except (OSError, ValueError):
+                # ValueError: mmap of a file truncated in the meantime
+                continue
+            if digest is not None:
+                buckets.setdefault((size, digest), []).append(path)
+        return [(key, paths) for key, paths in buckets.items() if len(paths) > 1]
+
+    def run(self):
+        """Returns duplicate groups [{"size", "hash", "paths"}], most reclaimable space first."""
+        start = perf_counter()
+        self.scanner = FileScanner(self.root, self.min_size - 1, self.workers)
+        files = self.scanner.run()
+
+        by_size = {}
+        for path, size in files:
+            by_size.setdefault(size, []).append(path)
+
+        # hard links to one inode are not copies
+        candidates = []
+        for size, paths in by_size.items():
+            if len(paths) < 2:
+                continue
+            inodes = {}
+            for path in paths:
+                try:
+                    st = stat(path)
+                    inodes.setdefault((st.st_dev, st.st_ino), path)
+                except OSError:
+                    continue
+            if len(inodes) > 1:
+                candidates.append((size, list(inodes.values())))
+
+        with ThreadPoolExecutor(max_workers=self.io_concurrency) as pool:
+            edge = self._regroup(candidates, self._edge_hash, pool)
+            # the edge hash already covered the whole file for small ones
+            small = [(key, paths) for key, paths in edge if key[0] <= 2 * self.BLOCK]
+            large = [(key[0], paths) for key, paths in edge if key[0] > 2 * self.BLOCK]
+            full = self._regroup(large, self._full_hash, pool) if not self.scanner.cancelled.is_set() else []
+
+        groups = [{"size": size, "hash": digest.hex(), "paths": sorted(paths)} for (size, digest), paths in small + full]
+        groups.sort(key=lambda g: g["size"] * (len(g["paths"]) - 1), reverse=True)
+
+        self.stats = {
+            "files_scanned": len(files),
+            "bytes_scanned": sum(size for _, size in files),
+            "bytes_read": self.bytes_read,
+            "size_candidates": sum(len(p) for _, p in candidates),
+            "edge_candidates": sum(len(p) for _, p in edge),
+            "groups": len(groups),
+            "reclaimable_bytes": sum(g["size"] * (len(g["paths"]) - 1) for g in groups),
+            "elapsed": perf_counter() - start,
+            "cancelled": self.scanner.cancelled.is_set()
+        }
+        return groups
+
+
+class ZipStreamWriter:
+    """
+    Minimal zip writer for members that arrive already compressed (STORED or raw DEFLATE).
+    Local headers always carry a zip64 extra field and are patched once the sizes are known.
+    """
+
+    def __init__(self, path):
+        self.f = open(path, "wb")
+        self.entries = []
+
+    @staticmethod
+    def _dos_time(mtime):
+        t = localtime(max(mtime, 315532800))
+        return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+    def begin(self, arcname, method, mtime):
+        name = arcname.encode("utf-8")
+        dtime, ddate = self._dos_time(mtime)
+        entry = {"name": name, "method": method, "time": dtime, "date": ddate, "offset": self.f.tell()}
+        self.entries.append(entry)
+        self._local_header(entry, 0, 0, 0)
+        return entry
+
+    def _local_header(self, entry, crc, comp, size):
+        extra = struct.pack("<HHQQ", 0x0001, 16, size, comp)
+        self.f.write(struct.pack("<IHHHHHIIIHH", 0x04034b50, 45, 0x0800, entry["method"], entry["time"], entry["date"],
+                                 crc, 0xFFFFFFFF, 0xFFFFFFFF, len(entry["name"]), len(extra)))
+        self.f.write(entry["name"])
+        self.f.write(extra)
+
+    def write(self, data):
+        self.f.write(data)
+
+    def end(self, entry, crc, comp, size):
+        entry.update(crc=crc, comp=comp, size=size)
+        pos = self.f.tell()
+        self.f.seek(entry["offset"])
+        self._local_header(entry, crc, comp, size)
+        self.f.seek(pos)
+
+    def close(self):
+        cd_start = self.f.tell()
+        for e in self.entries:
+            extra = struct.pack("<HHQQQ", 0x0001, 24, e["size"], e["comp"], e["offset"])
+            self.f.write(struct.pack("<IHHHHHHIIIHHHHHII", 0x02014b50, 45, 45, 0x0800, e["method"], e["time"], e["date"],
+                                     e["crc"], 0xFFFFFFFF, 0xFFFFFFFF, len(e["name"]), len(extra), 0, 0, 0, 0, 0xFFFFFFFF))
+            self.f.write(e["name"])
+            self.f.write(extra)
+        cd_end = self.f.tell()
+        n = len(self.entries)
+        self.f.write(struct.pack("<IQHHIIQQQQ", 0x06064b50, 44, 45, 45, 0, 0, n, n, cd_end - cd_start, cd_start))
+        self.f.write(struct.pack("<IIQI", 0x07064b50, 0, cd_end, 1))
+        self.f.write(struct.pack("<IHHHHIIH", 0x06054b50, 0, 0, min(n, 0xFFFF), min(n, 0xFFFF),
+                                 0xFFFFFFFF, 0xFFFFFFFF, 0))
+        self.f.close()
+
+
+class ArchiveEngine:
+    """
+    Multi-core zip engine.
+    Deflate members are cut into chunks that are compressed in parallel (zlib releases
+    the GIL); each chunk is primed with the previous 32 KiB so the ratio matches a
+    single stream. Incompressible members are STORED. LZMA and BZIP2 are offered
+    through zipfile (one stream per archive, parallel across archives).
+    """
+    CHUNK = 4 * 1024 * 1024
+    WINDOW = 32 * 1024
+    INCOMPRESSIBLE = {".zip", ".7z", ".rar", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".lz4", ".cab", ".jpg", ".jpeg",
+                      ".png", ".gif", ".webp", ".heic", ".mp3", ".aac", ".ogg", ".opus", ".flac", ".m4a", ".mp4",
+                      ".mkv", ".avi", ".mov", ".webm", ".wmv", ".docx", ".xlsx", ".pptx", ".jar", ".apk", ".iso"}
+    METHODS = {"deflate": ZIP_DEFLATED, "store": ZIP_STORED, "lzma": ZIP_LZMA, "bzip2": ZIP_BZIP2}
+
+    def __init__(self, workers=None, io_concurrency=2, level=6):
+        self.workers = workers or cpu_count() or 1
+        self.io_concurrency = io_concurrency
+        self.level = level
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.members = 0
+        self.started = None
+        self._lock = Lock()
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
+
+    @staticmethod
+    def members_of(path):
+        if not isdir(path):
+            return [(path, basename(path))]
+        parent = join(path, "..")
+        return [(join(root, f), relpath(join(root, f), parent).replace(sep, "/"))
+                for root, _, files in walk(path) for f in files]
+
+    def _incompressible(self, path):
+        if splitext(path)[1].lower() in self.INCOMPRESSIBLE:
+            return True
+        with open(path, "rb") as f:
+            sample = f.read(256 * 1024)
+        return len(sample) > 4096 and len(compress(sample, 1)) > len(sample) * 0.95
+
+    def _deflate(self, data, prev, last):
+        c = compressobj(self.level, DEFLATED, -15, zdict=prev) if prev else compressobj(self.level, DEFLATED, -15)
+        return c.compress(data) + c.flush(Z_FINISH if last else Z_SYNC_FLUSH)
+
+    def _count(self, n_in, n_out):
+        with self._lock:
+            self.bytes_in += n_in
+            self.bytes_out += n_out
+
+    def _write_member(self, writer, src, arcname, stored=False):
+        method = ZIP_STORED if stored or self._incompressible(src) else ZIP_DEFLATED
+        entry = writer.begin(arcname, method, stat(src).st_mtime)
+        crc = size = comp = 0
+        in_flight = deque()
+        prev = b""
+        with open(src, "rb") as f:
+            chunk = f.read(self.CHUNK)
+            while True:
+                nxt = f.read(self.CHUNK) if chunk else b""
+                last = not nxt
+                crc = crc32(chunk, crc)
+                size += len(chunk)
+                if method == ZIP_STORED:
+                    writer.write(chunk)
+                    comp += len(chunk)
+                    self._count(len(chunk), len(chunk))
                 else:
-                    zipf.write(path, basename(path))
-            self.log(f"Created archive: {zip_name}")
-            remove(path)
-            return f"Created {zip_name}"
+                    in_flight.append((len(chunk), self.pool.submit(self._deflate, chunk, prev, last)))
+                    prev = chunk[-self.WINDOW:]
+                    # bounded read-ahead keeps memory at ~2 chunks per worker
+                    while in_flight and (len(in_flight) > 2 * self.workers or last):
+                        n_in, fut = in_flight.popleft()
+                        out = fut.result()
+                        writer.write(out)
+                        comp += len(out)
+                        self._count(n_in, len(out))
+                if last:
+                    break
+                chunk = nxt
+        writer.end(entry, crc, comp, size)
+        with self._lock:
+            self.members += 1
+
+    def archive(self, path, method="deflate", delete_source=False):
+        """Creates `path`.zip, verifies every CRC and optionally removes the source. Returns a stats dict."""
+        if self.started is None:
+            self.started = perf_counter()
+        start = perf_counter()
+        zip_name = f"{path}.zip"
+        members = self.members_of(path)
+        total = sum(stat(src).st_size for src, _ in members)
+
+        try:
+            if method in ("deflate", "store"):
+                writer = ZipStreamWriter(zip_name)
+                try:
+                    for src, arcname in members:
+                        self._write_member(writer, src, arcname, stored=method == "store")
+                finally:
+                    writer.close()
+            else:
+                with ZipFile(zip_name, "w", self.METHODS[method]) as zipf:
+                    for src, arcname in members:
+                        zipf.write(src, arcname)
+                        self._count(stat(src).st_size, 0)
+                        with self._lock:
+                            self.members += 1
+
+            with ZipFile(zip_name) as zipf:
+                bad = zipf.testzip()
+                count = len(zipf.infolist())
+            if bad is not None or count != len(members):
+                raise ValueError(f"Verification failed for {zip_name} ({bad or 'member count mismatch'}); source kept")
+        except BaseException:
+            if exists(zip_name):
+                remove(zip_name)
+            raise
+
+        if delete_source:
+            if isdir(path):
+                rmtree(path)
+            else:
+                remove(path)
+
+        elapsed = perf_counter() - start
+        out = stat(zip_name).st_size
+        return {"archive": zip_name, "members": len(members), "bytes_in": total, "bytes_out": out,
+                "ratio": out / total if total else 1.0, "seconds": elapsed,
+                "mb_per_s": total / (1024*1024) / elapsed if elapsed else 0.0, "deleted": delete_source}
+
+    def archive_many(self, paths, method="deflate", delete_source=False, on_done=None):
+        """
+        Archives a batch through `io_concurrency` concurrent archive streams that share
+        the compression pool, so many huge files do not saturate the disk.
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.io_concurrency) as streams:
+            jobs = {streams.submit(self.archive, p, method, delete_source): p for p in paths}
+            for fut in as_completed(jobs):
+                p = jobs[fut]
+                try:
+                    results[p] = fut.result()
+                except Exception as e:
+                    results[p] = {"error": str(e)}
+                if on_done:
+                    on_done(p, results[p])
+        return results
+
+    def progress(self):
+        elapsed = perf_counter() - self.started if self.started else 0.0
+        with self._lock:
+            return {"members": self.members, "bytes_in": self.bytes_in, "bytes_out": self.bytes_out,
+                    "mb_per_s": self.bytes_in / (1024*1024) / elapsed if elapsed else 0.0}
+
+
+class DirectoryTree:
+    """
+    Cumulative size and file count of every directory under a root, built in one walk.
+    Directories are rows of flat NumPy arrays (parent id, depth, own and cumulative
+    bytes/files); files are only counted, so memory grows with directories, not entries.
+    """
+
+    def __init__(self, root):
+        self.root = normpath(root)
+        self.cancelled = Event()
+        self.dirs = 0
+        self.files = 0
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def build(self):
+        start = perf_counter()
+        parent, depth = array("q", [-1]), array("h", [0])
+        own_bytes, own_files = array("q", [0]), array("q", [0])
+        names = [self.root]
+        stack = [(self.root, 0)]
+        while stack and not self.cancelled.is_set():
+            path, i = stack.pop()
+            nbytes = nfiles = 0
+            try:
+                with scandir(path) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                parent.append(i)
+                                depth.append(depth[i] + 1)
+                                own_bytes.append(0)
+                                own_files.append(0)
+                                names.append(entry.name)
+                                stack.append((entry.path, len(names) - 1))
+                            elif entry.is_file(follow_symlinks=False):
+                                nbytes += entry.stat(follow_symlinks=False).st_size
+                                nfiles += 1
+                        except OSError:
+                            self.errors += 1
+            except OSError:
+                self.errors += 1
+            own_bytes[i] = nbytes
+            own_files[i] = nfiles
+            self.dirs += 1
+            self.files += nfiles
+
+        self.names = names
+        self.parent = np.frombuffer(parent, dtype=np.int64)
+        self.depth = np.frombuffer(depth, dtype=np.int16)
+        self.own_bytes = np.frombuffer(own_bytes, dtype=np.int64)
+        self.own_files = np.frombuffer(own_files, dtype=np.int64)
+        self.bytes = self.own_bytes.copy()
+        self.file_count = self.own_files.copy()
+
+        # children always have higher depth, so fold levels bottom-up
+        order = np.argsort(self.depth, kind="stable")
+        levels = np.searchsorted(self.depth[order], np.arange(int(self.depth.max()) + 2))
+        for d in range(int(self.depth.max()), 0, -1):
+            idx = order[levels[d]:levels[d + 1]]
+            np.add.at(self.bytes, self.parent[idx], self.bytes[idx])
+            np.add.at(self.file_count, self.parent[idx], self.file_count[idx])
+
+        # CSR child lists for drill-down
+        self._child_order = np.argsort(self.parent, kind="stable")
+        self._child_start = np.searchsorted(self.parent[self._child_order], np.arange(len(names) + 1))
+        self.elapsed = perf_counter() - start
+        return self
+
+    def __len__(self):
+        return len(self.names)
+
+    def path(self, i):
+        parts = []
+        while i > 0:
+            parts.append(self.names[i])
+            i = int(self.parent[i])
+        return join(self.root, *reversed(parts))
+
+    def children(self, i):
+        """Child directory ids of `i`, heaviest first."""
+        kids = self._child_order[self._child_start[i]:self._child_start[i + 1]]
+        return kids[np.argsort(self.bytes[kids])[::-1]]
+
+    def info(self, i):
+        return {"id": int(i), "path": self.path(i), "bytes": int(self.bytes[i]), "files": int(self.file_count[i]),
+                "own_bytes": int(self.own_bytes[i]), "depth": int(self.depth[i])}
+
+    def top(self, k=20, depth=None, min_depth=1):
+        """Heaviest directories by cumulative size, at one `depth` or at any depth >= `min_depth`."""
+        mask = (self.depth == depth) if depth is not None else (self.depth >= min_depth)
+        ids = np.nonzero(mask)[0]
+        if len(ids) > k:
+            ids = ids[np.argpartition(self.bytes[ids], -k)[-k:]]
+        return [self.info(i) for i in ids[np.argsort(self.bytes[ids])[::-1]]]
+
+
+def squarify(sizes, x, y, w, h):
+    """Squarified treemap layout for `sizes` (sorted descending); returns [(x, y, w, h)]."""
+    total = float(sum(sizes))
+    if total <= 0 or w <= 0 or h <= 0:
+        return [(x, y, 0, 0) for _ in sizes]
+    areas = [s * w * h / total for s in sizes]
+
+    def worst(row, side):
+        s = sum(row)
+        if not s or not min(row):
+            return float("inf")
+        return max(max(row) * side * side / (s * s), s * s / (side * side * min(row)))
+
+    rects = []
+    i = 0
+    while i < len(areas):
+        side = min(w, h)
+        row = [areas[i]]
+        i += 1
+        while i < len(areas) and worst(row + [areas[i]], side) <= worst(row, side):
+            row.append(areas[i])
+            i += 1
+        s = sum(row)
+        if w >= h:
+            col_w = s / h if h else 0
+            cy = y
+            for a in row:
+                rh = a / col_w if col_w else 0
+                rects.append((x, cy, col_w, rh))
+                cy += rh
+            x, w = x + col_w, w - col_w
+        else:
+            row_h = s / w if w else 0
+            cx = x
+            for a in row:
+                rw = a / row_h if row_h else 0
+                rects.append((cx, y, rw, row_h))
+                cx += rw
+            y, h = y + row_h, h - row_h
+    return rects
+
+
+class Storage_F(Function):
+    def __init__(self, index_path="file_index.db"):
+        super().__init__()
+        self.scanner = None
+        self.index_path = index_path
+        self.index = None
+        self.duplicates = None
+        self.archiver = None
+        self.tree = None
+
+    def get_index(self):
+        if self.index is None:
+            self.index = FileIndex(self.index_path)
+        return self.index
+
+    @timed
+    def find_huge_files(self, start_path, size_mb_threshold=500, on_match=None, top_k=None, workers=8, incremental=True):
+        """
+        Finds files larger than threshold (MB).
+        `on_match(path, size_mb)` is called from worker threads as files are found.
+        With `incremental`, unchanged directories are answered from the file index.
+        """
+        start_path = normpath(start_path)
+        self.log(f"Scanning for files larger than {size_mb_threshold}MB in {start_path}...")
+        threshold_bytes = size_mb_threshold * 1024 * 1024
+        index = None
+        if incremental:
+            try:
+                index = self.get_index()
+            except sqlite3.Error as e:
+                self.log(f"File index unavailable: {e}")
+            if index is not None and threshold_bytes < index.min_size:
+                index = None
+        self.scanner = FileScanner(start_path, threshold_bytes, workers, top_k, index)
+        callback = (lambda path, size: on_match(path, size / (1024*1024))) if on_match else None
+        huge_files = [(path, size / (1024*1024)) for path, size in self.scanner.run(callback)]
+
+        p = self.scanner.progress()
+        state = "cancelled" if p["cancelled"] else "complete"
+        self.log(f"Scan {state}. Found {len(huge_files)} files. "
+                 f"({p['files']} files in {p['dirs']} dirs, {p['dirs_from_index']} dirs unchanged, "
+                 f"{p['files_per_s']:.0f} files/s, {p['elapsed']:.1f}s)")
+        return huge_files
+
+    @timed
+    def find_duplicates(self, start_path, min_size_mb=1, io_concurrency=4):
+        """Finds groups of identical files of at least `min_size_mb`."""
+        start_path = normpath(start_path)
+        self.log(f"Searching for duplicate files in {start_path} (I/O concurrency {io_concurrency})...")
+        self.duplicates = DuplicateFinder(start_path, int(min_size_mb * 1024 * 1024), io_concurrency)
+        groups = self.duplicates.run()
+        st = self.duplicates.stats
+        self.log(f"Duplicate search {'cancelled' if st['cancelled'] else 'complete'}. {st['groups']} groups, "
+                 f"{st['reclaimable_bytes'] / (1024**2):.0f} MB reclaimable. "
+                 f"Read {st['bytes_read'] / (1024**2):.0f} MB of {st['bytes_scanned'] / (1024**2):.0f} MB scanned.")
+        return groups
+
+    @timed
+    def aggregate_sizes(self, start_path):
+        """Builds a DirectoryTree of cumulative sizes under `start_path`."""
+        self.log(f"Aggregating directory sizes in {start_path}...")
+        self.tree = DirectoryTree(start_path)
+        self.tree.build()
+        self.log(f"Aggregated {self.tree.dirs} dirs / {self.tree.files} files "
+                 f"({self.tree.bytes[0] / (1024**3):.1f} GB) in {self.tree.elapsed:.1f}s.")
+        return self.tree
+
+    @timed
+    def largest_files(self, path, limit=50):
+        """Largest previously indexed files under `path` as [(path, size_mb)], without touching the disk."""
+        return [(fpath, size / (1024*1024)) for fpath, size in self.get_index().largest_under(normpath(path), limit)]
+
+    def cancel_scan(self):
+        if self.scanner:
+            self.scanner.cancel()
+        if self.duplicates:
+            self.duplicates.cancel()
+        if self.tree:
+            self.tree.cancel()
+
+    def scan_progress(self):
+        return self.scanner.progress() if self.scanner else None
+
+    def get_archiver(self):
+        if self.archiver is None:
+            self.archiver = ArchiveEngine()
+        return self.archiver
+
+    @timed
+    def zip_item(self, path, method="deflate", delete_source=True):
+        """Zips a file or folder. The source is only removed after every CRC in the archive verifies."""
+        self.log(f"Zipping item: {path}")
+        try:
+            res = self.get_archiver().archive(path, method, delete_source)
+            self.log(f"Created archive: {res['archive']} ({res['bytes_in'] / (1024*1024):.0f} MB -> "
+                     f"{res['bytes_out'] / (1024*1024):.0f} MB, {res['mb_per_s']:.0f} MB/s, CRC verified)")
+            return f"Created {res['archive']}"
         except Exception as e:
             self.log(f"Zip Error: {e}")
-            return f"Zip Error: {e}"
+            return ErrorResult(f"Zip Error: {e}")
+
+    @timed
+    def zip_items(self, paths, method="deflate", delete_source=True, on_done=None):
+        """Zips a batch of paths (e.g. scan results) through one bounded worker pool."""
+        self.log(f"Zipping {len(paths)} items ({method})...")
+        start = perf_counter()
+        results = self.get_archiver().archive_many(paths, method, delete_source, on_done)
+        ok = [r for r in results.values() if "error" not in r]
+        for p, r in results.items():
+            if "error" in r:
+                self.log(f"Zip Error ({p}): {r['error']}")
+        saved = sum(r["bytes_in"] - r["bytes_out"] for r in ok)
+        self.log(f"Zipped {len(ok)}/{len(paths)} items in {perf_counter() - start:.1f}s, "
+                 f"saved {saved / (1024*1024):.0f} MB.")
+        return results
 
+    @timed
     def optimize_ntfs(self):
         """Disables NTFS Last Access Update and 8.3 Name Creation to speed up I/O."""
         self.log("Applying NTFS Optimizations...")
-        try:
-            key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SYSTEM\CurrentControlSet\Control\FileSystem", 0, winreg.KEY_SET_VALUE)
-
-            winreg.SetValueEx(key, "NtfsDisableLastAccessUpdate", 0, winreg.REG_DWORD, 1)
-
-            winreg.SetValueEx(key, "NtfsDisable8dot3NameCreation", 0, winreg.REG_DWORD, 1)
-            winreg.CloseKey(key)
-            self.log("Registry: NtfsDisableLastAccessUpdate=1, NtfsDisable8dot3NameCreation=1")
-            return "NTFS Optimizations Applied (Disable Last Access + 8.3 Names)"
-        except Exception as e:
-            self.log(f"Error optimizing NTFS: {e}")
-            return f"Error optimizing NTFS: {e}"
+        res = tweak_engine.apply("NTFS")
+        if res["error"]:
+            self.log(f"Error optimizing NTFS: {res['error']}")
+            return ErrorResult(f"Error optimizing NTFS: {res['error']}")
+        return describe_tweak(res, "NTFS Optimizations Applied (Disable Last Access + 8.3 Names)", self.log)
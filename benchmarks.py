@@ -0,0 +1,504 @@
+"""
+Backend micro-benchmarks on deterministic synthetic fixtures.
+
+    python benchmarks.py                              # run, print, write bench_results.json
+    python benchmarks.py --save-baseline              # also store as bench_baseline.json
+    python benchmarks.py --baseline bench_baseline.json --threshold 0.2
+
+Each case reports median/min wall time, CPU time (own and of reaped children), peak
+RSS growth, I/O syscalls and context switches. With --baseline the exit code is 1 when any case got slower than
+the threshold allows.
+"""
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from collections import namedtuple
+from json import dump, load
+from os import makedirs, remove, getcwd, chdir, chmod
+from os.path import join, exists, abspath, realpath
+from platform import platform, python_version
+from random import Random
+from shutil import rmtree, copy
+from statistics import median
+from subprocess import run, Popen, PIPE, DEVNULL
+from tempfile import mkdtemp
+from threading import Thread, Event
+from time import perf_counter, process_time, time, sleep
+import sys
+
+import psutil
+
+import backend
+
+
+# --- Fixtures ---
+
+def make_tree(root, depth=4, fanout=6, files_per_dir=20, huge_every=50, huge_mb=600, seed=1):
+    """
+    Directory tree of `fanout`^depth folders. Every `huge_every`-th file is a sparse
+    file of `huge_mb` MB, so the scanner sees big files without the disk paying for them.
+    """
+    rng = Random(seed)
+    count = 0
+    stack = [(root, 0)]
+    while stack:
+        path, level = stack.pop()
+        makedirs(path, exist_ok=True)
+        for i in range(files_per_dir):
+            count += 1
+            with open(join(path, f"f{i}.bin"), "wb") as f:
+                if count % huge_every == 0:
+                    f.truncate(huge_mb * 1024 * 1024)
+                else:
+                    f.write(b"x" * rng.randint(0, 4096))
+        if level < depth:
+            stack.extend((join(path, f"d{i}"), level + 1) for i in range(fanout))
+    return count
+
+
+WORDS = ("process memory cache kernel thread scheduler buffer page index archive "
+         "system registry priority affinity monitor scan file value key throttle").split()
+
+
+def make_payload(path, size_mb, compressible, seed=2):
+    """Writes `size_mb` MB of word text (compressible) or random bytes (incompressible)."""
+    rng = Random(seed)
+    remaining = size_mb * 1024 * 1024
+    with open(path, "wb") as f:
+        while remaining > 0:
+            n = min(remaining, 1024 * 1024)
+            if compressible:
+                text = " ".join(rng.choice(WORDS) for _ in range(n // 6)).encode()
+                chunk = (text * (n // max(len(text), 1) + 1))[:n]
+            else:
+                chunk = rng.randbytes(n)
+            f.write(chunk)
+            remaining -= n
+    return path
+
+
+def make_fake_smi(path, gpus=2):
+    """
+    Executable stand-in for nvidia-smi: prints one CSV row per GPU for --query-gpu,
+    once, or every -lms milliseconds like the real tool. The last GPU has no power sensor.
+    """
+    rows = [f"{i}, Fake GPU {i}, {30 + i}, {1024 * (i + 1)}, 8192, {8192 - 1024 * (i + 1)}, {50 + i}, "
+            + ("[N/A]" if i == gpus - 1 else f"{100.5 + i}") for i in range(gpus)]
+    with open(path, "w") as f:
+        f.write(f"#!{sys.executable}\n"
+                "import sys, time\n"
+                f"rows = {rows!r}\n"
+                "period = next((int(a[5:]) for a in sys.argv if a.startswith('-lms=')), None)\n"
+                "while True:\n"
+                "    sys.stdout.write('\\n'.join(rows) + '\\n')\n"
+                "    sys.stdout.flush()\n"
+                "    if period is None:\n"
+                "        break\n"
+                "    time.sleep(period / 1000)\n")
+    chmod(path, 0o755)
+    return path
+
+
+def make_tweak_profile(n=200, keys=20):
+    """`n` DWORD entries spread over `keys` registry keys, plus a MemoryRegistry holding every key empty."""
+    paths = [f"HKLM\\SOFTWARE\\Bench\\Key{k}" for k in range(keys)]
+    profile = [{"key": paths[i % keys], "name": f"Value{i}", "type": "REG_DWORD", "value": i} for i in range(n)]
+    return profile, backend.MemoryRegistry({p: {} for p in paths})
+
+
+def spawn_gpu_query(smi):
+    """What GPUtil.getGPUs() does on every call: fork nvidia-smi once and parse its CSV."""
+    out = run([smi, f"--query-gpu={','.join(backend.GPUSampler.FIELDS)}", "--format=csv,noheader,nounits"],
+              stdout=PIPE, stderr=DEVNULL, check=True).stdout.decode()
+    return [[p.strip() for p in line.split(",")] for line in out.splitlines() if line.strip()]
+
+
+FakeMem = namedtuple("FakeMem", "rss vms shared")
+
+
+class FakeProcess:
+    """The subset of psutil.Process the backend reads, backed by generated values."""
+
+    table = {}
+
+    def __init__(self, pid):
+        if pid not in self.table:
+            raise psutil.NoSuchProcess(pid)
+        self.pid = pid
+        self._name, self._rss, self._ppid, self._created = self.table[pid]
+
+    @contextmanager
+    def oneshot(self):
+        yield
+
+    def name(self):
+        return self._name
+
+    def create_time(self):
+        return self._created
+
+    def ppid(self):
+        return self._ppid
+
+    def memory_info(self):
+        return FakeMem(self._rss, self._rss * 2, self._rss // 4)
+
+    def cpu_percent(self, interval=None):
+        return (self.pid * 7919 % 1000) / 10.0
+
+    def exe(self):
+        return f"/usr/bin/{self._name}"
+
+    def cmdline(self):
+        return [self.exe(), "--worker", str(self.pid)]
+
+    def username(self):
+        return "bench"
+
+    def parent(self):
+        return FakeProcess(self._ppid) if self._ppid in self.table else None
+
+    def nice(self, value=None):
+        return 0
+
+    def terminate(self):
+        pass
+
+
+def fake_process_table(n=10000, seed=3):
+    rng = Random(seed)
+    names = [f"{w}{i % 97}.exe" for i, w in enumerate(rng.choice(WORDS) for _ in range(500))]
+    FakeProcess.table = {
+        pid: (rng.choice(names), rng.randint(1, 2048) * 1024 * 1024, max(1, pid - rng.randint(1, 50)), 1e9 + pid)
+        for pid in range(1, n + 1)
+    }
+    return FakeProcess.table
+
+
+@contextmanager
+def fake_psutil(n):
+    """Serves a generated process table to the backend through its psutil names."""
+    fake_process_table(n)
+    saved = backend.pids, backend.Process, backend.process_table
+    backend.pids = lambda: list(FakeProcess.table)
+    backend.Process = FakeProcess
+    # no minimum interval: the cases measure the scan itself
+    backend.process_table = backend.ProcessTable(min_interval_ms=0)
+    try:
+        yield backend.process_table
+    finally:
+        backend.pids, backend.Process, backend.process_table = saved
+
+
+# --- Measurement ---
+
+class Measure:
+    """Wall/CPU time, peak RSS growth (sampled), I/O syscalls and context switches of one call."""
+
+    def __init__(self, sample_interval=0.005):
+        self.proc = psutil.Process()
+        self.sample_interval = sample_interval
+
+    def _io(self):
+        try:
+            io = self.proc.io_counters()
+            return io.read_count + io.write_count
+        except (AttributeError, psutil.AccessDenied):
+            return None
+
+    def _child_cpu(self):
+        # reaped children only, which covers spawned tools like nvidia-smi
+        times = self.proc.cpu_times()
+        return getattr(times, "children_user", 0.0) + getattr(times, "children_system", 0.0)
+
+    def run(self, fn):
+        start_rss = self.proc.memory_info().rss
+        peak = [start_rss]
+        done = Event()
+
+        def sampler():
+            while not done.is_set():
+                peak[0] = max(peak[0], self.proc.memory_info().rss)
+                sleep(self.sample_interval)
+
+        watcher = Thread(target=sampler, daemon=True)
+        watcher.start()
+        io0, ctx0 = self._io(), sum(self.proc.num_ctx_switches())
+        cpu0, child0, wall0 = process_time(), self._child_cpu(), perf_counter()
+        try:
+            fn()
+        finally:
+            wall, cpu = perf_counter() - wall0, process_time() - cpu0
+            done.set()
+            watcher.join()
+        io1, ctx1 = self._io(), sum(self.proc.num_ctx_switches())
+        return {
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "child_cpu_s": self._child_cpu() - child0,
+            "peak_rss_mb": max(0, max(peak[0], self.proc.memory_info().rss) - start_rss) / (1024 * 1024),
+            "io_syscalls": io1 - io0 if io0 is not None else None,
+            "ctx_switches": ctx1 - ctx0
+        }
+
+
+def summarize(samples):
+    out = {"repeats": len(samples)}
+    for key in samples[0]:
+        values = [s[key] for s in samples if s[key] is not None]
+        out[key] = median(values) if values else None
+    out["wall_min_s"] = min(s["wall_s"] for s in samples)
+    return out
+
+
+# --- Cases ---
+
+def build_cases(args, work):
+    """Returns {name: (setup, fn, teardown)}; setup/teardown run outside the timed region."""
+    storage = backend.Storage_F(index_path=join(work, "bench_index.db"))
+    tree_root = join(work, "tree")
+    cases = {}
+
+    def noop():
+        pass
+
+    cases["find_huge_files"] = (noop, lambda: storage.find_huge_files(tree_root, 100, incremental=False), noop)
+    cases["find_huge_files_incremental"] = (lambda: storage.find_huge_files(tree_root, 100, incremental=True),
+                                            lambda: storage.find_huge_files(tree_root, 100, incremental=True), noop)
+
+    state = {}
+
+    def with_procs(fn):
+        def setup():
+            state["ctx"] = fake_psutil(args.procs)
+            state["ctx"].__enter__()
+
+        def teardown():
+            state.pop("ctx").__exit__(None, None, None)
+        return setup, fn, teardown
+
+    cases["get_top_processes"] = with_procs(lambda: backend.get_top_processes(15, max_age_ms=0))
+    cases["smart_ram_optimization"] = with_procs(
+        lambda: backend.RAM_F().smart_ram_optimization(["re:monitor.*", "cache1.exe"], dry_run=True, min_rss_mb=512))
+
+    sweep = {}
+
+    def sweep_setup():
+        proc_setup()
+        monitor = backend.ProcessMonitor_F()
+        monitor.store.listeners.clear()
+        rules = [f"blocked{i}.exe" for i in range(1000)] + ["re:thread9.*", "cmd:--never-matches"]
+        monitor.black_rules = backend.RuleSet(rules)
+        monitor.table = backend.process_table
+        sweep["monitor"] = monitor
+
+    def sweep_teardown():
+        sweep.pop("monitor")
+        proc_teardown()
+
+    # only the sweep is timed: loading the config and compiling 1000 rules happen once per monitor
+    proc_setup, _, proc_teardown = with_procs(None)
+    cases["monitor_sweep"] = (sweep_setup, lambda: sweep["monitor"]._sweep(), sweep_teardown)
+
+    poll = {}
+
+    def poll_setup():
+        poll["ctx"] = fake_psutil(5000)
+        poll["ctx"].__enter__()
+        monitor = backend.ProcessMonitor_F()
+        monitor.store.listeners.clear()
+        monitor.black_rules = backend.RuleSet([f"blocked{i}.exe" for i in range(100)])
+        monitor.table = backend.process_table
+        # the first pass opens every pid; the timed steady-state pass only diffs the pid list
+        monitor._poll()
+        poll["monitor"] = monitor
+
+    def poll_teardown():
+        poll.pop("monitor")
+        poll.pop("ctx").__exit__(None, None, None)
+
+    cases["monitor_poll_5k"] = (poll_setup, lambda: poll["monitor"]._poll(), poll_teardown)
+
+    gov = {}
+
+    def governor_setup():
+        # 5000 processes, 650 of them over a threshold and already tracked; nothing escalates
+        rows = [(pid, 1000.0 + pid, (pid % 400) * 1024 * 1024, 95.0 if pid % 100 == 0 else pid % 50, 1,
+                 f"proc{pid}.exe", None) for pid in range(100, 5100)]
+        gov["snap"] = backend.ProcessSnapshot(0.0, rows, 0.0)
+        gov["governor"] = backend.ResourceGovernor(cpu_threshold=90, rss_threshold_mb=350, sustain_seconds=3600)
+        gov["governor"].tick(gov["snap"], now=0.0)
+
+    cases["governor_tick_5k"] = (governor_setup, lambda: gov["governor"].tick(gov["snap"], now=1.0), noop)
+
+    lists = {}
+
+    def import_setup():
+        monitor = backend.ProcessMonitor_F()
+        monitor.store.save_delay = 60
+        lists["monitor"] = monitor
+
+    def import_and_save():
+        lists["monitor"].import_list("blacklist", join(work, "blacklist_10k.txt"))
+        lists["monitor"].store.flush()
+
+    def import_teardown():
+        lists.pop("monitor")
+        remove("process_config.json")
+
+    # one import of 10k entries: dedup, one rule recompile and one atomic save
+    cases["list_import_10k"] = (import_setup, import_and_save, import_teardown)
+
+    victim = join(work, "benchvictim")
+    live = {}
+
+    def kill_setup():
+        monitor = backend.ProcessMonitor_F()
+        monitor.store.listeners.clear()
+        monitor.black_rules = backend.RuleSet(["benchvictim*"])
+        monitor.start_monitoring()
+        # let the engine start and finish its first sweep
+        sleep(0.5)
+        live["monitor"] = monitor
+
+    def spawn_and_wait():
+        live["proc"] = Popen([victim, "-c", "import time; time.sleep(30)"], stdout=DEVNULL, stderr=DEVNULL)
+        live["proc"].wait(timeout=30)
+
+    def kill_teardown():
+        live.pop("monitor").stop_monitoring()
+        proc = live.pop("proc", None)
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+    # wall time is spawn-to-kill: the process only exits when the monitor terminates it
+    cases["monitor_spawn_to_kill"] = (kill_setup, spawn_and_wait, kill_teardown)
+
+    smi = join(work, "nvidia-smi")
+    gpu = {}
+
+    def gpu_setup():
+        sampler = backend.GPUSampler(smi_path=smi, interval=0.1, use_nvml=False)
+        sampler.start(wait=5.0)
+        gpu["saved"], backend.gpu_telemetry = backend.gpu_telemetry, sampler
+
+    def gpu_teardown():
+        backend.gpu_telemetry.stop()
+        backend.gpu_telemetry = gpu.pop("saved")
+
+    # streamed sampler read vs. the per-call fork GPUtil does
+    cases["gpu_info_sampler"] = (gpu_setup, lambda: backend.GPU_F().get_gpu_info(), gpu_teardown)
+    cases["gpu_info_spawn"] = (noop, lambda: spawn_gpu_query(smi), noop)
+
+    tweaks = {}
+
+    def tweak_setup():
+        profile, registry = make_tweak_profile(200)
+        tweaks["engine"] = backend.TweakEngine(registry, {"bench": profile}, undo_path=None)
+
+    # first apply writes all 200 values, opening each of the 20 keys once
+    cases["tweak_profile_200"] = (tweak_setup, lambda: tweaks["engine"].apply("bench"), noop)
+
+    for kind in ("compressible", "incompressible"):
+        payload = join(work, f"{kind}.dat")
+        cases[f"zip_item_{kind}"] = (
+            noop,
+            lambda p=payload: storage.zip_item(p, delete_source=False),
+            lambda p=payload: exists(f"{p}.zip") and remove(f"{p}.zip"))
+    return cases
+
+
+def build_fixtures(args, work):
+    start = perf_counter()
+    files = make_tree(join(work, "tree"), args.depth, args.fanout, args.files)
+    make_payload(join(work, "compressible.dat"), args.payload_mb, True)
+    make_payload(join(work, "incompressible.dat"), args.payload_mb, False)
+    make_fake_smi(join(work, "nvidia-smi"))
+    with open(join(work, "blacklist_10k.txt"), "w") as f:
+        f.writelines(f"blocked{i}.exe\n" for i in range(10000))
+    # a copy of the interpreter under a name only the spawn-to-kill case blacklists
+    copy(realpath(sys.executable), join(work, "benchvictim"))
+    print(f"Fixtures: {files:,} files, 2 x {args.payload_mb} MB payloads, {args.procs:,} fake processes "
+          f"({perf_counter() - start:.1f}s)")
+
+
+def compare(results, baseline, threshold):
+    """Returns a list of (case, baseline_s, current_s, ratio) that regressed beyond `threshold`."""
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        cur = results.get(name)
+        if cur is None or not base.get("wall_s"):
+            continue
+        ratio = cur["wall_s"] / base["wall_s"]
+        cur["vs_baseline"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append((name, base["wall_s"], cur["wall_s"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = ArgumentParser(description="Backend micro-benchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=6)
+    parser.add_argument("--files", type=int, default=20, help="files per directory")
+    parser.add_argument("--procs", type=int, default=10000, help="fake process table size")
+    parser.add_argument("--payload-mb", type=int, default=32)
+    parser.add_argument("--only", nargs="*", help="run only these cases")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="also write results to bench_baseline.json")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown vs. baseline (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    out_path, baseline_path = abspath(args.out), abspath(args.baseline) if args.baseline else None
+    cwd, work = getcwd(), mkdtemp(prefix="optimise-bench-")
+    # the backend writes its config/state files relative to the working directory
+    chdir(work)
+    try:
+        build_fixtures(args, work)
+        cases = build_cases(args, work)
+        measure = Measure()
+        results = {}
+        for name, (setup, fn, teardown) in cases.items():
+            if args.only and name not in args.only:
+                continue
+            samples = []
+            for _ in range(args.repeat):
+                setup()
+                try:
+                    samples.append(measure.run(fn))
+                finally:
+                    teardown()
+            results[name] = summarize(samples)
+            r = results[name]
+            print(f"{name:30s} {r['wall_s'] * 1000:9.2f} ms (min {r['wall_min_s'] * 1000:.2f})  cpu {r['cpu_s'] * 1000:9.2f} ms  "
+                  f"child cpu {r['child_cpu_s'] * 1000:7.2f} ms  rss +{r['peak_rss_mb']:.1f} MB  io {r['io_syscalls']}  ctx {r['ctx_switches']}")
+    finally:
+        chdir(cwd)
+        rmtree(work, ignore_errors=True)
+
+    report = {
+        "meta": {"time": time(), "python": python_version(), "platform": platform(),
+                 "cpus": psutil.cpu_count(), "args": vars(args)},
+        "results": results
+    }
+    regressions = []
+    if baseline_path:
+        with open(baseline_path) as f:
+            regressions = compare(results, load(f), args.threshold)
+        for name, base, cur, ratio in regressions:
+            print(f"REGRESSION {name}: {base * 1000:.2f} ms -> {cur * 1000:.2f} ms ({(ratio - 1) * 100:+.0f}%)")
+        report["regressions"] = [r[0] for r in regressions]
+
+    with open(out_path, "w") as f:
+        dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(join(cwd, "bench_baseline.json"), "w") as f:
+            dump(report, f, indent=2)
+    print(f"Results written to {out_path}" + (f", {len(regressions)} regression(s)" if baseline_path else ""))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
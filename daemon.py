@@ -0,0 +1,690 @@
+"""
+Headless OPTIMISE daemon: process monitor, governor, samplers and scheduled
+optimizations without the window, controlled over a local JSON-RPC 2.0 API.
+
+    python daemon.py                          # serve in the foreground
+    python daemon.py --monitor --governor     # also start enforcement on launch
+    python daemon.py --optimize-every 30      # smart RAM optimization every 30 minutes
+    python daemon.py --call daemon.stats      # query a running daemon
+    python daemon.py --call monitor.add list_name=blacklist names='["miner.exe"]'
+
+The API listens on a Unix domain socket (Linux/macOS) or a named pipe (Windows).
+Messages use multiprocessing.connection framing: a 4-byte big-endian length
+followed by one UTF-8 JSON-RPC request, batch or response. The GUI attaches to a
+running daemon through DaemonClient and then only renders what the daemon reports;
+without one it runs everything in-process. Attached, the only work left in the
+GUI process is what acts on the user's own session: storage scans, duplicate
+search and zipping (the NTFS tweak still goes to the daemon), the system
+benchmark and launching the GPU overclocking tool. None of that needs elevation.
+Backend timings are only recorded when exported for Prometheus, opt-in like the
+GUI's --metrics: --metrics-port 9464 serves http://127.0.0.1:9464/metrics and
+--metrics-file optimise_metrics.prom rewrites a text file.
+"""
+from argparse import ArgumentParser
+from inspect import signature
+from json import loads, dumps
+from multiprocessing.connection import Listener, Client
+from os import getpid, remove, chmod, environ
+from os.path import join, exists
+from tempfile import gettempdir
+from threading import Thread, Event, Lock
+from time import time, sleep, monotonic
+from types import SimpleNamespace
+import signal
+import sys
+
+import numpy as np
+import psutil
+
+import backend
+
+if sys.platform == "win32":
+    DEFAULT_ADDRESS, FAMILY = r"\\.\pipe\optimise", "AF_PIPE"
+else:
+    DEFAULT_ADDRESS, FAMILY = join(environ.get("XDG_RUNTIME_DIR") or gettempdir(), "optimise.sock"), "AF_UNIX"
+
+PARSE_ERROR, INVALID_REQUEST, METHOD_NOT_FOUND, INVALID_PARAMS, SERVER_ERROR = -32700, -32600, -32601, -32602, -32000
+
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+def encode(message):
+    return dumps(message, default=_json_default).encode("utf-8")
+
+
+class DaemonError(RuntimeError):
+    def __init__(self, code, message, data=None):
+        super().__init__(f"{message} ({code})")
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class Daemon(backend.Function):
+    """
+    Owns the long-running services and serves them over JSON-RPC. Every method in
+    `self.methods` takes keyword params and returns something JSON-serialisable.
+    The daemon's own RSS and CPU are sampled every `footprint_interval` seconds.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, telemetry_interval=2.0, optimize_every=None, footprint_interval=10.0,
+                 metrics_port=None, metrics_file=None, restrict_cpus=None):
+        super().__init__()
+        self.address = address
+        self.optimize_every = optimize_every
+        self.footprint_interval = footprint_interval
+        self.started = time()
+        self.requests = 0
+        self.errors = 0
+        self.clients = 0
+        self.last_optimization = None
+        self._stop = Event()
+        self._listener = None
+        self._me = psutil.Process()
+        self.footprint = backend.RingBuffer(360, 3)  # rss, cpu seconds, threads
+        backend.telemetry.interval = telemetry_interval
+        self.monitor = backend.ProcessMonitor_F()
+        # the governor and core reservation leave whitelisted processes alone
+        backend.governor.exempt = backend.affinity.exempt = lambda: self.monitor.white_rules
+        if restrict_cpus:
+            backend.governor.restrict_cpus = restrict_cpus
+        self.history = backend.MetricsHistory_F(backend.telemetry)
+        self.ram = backend.RAM_F()
+        self.tweaks = backend.RegistryTweaks_F()
+        self.focus = backend.FocusMode_F()
+        self.gpu = backend.GPU_F()
+        self.power = backend.Overclocking_F()
+        self.storage = backend.Storage_F()
+        self.exporter = backend.MetricsExporter(port=metrics_port or None, path=metrics_file or None) \
+            if metrics_port or metrics_file else None
+        mon, gov, aff, runner = self.monitor, backend.governor, backend.affinity, backend.command_runner
+        self.methods = {
+            "ping": lambda: {"pid": getpid(), "uptime": time() - self.started},
+            "shutdown": self.shutdown,
+            "daemon.stats": self.stats,
+            "monitor.state": self.monitor_state,
+            "monitor.start": mon.start_monitoring,
+            "monitor.stop": mon.stop_monitoring,
+            "monitor.stats": mon.get_stats,
+            "monitor.rules": mon.get_rule_stats,
+            "monitor.add": lambda list_name, names: mon.add_many(list_name, names),
+            "monitor.remove": lambda list_name, names: mon.remove_many(list_name, names),
+            "monitor.import": lambda list_name, path: mon.import_list(list_name, path),
+            "governor.start": gov.start,
+            "governor.stop": gov.stop,
+            "governor.stats": gov.stats,
+            "governor.decisions": lambda limit=50: list(gov.decisions)[-limit:],
+            "affinity.start": lambda baseline_seconds=5.0: aff.start(baseline_seconds),
+            "affinity.stop": aff.stop,
+            "affinity.report": self.affinity_state,
+            "scheduler.rules": lambda: backend.scheduler_policy.rules,
+            "scheduler.set_rule": lambda match, **settings: backend.scheduler_policy.set_rule(match, **settings),
+            "scheduler.remove_rule": lambda match: backend.scheduler_policy.remove_rule(match),
+            "scheduler.stats": backend.scheduler_policy.stats,
+            "telemetry.latest": lambda series: backend.telemetry.latest(series),
+            "telemetry.stats": backend.telemetry.stats,
+            "system.ram": self.ram_info,
+            "system.cpu": backend.get_cpu_info,
+            "gpu.info": self.gpu.get_gpu_info,
+            "gpu.optimize": self.gpu.optimize_gpu_settings,
+            "tweaks.apply": lambda name: self.tweaks.apply_tweak(name),
+            "tweaks.undo": self.tweaks.undo_last,
+            "focus.toggle": lambda enable=True: self.focus.toggle_focus_mode(enable),
+            "history.summary": lambda name, seconds=86400: self.history.summary(name, seconds),
+            "metrics.stats": backend.metrics.stats,
+            "metrics.render": backend.metrics.render,
+            "processes.top": lambda limit=10: backend.get_top_processes(limit),
+            "processes.boost": lambda pid, persist=False: self.ram.set_high_priority(pid, persist),
+            "processes.kill": lambda pid: self.ram.kill_process(pid),
+            "ram.optimize": lambda dry_run=False, min_rss_mb=50: self.optimize(dry_run, min_rss_mb),
+            "ram.system_cache": self.ram.optimize_system_cache,
+            "power.apply": lambda name: self.power.apply_power_profile(name),
+            "power.restore": self.power.restore_power_state,
+            "power.state": self.power.get_power_state,
+            "power.high_performance": self.power.set_power_plan_high_performance,
+            "power.unpark": self.power.unpark_cpu_cores,
+            "storage.optimize_ntfs": self.storage.optimize_ntfs,
+            "commands.list": backend.get_optimisation_commands,
+            "commands.submit": self.submit_command,
+            "commands.job": self.command_job,
+            "commands.cancel": lambda job_id: runner.cancel(job_id),
+            "commands.cancel_all": runner.cancel_all
+        }
+
+    # --- services ---
+
+    def monitor_state(self):
+        """Everything the process manager tab renders, in one round trip."""
+        mon, gov = self.monitor, backend.governor
+        return {"monitoring": mon.monitoring, "stats": mon.get_stats(),
+                "blacklist": mon.blacklist, "whitelist": mon.whitelist,
+                "black_hits": mon.black_rules.hits, "white_hits": mon.white_rules.hits,
+                "governor": {"running": gov.running, "cpu_threshold": gov.cpu_threshold,
+                             "sustain_seconds": gov.sustain_seconds, "restrict_cpus": gov.restrict_cpus,
+                             "stats": gov.stats()}}
+
+    def affinity_state(self):
+        aff = backend.affinity
+        return {"running": aff.running, "reserved": aff.reserved, "others": aff.others,
+                "report": aff.report() if aff.running else None}
+
+    def ram_info(self):
+        mem = backend.get_ram_info()
+        return mem._asdict() if mem is not None else None
+
+    def submit_command(self, command, timeout=None):
+        """Queues one of the built-in optimisation commands; the daemon is not a general-purpose shell."""
+        if command not in {cmd for _, cmd in backend.get_optimisation_commands()}:
+            raise DaemonError(INVALID_PARAMS, f"Not an optimisation command: {command}")
+        return self.command_job(backend.command_runner.submit(command, timeout)["id"])
+
+    def command_job(self, job_id, since=0):
+        """A job's state plus the output lines after the first `since` (None once the job is forgotten)."""
+        job = backend.command_runner.jobs.get(job_id)
+        if job is None:
+            return None
+        out = {k: v for k, v in job.items() if not k.startswith("_") and k != "output"}
+        new = min(job["lines"] - since, len(job["output"]))
+        out["output"] = list(job["output"])[-new:] if new > 0 else []
+        return out
+
+    def optimize(self, dry_run=False, min_rss_mb=50):
+        result = self.ram.smart_ram_optimization(list(self.monitor.whitelist), dry_run=dry_run, min_rss_mb=min_rss_mb)
+        self.last_optimization = time()
+        return result
+
+    def stats(self):
+        """Own footprint: current/peak RSS, CPU since start and over the sampled window."""
+        with self._me.oneshot():
+            rss, cpu, threads = self._me.memory_info().rss, sum(self._me.cpu_times()[:2]), self._me.num_threads()
+        uptime = time() - self.started
+        times, rows = self.footprint.history()
+        recent = None
+        if len(times) and time() > times[0]:
+            recent = (cpu - rows[0, 1]) / (time() - times[0]) * 100
+        return {"pid": getpid(), "uptime": uptime, "rss_mb": rss / (1024 * 1024),
+                "peak_rss_mb": max(rss, rows[:, 0].max() if len(rows) else 0) / (1024 * 1024),
+                "cpu_percent": cpu / uptime * 100 if uptime else 0.0, "recent_cpu_percent": recent,
+                "threads": threads, "requests": self.requests, "errors": self.errors, "clients": self.clients,
+                "telemetry": backend.telemetry.stats(), "last_optimization": self.last_optimization}
+
+    def _housekeeping(self):
+        next_optimization = monotonic() + self.optimize_every * 60 if self.optimize_every else None
+        while not self._stop.wait(self.footprint_interval):
+            try:
+                with self._me.oneshot():
+                    self.footprint.append(time(), (self._me.memory_info().rss, sum(self._me.cpu_times()[:2]),
+                                                   self._me.num_threads()))
+            except psutil.Error:
+                pass
+            if next_optimization and monotonic() >= next_optimization:
+                next_optimization = monotonic() + self.optimize_every * 60
+                try:
+                    self.optimize()
+                except Exception as e:
+                    self.log(f"Scheduled optimization failed: {e}")
+
+    # --- JSON-RPC ---
+
+    def handle(self, request):
+        """Returns the response dict for one request, or None for a notification."""
+        if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" or not isinstance(request.get("method"), str):
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": INVALID_REQUEST, "message": "Invalid request"}}
+        rid, notify = request.get("id"), "id" not in request
+        self.requests += 1
+        fn = self.methods.get(request["method"])
+        params = request.get("params") or {}
+        try:
+            if fn is None:
+                raise DaemonError(METHOD_NOT_FOUND, f"Method not found: {request['method']}")
+            args, kwargs = (params, {}) if isinstance(params, list) else ((), params)
+            try:
+                signature(fn).bind(*args, **kwargs)
+            except TypeError as e:
+                raise DaemonError(INVALID_PARAMS, str(e))
+            result = fn(*args, **kwargs)
+        except DaemonError as e:
+            self.errors += 1
+            return None if notify else {"jsonrpc": "2.0", "id": rid, "error": {"code": e.code, "message": e.message}}
+        except Exception as e:
+            self.errors += 1
+            self.log(f"{request['method']} failed: {e}")
+            return None if notify else {"jsonrpc": "2.0", "id": rid, "error": {"code": SERVER_ERROR, "message": str(e)}}
+        return None if notify else {"jsonrpc": "2.0", "id": rid, "result": result}
+
+    def _serve(self, conn):
+        self.clients += 1
+        try:
+            while not self._stop.is_set():
+                try:
+                    raw = conn.recv_bytes()
+                except (EOFError, OSError):
+                    break
+                try:
+                    message = loads(raw)
+                except ValueError:
+                    reply = {"jsonrpc": "2.0", "id": None, "error": {"code": PARSE_ERROR, "message": "Parse error"}}
+                else:
+                    if isinstance(message, list):
+                        reply = [r for r in map(self.handle, message) if r is not None] or None
+                    else:
+                        reply = self.handle(message)
+                if reply is not None:
+                    conn.send_bytes(encode(reply))
+        finally:
+            self.clients -= 1
+            conn.close()
+
+    def _claim_address(self):
+        """Refuses to start next to a live daemon; removes a stale socket left by a crash."""
+        if FAMILY != "AF_UNIX" or not exists(self.address):
+            return True
+        try:
+            Client(self.address, FAMILY).close()
+            return False
+        except OSError:
+            remove(self.address)
+            return True
+
+    def serve_forever(self, monitor=False, governor=False):
+        if not self._claim_address():
+            self.log(f"Another daemon is already listening on {self.address}.")
+            return 1
+        self._listener = Listener(self.address, FAMILY)
+        if FAMILY == "AF_UNIX":
+            chmod(self.address, 0o600)
+        backend.telemetry.start()
+        backend.gpu_telemetry.start(wait=0)
+        backend.scheduler_policy.start()
+        if self.exporter:
+            self.exporter.start()
+        if monitor:
+            self.monitor.start_monitoring()
+        if governor:
+            backend.governor.start()
+        Thread(target=self._housekeeping, daemon=True).start()
+        self.log(f"Listening on {self.address} (pid {getpid()}).")
+        while not self._stop.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._stop.is_set():
+                    break
+                continue
+            Thread(target=self._serve, args=(conn,), daemon=True).start()
+        self._cleanup()
+        return 0
+
+    def shutdown(self):
+        if self._stop.is_set():
+            return False
+        self._stop.set()
+        # accept() does not wake on close from another thread; connect once to release it
+        Thread(target=self._wake, daemon=True).start()
+        return True
+
+    def _wake(self):
+        sleep(0.05)
+        try:
+            Client(self.address, FAMILY).close()
+        except OSError:
+            pass
+
+    def _cleanup(self):
+        mon = self.monitor
+        mon.stop_monitoring()
+        if backend.governor.running:
+            backend.governor.stop()
+        if backend.affinity.running:
+            backend.affinity.stop()
+        backend.scheduler_policy.stop()
+        backend.telemetry.stop()
+        backend.gpu_telemetry.stop()
+        if self.exporter:
+            self.exporter.stop()
+        mon.store.flush_pending()
+        self._listener.close()
+        self.log("Daemon stopped.")
+
+
+class DaemonClient:
+    """Blocking JSON-RPC client; one connection, safe to share between threads."""
+
+    def __init__(self, address=DEFAULT_ADDRESS):
+        self.address = address
+        self._conn = Client(address, FAMILY)
+        self._ids = 0
+        self._lock = Lock()
+
+    def call(self, method, **params):
+        with self._lock:
+            self._ids += 1
+            request = {"jsonrpc": "2.0", "id": self._ids, "method": method, "params": params}
+            try:
+                self._conn.send_bytes(encode(request))
+                reply = loads(self._conn.recv_bytes())
+            except (EOFError, OSError):
+                # the daemon restarted; reconnect once and retry
+                self._conn = Client(self.address, FAMILY)
+                self._conn.send_bytes(encode(request))
+                reply = loads(self._conn.recv_bytes())
+        if "error" in reply:
+            err = reply["error"]
+            raise DaemonError(err["code"], err["message"], err.get("data"))
+        return reply["result"]
+
+    def close(self):
+        self._conn.close()
+
+
+def attach(address=DEFAULT_ADDRESS):
+    """Returns a DaemonClient for a running daemon, or None when there is none."""
+    try:
+        client = DaemonClient(address)
+        client.call("ping")
+        return client
+    except (OSError, EOFError, DaemonError):
+        return None
+
+
+class RemoteMonitor:
+    """
+    Stands in for ProcessMonitor_F in the GUI when a daemon is running. Reads come
+    from one cached `monitor.state` call so a tab render costs a single round trip.
+    """
+
+    def __init__(self, client, max_age=0.5):
+        self.client = client
+        self.max_age = max_age
+        self._state = None
+        self._fetched = 0.0
+        self.governor = RemoteGovernor(self)
+        self.affinity = RemoteAffinity(client)
+
+    def state(self):
+        if self._state is None or monotonic() - self._fetched > self.max_age:
+            self._state = self.client.call("monitor.state")
+            self._fetched = monotonic()
+        return self._state
+
+    def _changed(self, result):
+        self._state = None
+        return result
+
+    monitoring = property(lambda self: self.state()["monitoring"])
+    blacklist = property(lambda self: tuple(self.state()["blacklist"]))
+    whitelist = property(lambda self: tuple(self.state()["whitelist"]))
+    black_rules = property(lambda self: SimpleNamespace(hits=self.state()["black_hits"]))
+    white_rules = property(lambda self: SimpleNamespace(hits=self.state()["white_hits"]))
+
+    def get_stats(self):
+        return self.state()["stats"]
+
+    def start_monitoring(self):
+        return self._changed(self.client.call("monitor.start"))
+
+    def stop_monitoring(self):
+        return self._changed(self.client.call("monitor.stop"))
+
+    def add_to_blacklist(self, name):
+        return bool(self._changed(self.client.call("monitor.add", list_name="blacklist", names=[name])))
+
+    def remove_from_blacklist(self, name):
+        return bool(self._changed(self.client.call("monitor.remove", list_name="blacklist", names=[name])))
+
+    def add_to_whitelist(self, name):
+        return bool(self._changed(self.client.call("monitor.add", list_name="whitelist", names=[name])))
+
+    def remove_from_whitelist(self, name):
+        return bool(self._changed(self.client.call("monitor.remove", list_name="whitelist", names=[name])))
+
+    def import_list(self, list_name, path):
+        return self._changed(self.client.call("monitor.import", list_name=list_name, path=path))
+
+
+class RemoteGovernor:
+    def __init__(self, monitor):
+        self.monitor = monitor
+
+    running = property(lambda self: self.monitor.state()["governor"]["running"])
+    cpu_threshold = property(lambda self: self.monitor.state()["governor"]["cpu_threshold"])
+    sustain_seconds = property(lambda self: self.monitor.state()["governor"]["sustain_seconds"])
+
+    def stats(self):
+        return self.monitor.state()["governor"]["stats"]
+
+    def start(self):
+        self.monitor._changed(self.monitor.client.call("governor.start"))
+
+    def stop(self):
+        self.monitor._changed(self.monitor.client.call("governor.stop"))
+
+
+class RemoteAffinity:
+    def __init__(self, client):
+        self.client = client
+
+    running = property(lambda self: self.client.call("affinity.report")["running"])
+    reserved = property(lambda self: self.client.call("affinity.report")["reserved"])
+    others = property(lambda self: self.client.call("affinity.report")["others"])
+
+    def report(self):
+        return self.client.call("affinity.report")["report"]
+
+    def start(self, baseline_seconds=5.0):
+        return self.client.call("affinity.start", baseline_seconds=baseline_seconds)
+
+    def stop(self):
+        self.client.call("affinity.stop")
+
+
+class RemoteSystem:
+    """Stands in for the backend module's RAM/CPU/process readers; the daemon owns the samplers."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get_ram_info(self):
+        mem = self.client.call("system.ram")
+        return SimpleNamespace(**mem) if mem is not None else None
+
+    def get_cpu_info(self):
+        return self.client.call("system.cpu")
+
+    def get_top_processes(self, limit=10):
+        return self.client.call("processes.top", limit=limit)
+
+
+class RemoteRAM:
+    """RAM_F over RPC, so trimming, priority rules and kills run with the daemon's privileges."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def smart_ram_optimization(self, whitelist_names=None, dry_run=False, min_rss_mb=50):
+        # the daemon protects its own whitelist, which is the one the GUI edits through RemoteMonitor
+        return self.client.call("ram.optimize", dry_run=dry_run, min_rss_mb=min_rss_mb)
+
+    def set_high_priority(self, pid, persist=False):
+        return self.client.call("processes.boost", pid=pid, persist=persist)
+
+    def kill_process(self, pid):
+        return self.client.call("processes.kill", pid=pid)
+
+    def optimize_system_cache(self):
+        return self.client.call("ram.system_cache")
+
+
+class RemoteTweaks:
+    """RegistryTweaks_F and FocusMode_F over RPC; the daemon keeps the undo stack."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def apply_tweak(self, tweak_name):
+        return self.client.call("tweaks.apply", name=tweak_name)
+
+    def undo_last(self):
+        return self.client.call("tweaks.undo")
+
+    def toggle_focus_mode(self, enable=True):
+        return self.client.call("focus.toggle", enable=enable)
+
+
+class RemoteGPU:
+    """GPU_F with readings from the daemon's sampler. Launching tools stays in the user's session."""
+
+    def __init__(self, client):
+        self.client = client
+        self.local = backend.GPU_F()
+
+    def get_gpu_info(self):
+        return self.client.call("gpu.info")
+
+    def optimize_gpu_settings(self):
+        return self.client.call("gpu.optimize")
+
+    def launch_overclock_tool(self):
+        return self.local.launch_overclock_tool()
+
+
+class RemotePower:
+    """Overclocking_F over RPC: power profiles, plans and core parking need the daemon's privileges."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def apply_power_profile(self, name):
+        return self.client.call("power.apply", name=name)
+
+    def restore_power_state(self):
+        return self.client.call("power.restore")
+
+    def get_power_state(self):
+        return self.client.call("power.state")
+
+    def set_power_plan_high_performance(self):
+        return self.client.call("power.high_performance")
+
+    def unpark_cpu_cores(self):
+        return self.client.call("power.unpark")
+
+
+class RemoteStorage:
+    """
+    Storage_F whose NTFS tweak runs in the daemon. Scans, duplicate search and
+    zipping work on the user's own files and stay in the GUI process.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.local = backend.Storage_F()
+
+    def optimize_ntfs(self):
+        return self.client.call("storage.optimize_ntfs")
+
+    def __getattr__(self, name):
+        return getattr(self.local, name)
+
+
+class RemoteCommands:
+    """
+    CommandRunner.submit()/cancel_all() run by the daemon. Each job is polled every
+    `poll_interval` seconds from a worker thread, which replays new output lines
+    to on_line and calls on_done once, like the local runner's callbacks.
+    """
+
+    def __init__(self, client, poll_interval=0.5):
+        self.client = client
+        self.poll_interval = poll_interval
+
+    def submit(self, command, timeout=None, on_line=None, on_done=None):
+        job = self.client.call("commands.submit", command=command, timeout=timeout)
+        Thread(target=self._follow, args=(job, on_line, on_done), daemon=True).start()
+        return job
+
+    def _follow(self, job, on_line, on_done):
+        seen = 0
+        while True:
+            for line in job["output"]:
+                if on_line:
+                    on_line(job, "output", line)
+            seen = job["lines"]
+            if job["status"] not in ("queued", "running"):
+                break
+            sleep(self.poll_interval)
+            try:
+                update = self.client.call("commands.job", job_id=job["id"], since=seen)
+            except (DaemonError, OSError):
+                return
+            if update is None:
+                return
+            job = update
+        if on_done:
+            on_done(job)
+
+    def cancel_all(self):
+        return self.client.call("commands.cancel_all")
+
+
+class RemoteHistory:
+    """MetricsHistory_F.summary() answered by the daemon, which owns the history file."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def summary(self, name, seconds):
+        return self.client.call("history.summary", name=name, seconds=seconds)
+
+
+def main(argv=None):
+    parser = ArgumentParser(description="Headless OPTIMISE daemon")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="socket path or pipe name")
+    parser.add_argument("--monitor", action="store_true", help="start blacklist enforcement on launch")
+    parser.add_argument("--governor", action="store_true", help="start the CPU governor on launch")
+    parser.add_argument("--restrict-cpus", type=backend.parse_cpu_list, metavar="LIST",
+                        help="CPUs the governor confines over-limit processes to, e.g. 0-1 (default: their last CPU)")
+    parser.add_argument("--interval", type=float, default=2.0, help="telemetry sampling interval (s)")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus /metrics on this localhost port (default: off)")
+    parser.add_argument("--metrics-file", help="rewrite Prometheus metrics to this text file (default: off)")
+    parser.add_argument("--optimize-every", type=float, help="smart RAM optimization period (minutes)")
+    parser.add_argument("--call", nargs="+", metavar=("METHOD", "KEY=VALUE"),
+                        help="call a method on a running daemon and print the result")
+    args = parser.parse_args(argv)
+
+    if args.call:
+        params = {}
+        for item in args.call[1:]:
+            key, _, value = item.partition("=")
+            try:
+                params[key] = loads(value)
+            except ValueError:
+                params[key] = value
+        try:
+            client = DaemonClient(args.address)
+            print(dumps(client.call(args.call[0], **params), indent=2, default=_json_default))
+        except (OSError, EOFError) as e:
+            print(f"No daemon at {args.address}: {e}", file=sys.stderr)
+            return 1
+        except DaemonError as e:
+            print(e, file=sys.stderr)
+            return 1
+        return 0
+
+    daemon = Daemon(args.address, args.interval, args.optimize_every, metrics_port=args.metrics_port,
+                    metrics_file=args.metrics_file, restrict_cpus=args.restrict_cpus)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: daemon.shutdown())
+    return daemon.serve_forever(args.monitor, args.governor)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,18 @@
 import customtkinter as ctk
 import sys
 from os import getcwd, startfile
-from os.path import basename, abspath
+from os.path import basename, dirname, abspath, join
 from threading import Thread
-from psutil import virtual_memory, cpu_percent
+from collections import deque
+from logging import Formatter, LogRecord, INFO
+from logging.handlers import RotatingFileHandler
 from tkinter import messagebox, filedialog
-from ctypes import windll
+try:
+    from ctypes import windll
+except ImportError:
+    windll = None
 import backend
+import daemon
 from traceback import format_exc
 
 
@@ -23,15 +29,15 @@ def is_admin():
         return False
 
 
-if not is_admin():
+def elevate():
+    """Relaunches the GUI elevated. Only needed on Windows when no daemon does the privileged work."""
     try:
         script = abspath(sys.argv[0])
-        params = '"{}"'.format(script)
+        params = " ".join('"{}"'.format(arg) for arg in [script] + sys.argv[1:])
         cwd = getcwd()
         windll.shell32.ShellExecuteW(None, "runas", sys.executable, params, cwd, 1)
     except Exception as e:
         windll.user32.MessageBoxW(0, f"Error elevating privileges: {e}", "Error", 0)
-    sys.exit()
 
 
 # --- Core Classes ---
@@ -46,6 +52,10 @@ class Module:
         if loadTab:
             self.loadTab()
         
+    def reload_soon(self, widget, ms=500):
+        """Reloads the tab after `ms`, if `widget` shows it is still the one on screen."""
+        self.app.after(ms, lambda: widget.winfo_exists() and self.loadTab())
+
     def loadTab(self):
         method_name = f"tab{self.tab}"
         if hasattr(self, method_name):
@@ -55,19 +65,86 @@ class Module:
 
 
 # --- UI Components ---
-class ConsoleRedirector:
-    def __init__(self, text_widget):
+class LogPump:
+    """
+    Moves console output and widget updates from any thread onto the Tk thread.
+    Writers and call_soon() only append to deques; the Tk thread drains both in
+    one batch per frame, keeps the last `max_lines` lines in the textbox and
+    sends the full log to a rotating file.
+    """
+
+    def __init__(self, app, text_widget, max_lines=2000, fps=20, log_path="optimise.log",
+                 max_bytes=5 * 1024 * 1024, backups=3, max_pending=100000):
+        self.app = app
         self.text_widget = text_widget
+        self.max_lines = max_lines
+        self.frame_ms = max(1, int(1000 / fps))
+        self.dropped = 0
+        self._chunks = deque(maxlen=max_pending)
+        self._calls = deque()
+        self._file = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+        self._file.terminator = ""
+        self._file.setFormatter(Formatter("%(message)s"))
+
+    def start(self):
+        self.app.after(self.frame_ms, self._drain)
+
+    def write(self, text):
+        if len(self._chunks) == self._chunks.maxlen:
+            self.dropped += 1
+        self._chunks.append(text)
+
+    def call_soon(self, fn, *args):
+        self._calls.append((fn, args))
+
+    def _drain(self):
+        try:
+            self._run_calls()
+            self._flush_text()
+        finally:
+            self.app.after(self.frame_ms, self._drain)
+
+    def _run_calls(self):
+        for _ in range(len(self._calls)):
+            fn, args = self._calls.popleft()
+            try:
+                fn(*args)
+            except Exception:
+                self.write(format_exc())
+
+    def _flush_text(self):
+        parts = []
+        for _ in range(len(self._chunks)):
+            parts.append(self._chunks.popleft())
+        if not parts:
+            return
+        text = "".join(parts)
+        self._file.emit(LogRecord("optimise", INFO, "", 0, text, None, None))
+        if not self.text_widget.winfo_exists():
+            return
+
+        lines = text.splitlines(keepends=True)
+        if len(lines) > self.max_lines:
+            text = "".join(lines[-self.max_lines:])
+        self.text_widget.configure(state="normal")
+        self.text_widget.insert("end", text)
+        excess = int(self.text_widget.index("end-1c").split(".")[0]) - self.max_lines
+        if excess > 0:
+            self.text_widget.delete("1.0", f"{excess + 1}.0")
+        self.text_widget.see("end")
+        self.text_widget.configure(state="disabled")
+
+    def close(self):
+        self._flush_text()
+        self._file.close()
+
+
+class ConsoleRedirector:
+    def __init__(self, pump):
+        self.pump = pump
 
     def write(self, str):
-        try:
-            self.text_widget.configure(state="normal")
-            self.text_widget.insert("end", str)
-            self.text_widget.see("end")
-            self.text_widget.configure(state="disabled")
-            self.text_widget.update_idletasks()
-        except:
-            pass
+        self.pump.write(str)
 
     def flush(self):
         pass
@@ -85,13 +162,158 @@ class InfoCard(ctk.CTkFrame):
         self.value_lbl.pack(anchor="w", padx=10, pady=(0, 5))
 
 
+class VirtualTable(ctk.CTkFrame):
+    """
+    Table that only creates widgets for the visible rows and recycles them while
+    scrolling, so 100k rows cost the same as 15.
+    columns: [(title, width, formatter or None)], indexing into each row tuple.
+    actions: [(text, command(row), fg_color, hover_color)], drawn as buttons on every row.
+    """
+    ROW_HEIGHT = 30
+
+    def __init__(self, master, columns, actions=(), empty_text="No data.", **kwargs):
+        kwargs.setdefault("fg_color", "transparent")
+        super().__init__(master, **kwargs)
+        self.columns = columns
+        self.actions = actions
+        self.rows = []
+        self.offset = 0
+        self.visible = 0
+        self.sort_col = None
+        self.sort_desc = False
+        self._pool = []
+        self._refresh_pending = False
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.grid(row=0, column=0, sticky="ew")
+        self._headers = []
+        for i, (title, width, _) in enumerate(columns):
+            btn = ctk.CTkButton(header, text=title, width=width, anchor="w", fg_color="transparent",
+                                text_color=("gray10", "gray90"), hover_color=("gray70", "gray30"),
+                                command=lambda c=i: self.sort_by(c))
+            btn.pack(side="left", padx=5)
+            self._headers.append(btn)
+
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=1, column=0, sticky="nsew")
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns")
+        self.empty_lbl = ctk.CTkLabel(self.body, text=empty_text, text_color="gray")
+
+        self.body.bind("<Configure>", self._on_resize)
+        self._bind_wheel(self.body)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1))
+        widget.bind("<Button-4>", lambda e: self.scroll(-1))
+        widget.bind("<Button-5>", lambda e: self.scroll(1))
+
+    def _make_row(self):
+        frame = ctk.CTkFrame(self.body, height=self.ROW_HEIGHT, fg_color="transparent")
+        frame.pack_propagate(False)
+        labels = []
+        for _, width, _ in self.columns:
+            lbl = ctk.CTkLabel(frame, text="", width=width, anchor="w", font=("Consolas", 12))
+            lbl.pack(side="left", padx=5)
+            self._bind_wheel(lbl)
+            labels.append(lbl)
+        buttons = []
+        for text, _, color, hover in reversed(self.actions):
+            btn = ctk.CTkButton(frame, text=text, width=60, height=24, fg_color=color, hover_color=hover)
+            btn.pack(side="right", padx=5)
+            buttons.append(btn)
+        buttons.reverse()
+        self._bind_wheel(frame)
+        return frame, labels, buttons
+
+    def _on_resize(self, event):
+        self.visible = max(1, event.height // self.ROW_HEIGHT)
+        while len(self._pool) < self.visible:
+            self._pool.append(self._make_row())
+        self.render()
+
+    def set_rows(self, rows):
+        self.rows = list(rows)
+        self.offset = 0
+        self._sort()
+        self.render()
+
+    def append(self, rows):
+        """Adds rows from a streaming producer; redraws are coalesced to one per idle cycle."""
+        self.rows.extend(rows)
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.after_idle(self._refresh)
+
+    def _refresh(self):
+        self._refresh_pending = False
+        # timsort merges the sorted prefix with the new tail in near-linear time
+        self._sort()
+        self.render()
+
+    def sort_by(self, col, desc=None):
+        if desc is None:
+            desc = not self.sort_desc if self.sort_col == col else False
+        self.sort_desc = desc
+        self.sort_col = col
+        for i, (btn, (title, _, _)) in enumerate(zip(self._headers, self.columns)):
+            btn.configure(text=title + ((" \u25bc" if self.sort_desc else " \u25b2") if i == col else ""))
+        self._sort()
+        self.render()
+
+    def _sort(self):
+        if self.sort_col is not None:
+            self.rows.sort(key=lambda r: r[self.sort_col], reverse=self.sort_desc)
+
+    def scroll(self, steps):
+        self.offset += steps * 3
+        self.render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.offset = int(float(value) * len(self.rows))
+        else:
+            step = float(value)
+            step = int(step) or (1 if step > 0 else -1)
+            self.offset += step * (self.visible if unit == "pages" else 1)
+        self.render()
+
+    def render(self):
+        if not self.winfo_exists():
+            return
+        total = len(self.rows)
+        self.offset = max(0, min(self.offset, total - self.visible))
+        for i, (frame, labels, buttons) in enumerate(self._pool):
+            idx = self.offset + i
+            if i >= self.visible or idx >= total:
+                frame.place_forget()
+                continue
+            row = self.rows[idx]
+            for lbl, (c, (_, _, fmt)) in zip(labels, enumerate(self.columns)):
+                lbl.configure(text=fmt(row[c]) if fmt else str(row[c]))
+            for btn, (_, cmd, _, _) in zip(buttons, self.actions):
+                btn.configure(command=lambda r=row, f=cmd: f(r))
+            frame.place(x=0, y=i * self.ROW_HEIGHT, relwidth=1)
+
+        if total:
+            self.empty_lbl.place_forget()
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.visible) / total))
+        else:
+            self.empty_lbl.place(relx=0.5, y=20, anchor="n")
+            self.scrollbar.set(0.0, 1.0)
+
+
 # --- UI Modules ---
 
 class Dashboard(Module):
     def __init__(self, app):
         super().__init__(app)
         self.unlocker = backend
-        self.tweaks = backend.RegistryTweaks_F()
+        self.tweaks = daemon.RemoteTweaks(app.daemon) if app.daemon else backend.RegistryTweaks_F()
+        self.commands = daemon.RemoteCommands(app.daemon) if app.daemon else backend.command_runner
 
     def tab1(self):
         ctk.CTkLabel(self.app.main_frame, text="System Dashboard", font=("Roboto", 24, "bold")).pack(pady=(10, 20), anchor="w")
@@ -101,9 +323,18 @@ class Dashboard(Module):
         stats_frame.grid_columnconfigure(0, weight=1)
         stats_frame.grid_columnconfigure(1, weight=1)
         
-        mem = virtual_memory()
-        InfoCard(stats_frame, "Memory Usage", f"{mem.percent}%").grid(row=0, column=0, padx=5, sticky="ew")
-        InfoCard(stats_frame, "CPU Usage", f"{cpu_percent()}%").grid(row=0, column=1, padx=5, sticky="ew")
+        mem = self.app.system.get_ram_info()
+        cpu = self.app.system.get_cpu_info()
+        InfoCard(stats_frame, "Memory Usage", f"{mem.percent}%" if mem else "Reading...").grid(row=0, column=0, padx=5, sticky="ew")
+        InfoCard(stats_frame, "CPU Usage", f"{cpu['percent']:.1f}%" if cpu else "Reading...").grid(row=0, column=1, padx=5, sticky="ew")
+        if mem is None or cpu is None:
+            # the sampler has not taken its first sample yet
+            self.reload_soon(stats_frame)
+
+        for col, (title, metric) in enumerate([("Memory (24h avg)", "memory.percent"), ("CPU (24h avg)", "cpu.total")]):
+            summary = self.app.history.summary(metric, 86400)
+            text = f"{summary['avg']:.1f}% (max {summary['max']:.0f}%)" if summary else "No history yet"
+            InfoCard(stats_frame, title, text).grid(row=1, column=col, padx=5, pady=(10, 0), sticky="ew")
         
         ctk.CTkLabel(self.app.main_frame, text="Quick Optimizations", font=("Roboto", 18, "bold")).pack(pady=(20, 10), anchor="w")
         
@@ -117,6 +348,8 @@ class Dashboard(Module):
         
         actions_frame.grid_columnconfigure(0, weight=1)
         actions_frame.grid_columnconfigure(1, weight=1)
+        ctk.CTkButton(actions_frame, text="Cancel Running Commands", command=self.cancel_cmds,
+                      fg_color="#8B0000", hover_color="#B22222").grid(row=(i + 2) // 2, column=0, columnspan=2, padx=10, pady=5, sticky="ew")
 
         ctk.CTkLabel(self.app.main_frame, text="Registry Tweaks (Advanced)", font=("Roboto", 18, "bold")).pack(pady=(20, 10), anchor="w")
         tweaks_frame = ctk.CTkFrame(self.app.main_frame)
@@ -127,25 +360,67 @@ class Dashboard(Module):
             btn = ctk.CTkButton(tweaks_frame, text=f"Apply {tw}", command=lambda t=tw: self.apply_tweak(t),
                                 fg_color="#006400", hover_color="#008000")
             btn.pack(side="left", padx=5, pady=10, expand=True, fill="x")
+        ctk.CTkButton(tweaks_frame, text="Undo Last", width=90, fg_color="transparent", border_width=1, border_color="gray",
+                      command=self.undo_tweak).pack(side="left", padx=5, pady=10)
+
+        ctk.CTkLabel(self.app.main_frame, text="System Benchmark", font=("Roboto", 18, "bold")).pack(pady=(20, 10), anchor="w")
+        bench_frame = ctk.CTkFrame(self.app.main_frame)
+        bench_frame.pack(fill="x", padx=5)
+        ctk.CTkButton(bench_frame, text="Snapshot Baseline", command=lambda: self.run_benchmark("before"),
+                      fg_color="#2B2B2B", hover_color="#3A3A3A", border_width=1, border_color="gray").pack(side="left", padx=5, pady=10, expand=True, fill="x")
+        ctk.CTkButton(bench_frame, text="Compare Now", command=lambda: self.run_benchmark("after"),
+                      fg_color="#2B2B2B", hover_color="#3A3A3A", border_width=1, border_color="gray").pack(side="left", padx=5, pady=10, expand=True, fill="x")
+        self.bench_status = ctk.CTkLabel(bench_frame, text="", text_color="gray")
+        self.bench_status.pack(side="left", padx=10)
 
     def run_cmd(self, cmd):
-        Thread(target=self._run_cmd_thread, args=(cmd,)).start()
-
-    def _run_cmd_thread(self, cmd):
         print(f"Running: {cmd}")
-        self.unlocker.run_command(cmd)
-        self.app.after(0, self.loadTab)
+        self.commands.submit(cmd, on_line=lambda job, stream, line: print(f"[{job['id']}] {line}"),
+                             on_done=self._cmd_done)
+
+    def _cmd_done(self, job):
+        print(f"[{job['id']}] {job['command']}: {job['status']} (exit {job['exit_code']}, {job['duration'] or 0:.1f}s, "
+              f"peak {job['peak_rss'] / (1024*1024):.0f} MB)")
+        self.app.call_soon(self.loadTab)
+
+    def cancel_cmds(self):
+        n = self.commands.cancel_all()
+        print(f"Cancelled {n} running command(s).")
         
     def apply_tweak(self, tweak):
         res = self.tweaks.apply_tweak(tweak)
         messagebox.showinfo("Registry Tweak", res)
         self.loadTab()
 
+    def undo_tweak(self):
+        messagebox.showinfo("Registry Tweak", self.tweaks.undo_last())
+        self.loadTab()
+
+    def run_benchmark(self, label):
+        bench = backend.system_benchmark
+        if bench.progress:
+            return
+        if label == "after" and "before" not in bench.snapshots:
+            messagebox.showinfo("System Benchmark", "Take a baseline snapshot first.")
+            return
+        self.bench_status.configure(text="Running... (about a minute, keep the system idle)")
+
+        def task():
+            try:
+                bench.snapshot(label)
+                text = bench.format(bench.compare()) if label == "after" else "Baseline saved. Apply tweaks, then Compare Now."
+            except Exception as e:
+                text = f"Benchmark failed: {e}"
+            print(text)
+            self.app.call_soon(lambda: messagebox.showinfo("System Benchmark", text))
+            self.app.call_soon(lambda: self.bench_status.winfo_exists() and self.bench_status.configure(text=""))
+        Thread(target=task, daemon=True).start()
+
 
 class FocuseMode(Module):
     def __init__(self, app):
         super().__init__(app)
-        self.focus_f = backend.FocusMode_F()
+        self.focus_f = daemon.RemoteTweaks(app.daemon) if app.daemon else backend.FocusMode_F()
         self.is_enabled = False
 
     def tab1(self):
@@ -178,21 +453,30 @@ class FocuseMode(Module):
 class RAM(Module):
     def __init__(self, app):
         super().__init__(app)
-        self.ram_f = backend
+        self.ram_f = daemon.RemoteRAM(app.daemon) if app.daemon else backend.RAM_F()
 
     def tab1(self):
         ctk.CTkLabel(self.app.main_frame, text="RAM Management", font=("Roboto", 24, "bold")).pack(pady=(10, 20), anchor="w")
     
-        ram = self.ram_f.get_ram_info()
+        ram = self.app.system.get_ram_info()
         bar = ctk.CTkProgressBar(self.app.main_frame)
         bar.pack(fill="x", pady=5)
-        bar.set(ram.percent / 100)
+        bar.set(ram.percent / 100 if ram else 0)
         
-        ctk.CTkLabel(self.app.main_frame, text=f"Used: {ram.percent}% ({ram.used / (1024**3):.1f} GB) / Total: {ram.total / (1024**3):.1f} GB").pack(pady=(0, 20))
+        if ram:
+            ctk.CTkLabel(self.app.main_frame, text=f"Used: {ram.percent}% ({ram.used / (1024**3):.1f} GB) / Total: {ram.total / (1024**3):.1f} GB").pack(pady=(0, 20))
+        else:
+            ctk.CTkLabel(self.app.main_frame, text="Reading memory usage...", text_color="gray").pack(pady=(0, 20))
+            self.reload_soon(bar)
         
-        ctk.CTkButton(self.app.main_frame, text="Smart RAM Optimize (Trim Unused + Boost Whitelist)", 
+        opt_frame = ctk.CTkFrame(self.app.main_frame, fg_color="transparent")
+        opt_frame.pack(fill="x", pady=10)
+        ctk.CTkButton(opt_frame, text="Smart RAM Optimize (Trim Unused + Boost Whitelist)", 
                       height=40, fg_color="#4B0082", hover_color="#8A2BE2",
-                      command=self.run_smart_optimize).pack(fill="x", pady=10)
+                      command=self.run_smart_optimize).pack(side="left", fill="x", expand=True)
+        ctk.CTkButton(opt_frame, text="Estimate (Dry Run)", height=40, width=150,
+                      fg_color="transparent", border_width=1, border_color="gray",
+                      command=lambda: self.run_smart_optimize(dry_run=True)).pack(side="left", padx=(10, 0))
 
         ctk.CTkButton(self.app.main_frame, text="Enable Large System Cache (Registry Tweak)", 
                       height=30, fg_color="#006400", hover_color="#008000",
@@ -200,31 +484,57 @@ class RAM(Module):
     
         ctk.CTkLabel(self.app.main_frame, text="High Memory Processes", font=("Roboto", 16, "bold")).pack(anchor="w")
         
-        list_frame = ctk.CTkScrollableFrame(self.app.main_frame, height=350)
-        list_frame.pack(fill="both", expand=True, pady=10)
-        
-        procs = self.ram_f.get_top_processes(15)
-        for p in procs:
-            row = ctk.CTkFrame(list_frame, fg_color="transparent")
-            row.pack(fill="x", pady=2)
-            
-            ctk.CTkLabel(row, text=f"{p['name'][:20]}", width=150, anchor="w", font=("Consolas", 12)).pack(side="left")
-            ctk.CTkLabel(row, text=f"{p['memory_info'].rss / (1024*1024):.0f} MB", width=80, anchor="e").pack(side="left")
-            
-            ctk.CTkButton(row, text="Kill", width=60, fg_color="#8B0000", hover_color="#B22222",
-                          command=lambda pid=p['pid']: self.kill_proc(pid)).pack(side="right", padx=5)
-            
-            ctk.CTkButton(row, text="Boost", width=60, fg_color="#DAA520", hover_color="#FFD700",
-                          command=lambda pid=p['pid']: self.boost_proc(pid)).pack(side="right", padx=5)
-
-    def run_smart_optimize(self):
+        table = VirtualTable(self.app.main_frame, height=350,
+                             columns=[("Process", 200, None), ("Memory", 90, lambda b: f"{b / (1024*1024):.0f} MB"), ("PID", 70, None)],
+                             actions=[("Boost", lambda r: self.boost_proc(r[2]), "#DAA520", "#FFD700"),
+                                      ("Always", lambda r: self.boost_proc(r[2], persist=True), "#B8860B", "#DAA520"),
+                                      ("Kill", lambda r: self.kill_proc(r[2]), "#8B0000", "#B22222")])
+        table.pack(fill="both", expand=True, pady=10)
+        table.sort_by(1, desc=True)
+        self.table = table
+        # show whatever snapshot exists right away; a fresh scan never runs on the Tk thread
+        snap = None if self.app.daemon else backend.process_table.latest()
+        if snap is not None:
+            table.set_rows(self._process_rows(snap.top_by_rss(None)))
+        if snap is None or snap.age_ms() > 1000:
+            Thread(target=self._load_processes, args=(table,), daemon=True).start()
+
+    @staticmethod
+    def _process_rows(procs):
+        return [(p['name'][:24], p['rss'], p['pid']) for p in procs]
+
+    def _load_processes(self, table):
+        rows = self._process_rows(self.app.system.get_top_processes(None))
+        self.app.call_soon(lambda: table.winfo_exists() and table.set_rows(rows))
+
+    def _run(self, title, action, show=True):
+        """Runs `action` off the Tk thread, then shows its text (if `show`) and refreshes the tab."""
+        table = self.table
+
+        def task():
+            try:
+                text = action()
+            except Exception as e:
+                text = f"Error: {e}"
+            if show:
+                self.app.call_soon(lambda: messagebox.showinfo(title, text))
+            self.app.call_soon(lambda: table.winfo_exists() and self.loadTab())
+        Thread(target=task, daemon=True).start()
+
+    def run_smart_optimize(self, dry_run=False):
         whitelist = []
         if "ProcManager" in self.app.modules:
-            whitelist = self.app.modules["ProcManager"].proc_mon.whitelist
-            
-        res = self.ram_f.smart_ram_optimization(whitelist)
-        messagebox.showinfo("Optimization Result", f"Trimmed: {res['trimmed']}\nBoosted: {res['boosted']}\nErrors: {res['errors']}")
-        self.loadTab()
+            whitelist = list(self.app.modules["ProcManager"].proc_mon.whitelist)
+
+        def optimize():
+            res = self.ram_f.smart_ram_optimization(whitelist, dry_run=dry_run)
+            top = "\n".join(f"  {p['name'][:24]}: {(p['reclaimed'] or p['estimated']) / (1024*1024):.0f} MB" for p in res['processes'][:5])
+            if dry_run:
+                return (f"Candidates: {len(res['processes'])} (skipped {res['skipped']} small)\n"
+                        f"Estimated reclaimable: {res['estimated_bytes'] / (1024*1024):.0f} MB\n\n{top}")
+            return (f"Trimmed: {res['trimmed']}\nBoosted: {res['boosted']}\nErrors: {res['errors']}\n"
+                    f"Reclaimed: {res['reclaimed_bytes'] / (1024*1024):.0f} MB in {res['seconds']:.2f}s\n\n{top}")
+        self._run("Optimization Estimate" if dry_run else "Optimization Result", optimize)
 
     def enable_cache(self):
         res = self.ram_f.optimize_system_cache()
@@ -232,31 +542,34 @@ class RAM(Module):
         self.loadTab()
 
     def kill_proc(self, pid):
-        self.ram_f.kill_process(pid)
-        self.loadTab()
-        
-    def boost_proc(self, pid):
-        res = self.ram_f.set_high_priority(pid)
-        messagebox.showinfo("Priority Boost", res)
-        self.loadTab()
+        self._run("Kill", lambda: self.ram_f.kill_process(pid), show=False)
+
+    def boost_proc(self, pid, persist=False):
+        """Boosts one process; with persist ("Always") a scheduler rule boosts its name on every start."""
+        self._run("Priority Boost", lambda: self.ram_f.set_high_priority(pid, persist=persist))
 
 
 class CPU(Module):
     def __init__(self, app):
         super().__init__(app)
-        self.overclock_f = backend
+        self.power_f = daemon.RemotePower(app.daemon) if app.daemon else backend.Overclocking_F()
 
     def tab1(self):
         ctk.CTkLabel(self.app.main_frame, text="CPU & Power", font=("Roboto", 24, "bold")).pack(pady=(10, 20), anchor="w")
         
-        info = self.overclock_f.get_cpu_info()
+        info = self.app.system.get_cpu_info()
         
         grid = ctk.CTkFrame(self.app.main_frame, fg_color="transparent")
         grid.pack(fill="x")
         
-        InfoCard(grid, "Frequency", f"{info['frequency']} MHz").pack(side="left", fill="x", expand=True, padx=5)
-        InfoCard(grid, "Physical Cores", str(info['physical_cores'])).pack(side="left", fill="x", expand=True, padx=5)
-        InfoCard(grid, "Logical Cores", str(info['logical_cores'])).pack(side="left", fill="x", expand=True, padx=5)
+        if info is None:
+            ctk.CTkLabel(grid, text="Reading CPU counters...", text_color="gray").pack(pady=10)
+            self.reload_soon(grid)
+        else:
+            InfoCard(grid, "Frequency", f"{info['frequency']} MHz").pack(side="left", fill="x", expand=True, padx=5)
+            InfoCard(grid, "Physical Cores", str(info['physical_cores'])).pack(side="left", fill="x", expand=True, padx=5)
+            InfoCard(grid, "Logical Cores", str(info['logical_cores'])).pack(side="left", fill="x", expand=True, padx=5)
+            InfoCard(grid, "Usage (60s avg)", f"{info['percent_avg_60s']:.1f}%").pack(side="left", fill="x", expand=True, padx=5)
         
         ctk.CTkLabel(self.app.main_frame, text="Power Management", font=("Roboto", 18, "bold")).pack(pady=(30, 10), anchor="w")
         
@@ -268,16 +581,64 @@ class CPU(Module):
                       height=40, fg_color="#8B0000", hover_color="#B22222",
                       command=self.unpark_cores).pack(fill="x", pady=(0, 10))
 
+        profiles = ctk.CTkFrame(self.app.main_frame, fg_color="transparent")
+        profiles.pack(fill="x", pady=(0, 10))
+        for name in ("latency", "throughput", "balanced"):
+            ctk.CTkButton(profiles, text=f"{name.title()} Profile", command=lambda n=name: self.apply_profile(n)).pack(side="left", fill="x", expand=True, padx=5)
+        ctk.CTkButton(profiles, text="Restore Previous", fg_color="transparent", border_width=1, border_color="gray",
+                      command=self.restore_power).pack(side="left", fill="x", expand=True, padx=5)
+
+        state = self.power_f.get_power_state()
+        if state:
+            ctk.CTkLabel(self.app.main_frame, text=f"Governor: {state['governor']} | EPP: {state['epp']} | Boost: {state['boost']} | "
+                                                   f"Freq: {state['min_freq']}-{state['max_freq']} kHz", text_color="gray").pack()
+
+        affinity = self.app.modules["ProcManager"].affinity
+        ctk.CTkLabel(self.app.main_frame, text="Core Reservation", font=("Roboto", 18, "bold")).pack(pady=(20, 10), anchor="w")
+        aff_frame = ctk.CTkFrame(self.app.main_frame)
+        aff_frame.pack(fill="x", pady=(0, 10))
+        text = f"Dedicated CPUs {affinity.reserved} for whitelisted apps, others on {affinity.others}" if affinity.reserved \
+            else "Not enough physical cores to reserve"
+        ctk.CTkLabel(aff_frame, text=text).pack(side="left", padx=10)
+        ctk.CTkButton(aff_frame, text="Release Cores" if affinity.running else "Reserve Cores", width=130,
+                      command=self.toggle_affinity).pack(side="right", padx=10, pady=10)
+        if affinity.running:
+            rep = affinity.report()
+            drop = rep.get("migrations_per_s_drop_pct")
+            wait = rep.get("wait_ms_per_s_drop_pct")
+            ctk.CTkLabel(self.app.main_frame, text=f"Placed {rep['placed']} processes | Migrations: "
+                                                   + (f"-{drop:.0f}%" if drop is not None else "measuring...")
+                                                   + " | Run-queue wait: " + (f"-{wait:.0f}%" if wait is not None else "measuring..."),
+                         text_color="gray").pack()
+
         ctk.CTkLabel(self.app.main_frame, text="* This forces the Windows 'High Performance' power scheme.", text_color="gray").pack()
         ctk.CTkLabel(self.app.main_frame, text="* 'Unpark' forces all cores to stay active (100% min state).", text_color="gray").pack()
 
+    def toggle_affinity(self):
+        affinity = self.app.modules["ProcManager"].affinity
+        if affinity.running:
+            affinity.stop()
+        else:
+            messagebox.showinfo("Core Reservation", affinity.start())
+        self.loadTab()
+
+    def apply_profile(self, name):
+        res = self.power_f.apply_power_profile(name)
+        messagebox.showinfo("Power Profile", res)
+        self.loadTab()
+
+    def restore_power(self):
+        res = self.power_f.restore_power_state()
+        messagebox.showinfo("Power Profile", res)
+        self.loadTab()
+
     def set_high_perf(self):
-        res = self.overclock_f.set_power_plan_high_performance()
+        res = self.power_f.set_power_plan_high_performance()
         messagebox.showinfo("Power Plan", res)
         self.loadTab()
         
     def unpark_cores(self):
-        res = self.overclock_f.unpark_cpu_cores()
+        res = self.power_f.unpark_cpu_cores()
         messagebox.showinfo("CPU Unpark", res)
         self.loadTab()
 
@@ -285,7 +646,7 @@ class CPU(Module):
 class GPU(Module):
     def __init__(self, app):
         super().__init__(app)
-        self.gpu_f = backend.GPU_F()
+        self.gpu_f = daemon.RemoteGPU(app.daemon) if app.daemon else backend.GPU_F()
 
     def tab1(self):
         ctk.CTkLabel(self.app.main_frame, text="GPU Statistics", font=("Roboto", 24, "bold")).pack(pady=(10, 20), anchor="w")
@@ -300,6 +661,9 @@ class GPU(Module):
             
             if "error" in gpu:
                 ctk.CTkLabel(card, text=gpu["error"], text_color="red").pack(padx=10, pady=10)
+            elif gpu.get("load") == "pending":
+                ctk.CTkLabel(card, text="Reading the first sample...", text_color="gray").pack(padx=10, pady=10)
+                self.reload_soon(card)
             elif gpu.get("load") != "N/A":
                 grid = ctk.CTkFrame(card, fg_color="transparent")
                 grid.pack(fill="x", padx=10, pady=10)
@@ -349,8 +713,14 @@ class GPU(Module):
 class Storage(Module):
     def __init__(self, app):
         super().__init__(app)
-        self.storage_f = backend.Storage_F()
+        # attached, only the NTFS tweak goes to the daemon; scans and zips act on the user's files
+        self.storage_f = daemon.RemoteStorage(app.daemon) if app.daemon else backend.Storage_F()
         self.scan_result_frame = None
+        self.results_table = None
+        self.scan_status = None
+        self.scanning = False
+        self.last_files = []
+        self._pending = deque()
 
     def tab1(self):
         ctk.CTkLabel(self.app.main_frame, text="Storage Optimizer", font=("Roboto", 24, "bold")).pack(pady=(10, 20), anchor="w")
@@ -366,9 +736,23 @@ class Storage(Module):
         ctk.CTkLabel(self.app.main_frame, text="Large File Hunter", font=("Roboto", 18, "bold")).pack(pady=(20, 10), anchor="w")
         ctk.CTkLabel(self.app.main_frame, text="Find files larger than 500MB to reclaim space.", text_color="gray").pack(anchor="w")
         
-        ctk.CTkButton(self.app.main_frame, text="Select Drive/Folder to Scan...", command=self.scan_dir).pack(fill="x", pady=10)
-        
-        self.scan_result_frame = ctk.CTkScrollableFrame(self.app.main_frame, height=250)
+        scan_bar = ctk.CTkFrame(self.app.main_frame, fg_color="transparent")
+        scan_bar.pack(fill="x", pady=10)
+        ctk.CTkButton(scan_bar, text="Select Drive/Folder to Scan...", command=self.scan_dir).pack(side="left", fill="x", expand=True)
+        ctk.CTkButton(scan_bar, text="Find Duplicates...", width=140, command=self.find_duplicates).pack(side="left", padx=(10, 0))
+        ctk.CTkButton(scan_bar, text="Largest Indexed Files...", width=160, fg_color="transparent", border_width=1, border_color="gray",
+                      command=self.show_indexed).pack(side="left", padx=(10, 0))
+        ctk.CTkButton(scan_bar, text="Cancel", width=80, fg_color="#8B0000", hover_color="#B22222",
+                      command=self.storage_f.cancel_scan).pack(side="left", padx=(10, 0))
+
+        status_bar = ctk.CTkFrame(self.app.main_frame, fg_color="transparent")
+        status_bar.pack(fill="x")
+        self.scan_status = ctk.CTkLabel(status_bar, text="", text_color="gray")
+        self.scan_status.pack(side="left")
+        ctk.CTkButton(status_bar, text="Zip All Results", width=120, command=self.zip_all).pack(side="right")
+        ctk.CTkButton(status_bar, text="Folder Sizes (Treemap)...", width=160, command=self.show_treemap).pack(side="right", padx=10)
+        
+        self.scan_result_frame = ctk.CTkFrame(self.app.main_frame, height=250, fg_color="transparent")
         self.scan_result_frame.pack(fill="both", expand=True, pady=10)
 
     def optimize_ntfs(self):
@@ -379,27 +763,148 @@ class Storage(Module):
     def scan_dir(self):
         path = filedialog.askdirectory()
         if path:
-            Thread(target=self._scan_thread, args=(path,)).start()
+            self._pending.clear()
+            self._file_table("Scanning...")
+            self.scanning = True
+            Thread(target=self._scan_thread, args=(path,), daemon=True).start()
+            self.app.after(250, self._update_scan_status)
     
+    def show_indexed(self):
+        path = filedialog.askdirectory()
+        if path:
+            self._show_scan_results(self.storage_f.largest_files(path))
+
+    def find_duplicates(self):
+        path = filedialog.askdirectory()
+        if path:
+            self._clear_results()
+            self.scan_status.configure(text="Searching for duplicates...")
+            Thread(target=self._duplicates_thread, args=(path,), daemon=True).start()
+
+    def _duplicates_thread(self, path):
+        groups = self.storage_f.find_duplicates(path)
+        self.app.call_soon(self._show_duplicates, groups, self.storage_f.duplicates.stats)
+
+    def _show_duplicates(self, groups, stats):
+        if not self.scan_result_frame.winfo_exists():
+            return
+        self.scan_status.configure(text=f"{stats['groups']} duplicate groups | {stats['reclaimable_bytes'] / (1024**2):,.0f} MB reclaimable | "
+                                        f"read {stats['bytes_read'] / (1024**2):,.0f} MB of {stats['bytes_scanned'] / (1024**2):,.0f} MB scanned")
+        # the first path of each group is the copy that is kept
+        self._file_table("No duplicate files found.").set_rows(
+            self._row(fpath, group["size"] / (1024*1024)) for group in groups for fpath in group["paths"][1:])
+
     def _scan_thread(self, path):
+        files = self.storage_f.find_huge_files(path, on_match=lambda f, s: self._pending.append((f, s)))
+        self.scanning = False
+        self.app.call_soon(self._show_scan_results, files)
+
+    def _update_scan_status(self):
+        p = self.storage_f.scan_progress()
+        if p is None or not self.scan_status.winfo_exists():
+            return
+        # matches are handed over in one batch per tick instead of one after() call each
+        batch = []
+        while self._pending:
+            batch.append(self._row(*self._pending.popleft()))
+        if batch and self.results_table is not None:
+            self.results_table.append(batch)
+        self.scan_status.configure(text=f"{p['dirs']:,} dirs | {p['files']:,} files | {p['bytes_seen'] / (1024**3):.1f} GB seen | "
+                                        f"{p['files_per_s']:,.0f} files/s | {p['matches']} matches"
+                                        + (" (cancelled)" if p['cancelled'] else ""))
+        if self.scanning:
+            self.app.after(250, self._update_scan_status)
+
+    def _clear_results(self):
         for w in self.scan_result_frame.winfo_children(): w.destroy()
-        ctk.CTkLabel(self.scan_result_frame, text="Scanning... This may take a moment.").pack(pady=20)
-        
-        files = self.storage_f.find_huge_files(path)
-        
-        for w in self.scan_result_frame.winfo_children(): w.destroy()
-            
-        if not files:
-            ctk.CTkLabel(self.scan_result_frame, text="No huge files found.").pack(pady=20)
+        self.results_table = None
+
+    def _file_table(self, empty_text):
+        self._clear_results()
+        self.results_table = VirtualTable(self.scan_result_frame, empty_text=empty_text,
+                                          columns=[("File", 240, None), ("Size", 90, lambda mb: f"{mb:,.0f} MB"), ("Folder", 280, None)],
+                                          actions=[("Zip", lambda r: self.zip_file(r[3]), None, None)])
+        self.results_table.pack(fill="both", expand=True)
+        self.results_table.sort_by(1, desc=True)
+        return self.results_table
+
+    @staticmethod
+    def _row(fpath, size_mb):
+        return basename(fpath), size_mb, dirname(fpath), fpath
+
+    def _show_scan_results(self, files):
+        self.last_files = files
+        if not self.scan_result_frame.winfo_exists():
             return
+        self._update_scan_status()
+        self._pending.clear()
+        self._file_table("No huge files found.").set_rows(self._row(fpath, size_mb) for fpath, size_mb in files)
 
-        for fpath, size_mb in files:
-            row = ctk.CTkFrame(self.scan_result_frame, fg_color="transparent")
-            row.pack(fill="x", pady=2)
-            
-            ctk.CTkLabel(row, text=f"{basename(fpath)}", width=200, anchor="w", font=("Consolas", 12)).pack(side="left", padx=5)
-            ctk.CTkLabel(row, text=f"{size_mb:.0f} MB", width=80).pack(side="left", padx=5)
-            ctk.CTkButton(row, text="Zip", width=60, command=lambda p=fpath: self.zip_file(p)).pack(side="right", padx=5)
+    def show_treemap(self):
+        path = filedialog.askdirectory()
+        if path:
+            self._clear_results()
+            self.scan_status.configure(text="Aggregating folder sizes...")
+            Thread(target=self._treemap_thread, args=(path,), daemon=True).start()
+
+    def _treemap_thread(self, path):
+        tree = self.storage_f.aggregate_sizes(path)
+        self.app.call_soon(self._render_treemap, tree, 0)
+
+    def _render_treemap(self, tree, node):
+        if not self.scan_result_frame.winfo_exists():
+            return
+        self._clear_results()
+        info = tree.info(node)
+        self.scan_status.configure(text=f"{tree.dirs:,} dirs | {tree.files:,} files | {tree.elapsed:.1f}s")
+
+        header = ctk.CTkFrame(self.scan_result_frame, fg_color="transparent")
+        header.pack(fill="x")
+        if node > 0:
+            ctk.CTkButton(header, text="Up", width=50, command=lambda: self._render_treemap(tree, int(tree.parent[node]))).pack(side="left", padx=5)
+        ctk.CTkLabel(header, text=f"{info['path']}  ({info['bytes'] / (1024**3):.2f} GB, {info['files']:,} files)", anchor="w").pack(side="left", padx=5)
+
+        width, height = 720, 320
+        canvas = ctk.CTkCanvas(self.scan_result_frame, width=width, height=height, bg="#1a1a1a", highlightthickness=0)
+        canvas.pack(pady=5)
+
+        kids = [int(c) for c in tree.children(node) if tree.bytes[c] > 0]
+        entries = [(c, int(tree.bytes[c]), tree.names[c]) for c in kids]
+        if tree.own_bytes[node] > 0:
+            entries.append((None, int(tree.own_bytes[node]), "(files)"))
+        entries.sort(key=lambda e: e[1], reverse=True)
+
+        colors = ["#1f77b4", "#2ca02c", "#9467bd", "#8c564b", "#17becf", "#bcbd22", "#d62728", "#ff7f0e"]
+        rects = backend.squarify([e[1] for e in entries], 0, 0, width, height)
+        for i, ((child, size, name), (x, y, w, h)) in enumerate(zip(entries, rects)):
+            tag = f"r{i}"
+            canvas.create_rectangle(x, y, x + w, y + h, fill=colors[i % len(colors)] if child is not None else "#555",
+                                    outline="#1a1a1a", tags=tag)
+            if w > 60 and h > 28:
+                canvas.create_text(x + 4, y + 4, anchor="nw", fill="white", font=("Roboto", 10), tags=tag,
+                                   text=f"{name[:max(4, int(w / 7))]}\n{size / (1024**3):.2f} GB")
+            if child is not None and tree.bytes[child] > 0:
+                canvas.tag_bind(tag, "<Button-1>", lambda e, c=child: self._render_treemap(tree, c))
+
+        ctk.CTkLabel(self.scan_result_frame, text="Heaviest folders in scan (any depth)", font=("Roboto", 12, "bold"), anchor="w").pack(fill="x", pady=(10, 0))
+        for d in tree.top(10):
+            ctk.CTkLabel(self.scan_result_frame, text=f"{d['bytes'] / (1024**3):8.2f} GB  {d['path']}", font=("Consolas", 12), anchor="w").pack(fill="x")
+
+    def zip_all(self):
+        paths = [fpath for fpath, _ in self.last_files]
+        if paths and messagebox.askyesno("Zip All", f"Compress {len(paths)} files and delete the originals after verification?"):
+            Thread(target=self._zip_all_thread, args=(paths,), daemon=True).start()
+
+    def _zip_all_thread(self, paths):
+        done = []
+        def on_done(path, res):
+            done.append(path)
+            self.app.call_soon(lambda n=len(done): self.scan_status.winfo_exists() and
+                           self.scan_status.configure(text=f"Zipped {n}/{len(paths)} | {self.storage_f.get_archiver().progress()['mb_per_s']:.0f} MB/s"))
+        results = self.storage_f.zip_items(paths, on_done=on_done)
+        errors = sum(1 for r in results.values() if "error" in r)
+        self.app.call_soon(lambda: messagebox.showinfo("Zip Result", f"Zipped {len(results) - errors} files, {errors} errors."))
+        self.last_files = []
 
     def zip_file(self, path):
         res = self.storage_f.zip_item(path)
@@ -410,7 +915,14 @@ class Storage(Module):
 class ProcessManager(Module):
     def __init__(self, app):
         super().__init__(app)
-        self.proc_mon = backend.ProcessMonitor_F()
+        # with a daemon running the GUI only drives it; otherwise monitoring runs in-process
+        if app.daemon:
+            self.proc_mon = daemon.RemoteMonitor(app.daemon)
+            self.governor, self.affinity = self.proc_mon.governor, self.proc_mon.affinity
+        else:
+            self.proc_mon = backend.ProcessMonitor_F()
+            backend.governor.exempt = backend.affinity.exempt = lambda: self.proc_mon.white_rules
+            self.governor, self.affinity = backend.governor, backend.affinity
 
     def tab1(self):
         ctk.CTkLabel(self.app.main_frame, text="Process Manager (Blacklist/Whitelist)", font=("Roboto", 24, "bold")).pack(pady=(10, 20), anchor="w")
@@ -427,35 +939,55 @@ class ProcessManager(Module):
         if self.proc_mon.monitoring:
             self.status_lbl.configure(text="Status: Active", text_color="green")
             self.toggle_btn.configure(text="Stop Monitoring", fg_color="red")
-            
+            stats = self.proc_mon.get_stats()
+            latency = f"{stats['median_kill_latency_ms']:.0f} ms" if stats['median_kill_latency_ms'] is not None else "N/A"
+            ctk.CTkLabel(control_frame, text=f"Engine: {stats['engine']} | Kills: {stats['kills']} | Median spawn-to-kill: {latency} | CPU: {stats['cpu_percent']:.2f}%",
+                         text_color="gray").pack(side="left", padx=10)
+
+        gov = self.governor
+        gov_frame = ctk.CTkFrame(self.app.main_frame)
+        gov_frame.pack(fill="x", pady=(0, 10))
+        ctk.CTkLabel(gov_frame, text=f"CPU Governor: {'Active' if gov.running else 'Off'} (>{gov.cpu_threshold:.0f}% for {gov.sustain_seconds}s, whitelist exempt)",
+                     font=("Roboto", 14, "bold")).pack(side="left", padx=20)
+        if gov.running:
+            st = gov.stats()
+            ctk.CTkLabel(gov_frame, text=f"Throttled: {st['throttled']} | Decisions: {st['decisions']} | Eval: {st['avg_eval_ms']:.2f} ms/tick",
+                         text_color="gray").pack(side="left", padx=10)
+        ctk.CTkButton(gov_frame, text="Stop Governor" if gov.running else "Start Governor", width=120,
+                      fg_color="red" if gov.running else "green", command=self.toggle_governor).pack(side="right", padx=20, pady=10)
+
         lists_frame = ctk.CTkFrame(self.app.main_frame, fg_color="transparent")
         lists_frame.pack(fill="both", expand=True, pady=10)
         lists_frame.grid_columnconfigure(0, weight=1)
         lists_frame.grid_columnconfigure(1, weight=1)
         
-        self.build_list_panel(lists_frame, "Blacklist (Auto-Kill)", self.proc_mon.blacklist, 0, "red", self.add_blacklist, self.remove_blacklist)
+        self.build_list_panel(lists_frame, "Blacklist (Auto-Kill)", self.proc_mon.blacklist, 0, "red", self.add_blacklist, self.remove_blacklist,
+                              self.proc_mon.black_rules.hits, lambda: self.import_list("blacklist"))
         
-        self.build_list_panel(lists_frame, "Whitelist (Protected)", self.proc_mon.whitelist, 1, "green", self.add_whitelist, self.remove_whitelist)
+        self.build_list_panel(lists_frame, "Whitelist (Protected)", self.proc_mon.whitelist, 1, "green", self.add_whitelist, self.remove_whitelist,
+                              self.proc_mon.white_rules.hits, lambda: self.import_list("whitelist"))
         
-    def build_list_panel(self, parent, title, data_list, col, color, add_cmd, remove_cmd):
+    def build_list_panel(self, parent, title, data_list, col, color, add_cmd, remove_cmd, hits=None, import_cmd=None):
         frame = ctk.CTkFrame(parent)
         frame.grid(row=0, column=col, sticky="nsew", padx=10)
         
         ctk.CTkLabel(frame, text=title, font=("Roboto", 16, "bold"), text_color=color).pack(pady=10)
         
-        entry = ctk.CTkEntry(frame, placeholder_text="Process Name (e.g. chrome.exe)")
+        entry = ctk.CTkEntry(frame, placeholder_text="Name, glob or rule (e.g. chrome.exe, steam*, cmd:--type=renderer)")
         entry.pack(fill="x", padx=10, pady=5)
         
-        ctk.CTkButton(frame, text="Add", command=lambda: add_cmd(entry)).pack(fill="x", padx=10, pady=5)
-        
-        scroll = ctk.CTkScrollableFrame(frame)
-        scroll.pack(fill="both", expand=True, padx=10, pady=10)
-        
-        for item in data_list:
-            row = ctk.CTkFrame(scroll, fg_color="transparent")
-            row.pack(fill="x", pady=2)
-            ctk.CTkLabel(row, text=item).pack(side="left")
-            ctk.CTkButton(row, text="X", width=30, fg_color="red", command=lambda i=item: remove_cmd(i)).pack(side="right")
+        buttons = ctk.CTkFrame(frame, fg_color="transparent")
+        buttons.pack(fill="x", padx=10, pady=5)
+        ctk.CTkButton(buttons, text="Add", command=lambda: add_cmd(entry)).pack(side="left", fill="x", expand=True)
+        if import_cmd:
+            ctk.CTkButton(buttons, text="Import...", width=80, fg_color="transparent", border_width=1, border_color="gray",
+                          command=import_cmd).pack(side="left", padx=(10, 0))
+
+        table = VirtualTable(frame, empty_text="Empty list.",
+                             columns=[("Entry", 200, None), ("Hits", 70, None)],
+                             actions=[("X", lambda r: remove_cmd(r[0]), "red", "#B22222")])
+        table.pack(fill="both", expand=True, padx=10, pady=10)
+        table.set_rows((item, (hits or {}).get(item, 0)) for item in data_list)
 
     def toggle_monitoring(self):
         if self.proc_mon.monitoring:
@@ -464,6 +996,11 @@ class ProcessManager(Module):
             self.proc_mon.start_monitoring()
         self.loadTab()
 
+    def toggle_governor(self):
+        gov = self.governor
+        gov.stop() if gov.running else gov.start()
+        self.loadTab()
+
     def add_blacklist(self, entry):
         val = entry.get()
         if val:
@@ -488,11 +1025,17 @@ class ProcessManager(Module):
         self.proc_mon.remove_from_whitelist(val)
         self.loadTab()
 
+    def import_list(self, list_name):
+        path = filedialog.askopenfilename(filetypes=[("Text or JSON", "*.txt *.json"), ("All files", "*.*")])
+        if path:
+            messagebox.showinfo("Import", self.proc_mon.import_list(list_name, path))
+            self.loadTab()
+
 
 # --- Main Application ---
 
 class Application(ctk.CTk):
-    def __init__(self):
+    def __init__(self, client=None):
         super().__init__()
         self.title("OPTIMISE")
         self.geometry("1100x850")
@@ -508,6 +1051,10 @@ class Application(ctk.CTk):
         
         self.logo_label = ctk.CTkLabel(self.sidebar, text="OPTIMISE", font=("Roboto", 24, "bold"))
         self.logo_label.grid(row=0, column=0, padx=20, pady=(30, 30))
+
+        # with a daemon attached the GUI is a client: every service and privileged call goes over RPC
+        self.daemon = client
+        self.system = daemon.RemoteSystem(client) if client else backend
         
         # Navigation
         self.modules = {
@@ -553,11 +1100,27 @@ class Application(ctk.CTk):
         self.console_text.configure(state="disabled")
         
 
-        sys.stdout = ConsoleRedirector(self.console_text)
-        sys.stderr = ConsoleRedirector(self.console_text)
+        self.log_pump = LogPump(self, self.console_text)
+        self.log_pump.start()
+        sys.stdout = ConsoleRedirector(self.log_pump)
+        sys.stderr = ConsoleRedirector(self.log_pump)
         
+        if self.daemon:
+            # the daemon owns the samplers, the history file and the scheduler rules
+            self.history = daemon.RemoteHistory(self.daemon)
+            print(f"Attached to daemon at {self.daemon.address}.")
+        else:
+            backend.telemetry.start()
+            backend.gpu_telemetry.start(wait=0)
+            self.history = backend.MetricsHistory_F(backend.telemetry)
+            backend.scheduler_policy.start()
+            if "--metrics" in sys.argv[1:]:
+                # opt-in; the daemon exports its own metrics when one is running
+                self.metrics_exporter = backend.MetricsExporter(path=join(backend.state_dir(), "optimise_metrics.prom"))
+                self.metrics_exporter.start()
+
         print("System Initialized...")
-        print("Admin privileges: Active")
+        print("Admin privileges: " + ("via daemon" if self.daemon else "Active" if is_admin() else "Not elevated"))
         print("Waiting for user command...")
 
         for mod in self.modules.values():
@@ -570,6 +1133,10 @@ class Application(ctk.CTk):
 
         self.show_module("Dashboard")
 
+    def call_soon(self, fn, *args):
+        """Runs fn(*args) on the Tk thread; the only safe way for worker threads to touch widgets."""
+        self.log_pump.call_soon(fn, *args)
+
     def show_module(self, name):
         for _, btn in self.nav_buttons.items():
             btn.configure(fg_color="transparent")
@@ -581,9 +1148,16 @@ class Application(ctk.CTk):
 
 
 if __name__ == "__main__":
+    client = daemon.attach()
+    if client is None and windll is not None and not is_admin():
+        elevate()
+        sys.exit()
     try:
-        app = Application()
+        app = Application(client)
         app.mainloop()
     except Exception as e:
         err_msg = f"An error occurred:\n{e}\n\n{format_exc()}"
-        windll.user32.MessageBoxW(0, err_msg, "Critical Error", 0x10)
+        if windll is None:
+            print(err_msg, file=sys.__stderr__)
+        else:
+            windll.user32.MessageBoxW(0, err_msg, "Critical Error", 0x10)
@@ -0,0 +1,505 @@
+"""
+Backend tests against fakes: a scripted nvidia-smi, a sysfs tree and an in-memory
+registry. Run with `python -m pytest -q`.
+"""
+import json
+import sys
+from time import perf_counter, sleep
+
+import numpy as np
+import pytest
+
+import backend
+from benchmarks import FakeProcess, fake_psutil, make_fake_smi, make_tweak_profile, spawn_gpu_query
+
+posix_only = pytest.mark.skipif(sys.platform == "win32", reason="fake tools are shebang scripts")
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # the backend keeps its state files in the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+# --- Process monitor ---
+
+def test_process_table_keeps_cpu_window_and_reuses_cached_processes(monkeypatch):
+    with fake_psutil(20):
+        table = backend.ProcessTable(min_interval_ms=10_000)
+        snap = table.get(max_age_ms=0)
+        # a forced refresh inside the minimum interval does not reset the cpu_percent baselines
+        assert table.get(max_age_ms=0) is snap and table.scans == 1
+        proc = snap.procs[3]
+
+        def opened(pid):
+            raise AssertionError("cached process was reopened")
+        monkeypatch.setattr(backend, "Process", opened)
+        assert table.process(proc.pid, snap.create_time[3]) is proc
+
+
+def test_poll_opens_only_new_pids(monkeypatch):
+    with fake_psutil(50):
+        monitor = backend.ProcessMonitor_F()
+        monitor.store.listeners.clear()
+        monitor.black_rules = backend.RuleSet(["new.exe"])
+        monitor.table = backend.process_table
+        assert monitor._poll() == 50
+        opened, killed = [], []
+        monkeypatch.setattr(monitor.table, "process", lambda pid, created=None: opened.append(pid) or FakeProcess(pid))
+        monkeypatch.setattr(FakeProcess, "terminate", lambda self: killed.append(self.pid))
+        FakeProcess.table[51] = ("new.exe", 1024, 1, 2e9)
+        assert monitor._poll() == 1
+        assert opened == [51] and killed == [51]
+        del FakeProcess.table[7]
+        assert monitor._poll() == 0 and 7 not in monitor._known
+
+
+# --- Process lists ---
+
+def test_list_store_round_trips_through_reload(workdir):
+    store = backend.ProcessListStore(str(workdir / "lists.json"), save_delay=60)
+    assert store.add("blacklist", ["b.exe", "a.exe", "b.exe"]) == ["b.exe", "a.exe"]
+    assert store.add("whitelist", ["w.exe"]) == ["w.exe"]
+    assert store.remove("blacklist", ["b.exe", "missing.exe"]) == ["b.exe"]
+    store.add("blacklist", ["c.exe"])
+    store.flush()
+    reloaded = backend.ProcessListStore(str(workdir / "lists.json"))
+    assert reloaded.load()
+    assert reloaded.view("blacklist") == ("a.exe", "c.exe") and reloaded.view("whitelist") == ("w.exe",)
+
+
+def test_list_store_journal_replays_from_a_version(workdir):
+    store = backend.ProcessListStore(str(workdir / "lists.json"), save_delay=60, journal_size=3)
+    store.add("blacklist", ["a.exe"])
+    base = store.version
+    store.add("blacklist", ["b.exe"])
+    store.remove("blacklist", ["a.exe"])
+    assert [(op, name, entries) for _, _, op, name, entries in store.changes_since(base)] == \
+        [("add", "blacklist", ("b.exe",)), ("remove", "blacklist", ("a.exe",))]
+    assert store.changes_since(store.version) == []
+    store.add("whitelist", ["c.exe"])
+    store.add("whitelist", ["d.exe"])
+    # the journal no longer reaches back to `base`: the caller has to reload everything
+    assert store.changes_since(base) is None
+
+
+def test_list_store_debounces_saves(workdir):
+    store = backend.ProcessListStore(str(workdir / "lists.json"), save_delay=0.2)
+    for i in range(50):
+        store.add("blacklist", [f"p{i}.exe"])
+    assert store.saves == 0
+    deadline = perf_counter() + 5
+    while store.saves == 0 and perf_counter() < deadline:
+        sleep(0.02)
+    assert store.saves == 1
+    with open("lists.json") as f:
+        assert len(json.load(f)["blacklist"]) == 50
+
+
+def test_list_store_save_replaces_the_file_atomically(workdir, monkeypatch):
+    store = backend.ProcessListStore(str(workdir / "lists.json"), save_delay=60)
+    store.add("blacklist", ["a.exe"])
+    store.flush()
+
+    def torn_dump(data, f, **kwargs):
+        f.write('{"blacklist": [')
+        raise OSError("disk full")
+    monkeypatch.setattr(backend, "dump", torn_dump)
+    store.add("blacklist", ["b.exe"])
+    store.flush()
+    # the failed write only touched the temp file
+    with open("lists.json") as f:
+        assert json.load(f)["blacklist"] == ["a.exe"]
+    assert store.saves == 1
+
+
+def test_import_list_skips_blanks_comments_and_known_entries(workdir):
+    monitor = backend.ProcessMonitor_F()
+    monitor.store.save_delay = 60
+    monitor.add_to_blacklist("known.exe")
+    (workdir / "list.txt").write_text("# games\nknown.exe\n\n  new.exe \nnew.exe\nother.exe\n")
+    assert monitor.import_list("blacklist", str(workdir / "list.txt")) == "Imported 2 new entries"
+    assert monitor.blacklist == ("known.exe", "new.exe", "other.exe")
+    assert len(monitor.black_rules) == 3
+    (workdir / "list.json").write_text('["x.exe", "new.exe"]')
+    assert monitor.import_list("blacklist", str(workdir / "list.json")) == "Imported 1 new entries"
+    assert isinstance(monitor.import_list("blacklist", str(workdir / "missing.txt")), backend.ErrorResult)
+    # the store flushes pending changes at exit, after the working directory is restored
+    monitor.store.flush()
+
+
+# --- Telemetry ---
+
+def test_ram_and_cpu_info_are_pending_until_first_sample(monkeypatch):
+    sampler = backend.TelemetrySampler()
+    monkeypatch.setattr(sampler, "_loop", lambda: None)
+    monkeypatch.setattr(backend, "telemetry", sampler)
+    # start() must not sample on the caller's (Tk) thread
+    assert backend.get_ram_info() is None and backend.get_cpu_info() is None
+    sampler._sample()
+    assert backend.get_ram_info().total > 0
+    assert backend.get_cpu_info()["logical_cores"] == sampler.logical_cores
+
+
+# --- GPU telemetry ---
+
+@posix_only
+def test_gpu_sampler_streams_fake_smi(tmp_path, monkeypatch):
+    smi = make_fake_smi(str(tmp_path / "nvidia-smi"), gpus=2)
+    sampler = backend.GPUSampler(smi_path=smi, interval=0.1, use_nvml=False)
+    monkeypatch.setattr(backend, "gpu_telemetry", sampler)
+    try:
+        assert sampler.start(wait=5.0)
+        gpus = sampler.latest()
+        assert [g["name"] for g in gpus] == ["Fake GPU 0", "Fake GPU 1"]
+        assert gpus[0]["load"] == 30 and gpus[0]["power"] == 100.5
+        # "[N/A]" is kept as NaN, not dropped
+        assert np.isnan(gpus[1]["power"])
+        info = backend.GPU_F().get_gpu_info()
+        assert info[1]["memory_used"] == "2048MB" and info[1]["temperature"] == "51 C"
+    finally:
+        sampler.stop()
+
+
+@posix_only
+def test_gpu_sampler_read_is_cheaper_than_spawning(tmp_path, monkeypatch):
+    smi = make_fake_smi(str(tmp_path / "nvidia-smi"))
+    sampler = backend.GPUSampler(smi_path=smi, interval=0.1, use_nvml=False)
+    monkeypatch.setattr(backend, "gpu_telemetry", sampler)
+    try:
+        assert sampler.start(wait=5.0)
+        gpu = backend.GPU_F()
+        start = perf_counter()
+        for _ in range(20):
+            gpu.get_gpu_info()
+        streamed = (perf_counter() - start) / 20
+        start = perf_counter()
+        for _ in range(3):
+            spawn_gpu_query(smi)
+        spawned = (perf_counter() - start) / 3
+    finally:
+        sampler.stop()
+    assert streamed * 10 < spawned
+
+
+def test_gpu_info_does_not_wait_for_first_sample(monkeypatch):
+    sampler = backend.GPUSampler(use_nvml=False)
+    monkeypatch.setattr(sampler, "_smi_loop", lambda: None)
+    monkeypatch.setattr(backend, "gpu_telemetry", sampler)
+    assert backend.GPU_F().get_gpu_info() == [{"name": "Waiting for GPU telemetry...", "load": "pending"}]
+
+
+# --- Metrics ---
+
+def test_metrics_are_off_until_an_exporter_starts():
+    registry = backend.Metrics()
+    assert not registry.enabled
+    exporter = backend.MetricsExporter(registry, port=0, path=None)
+    exporter.start()
+    assert registry.enabled
+    exporter.stop()
+
+
+def test_timed_counts_explicit_errors_only(monkeypatch):
+    class Probe(backend.Function):
+        @backend.timed
+        def report(self):
+            return "Errors: none"
+
+        @backend.timed
+        def fail(self):
+            return backend.ErrorResult("Error: boom")
+
+        @backend.timed
+        def crash(self):
+            raise OSError("boom")
+
+        @backend.timed(tick=True)
+        def tick(self):
+            pass
+
+        def serve(self):
+            pass
+
+    monkeypatch.setattr(backend.metrics, "enabled", True)
+    backend.metrics.reset()
+    probe = Probe()
+    probe.report(), probe.fail(), probe.tick(), probe.serve()
+    with pytest.raises(OSError):
+        probe.crash()
+    stats = backend.metrics.stats()
+    assert {k: v["errors"] for k, v in stats["calls"].items()} == {"Probe.report": 0, "Probe.fail": 1, "Probe.crash": 1}
+    assert stats["ticks"]["Probe"]["ticks"] == 1
+
+
+def test_metrics_store_evicts_least_recent_process_series(workdir):
+    store = backend.MetricsStore(str(workdir / "m.bin"), max_columns=4, capacities=(16, 16, 16),
+                                 reserved=["cpu.total", "ram.percent"])
+    store.record(1, {"proc.a.rss": 1, "proc.b.rss": 2})
+    store.record(2, {"proc.a.rss": 1})
+    store.record(3, {"proc.c.rss": 3, "cpu.total": 50})
+    assert store.evicted == ["proc.b.rss"]
+    assert store.columns == ["cpu.total", "ram.percent", "proc.a.rss", "proc.c.rss"]
+    raw = store.query(["proc.c.rss", "cpu.total"], 0, 10, tier="raw")
+    assert np.isnan(raw["proc.c.rss"]["avg"][:2]).all() and raw["proc.c.rss"]["avg"][2] == 3
+    assert raw["cpu.total"]["avg"][2] == 50
+    store.flush()
+    # system series keep their columns across reopen, even when saved full of process series
+    store = backend.MetricsStore(str(workdir / "m.bin"), reserved=["cpu.total", "ram.percent", "disk.busy"])
+    assert "disk.busy" in store.columns and "cpu.total" in store.columns
+
+
+def test_t95_rounds_untabulated_df_down():
+    assert backend.t95(0) == float("inf")
+    assert backend.t95(11) == backend.T95[10]
+    assert backend.t95(25) == backend.T95[20]
+    assert backend.t95(10 ** 6) == backend.T95[120]
+
+
+# --- Governor ---
+
+class AffinityProc:
+    def __init__(self, cpus):
+        self.cpus = list(cpus)
+
+    def cpu_affinity(self, cpus=None):
+        if cpus is None:
+            return list(self.cpus)
+        self.cpus = list(cpus)
+
+
+@pytest.mark.parametrize("restrict, expected", [(None, [3]), ([1, 5], [1]), ([6, 7], [3])])
+def test_governor_restricts_affinity_within_allowed_cpus(restrict, expected):
+    proc = AffinityProc([0, 1, 2, 3])
+    state = {"proc": proc, "saved": {}, "pid": 1}
+    assert backend.ResourceGovernor(restrict_cpus=restrict)._apply(state, "restrict_affinity")
+    assert proc.cpus == expected and state["saved"]["affinity"] == [0, 1, 2, 3]
+
+
+class GovernedProc(AffinityProc):
+    def __init__(self):
+        super().__init__([0, 1, 2, 3])
+        self.priority = 0
+        self.calls = []
+
+    def nice(self, value=None):
+        if value is None:
+            return self.priority
+        self.priority = value
+        self.calls.append("nice")
+
+    def suspend(self):
+        self.calls.append("suspend")
+
+    def resume(self):
+        self.calls.append("resume")
+
+    def terminate(self):
+        self.calls.append("terminate")
+
+
+def governor_snapshot(proc, cpu, rss_mb, pid=500):
+    return backend.ProcessSnapshot(0.0, [(pid, 1000.0, rss_mb * 1024 * 1024, cpu, 1, "hog", proc)], 0.0)
+
+
+def test_governor_escalates_one_step_per_sustain_period():
+    gov = backend.ResourceGovernor(cpu_threshold=80, sustain_seconds=10, suspend_seconds=5)
+    proc = GovernedProc()
+    for now in (0, 5, 10, 20, 30):
+        gov.tick(governor_snapshot(proc, 95, 10), now=now)
+    assert [d["action"] for d in gov.decisions] == ["lower_priority", "restrict_affinity", "suspend"]
+    assert proc.calls == ["nice", "suspend"] and proc.cpus == [3]
+
+
+def test_governor_releases_only_below_the_hysteresis_band():
+    gov = backend.ResourceGovernor(cpu_threshold=80, sustain_seconds=10, release_ratio=0.5)
+    proc = GovernedProc()
+    gov.tick(governor_snapshot(proc, 95, 10), now=0)
+    gov.tick(governor_snapshot(proc, 95, 10), now=10)
+    assert gov.tracked[(500, 1000.0)]["level"] == 1
+    # under the threshold but above 50% of it: still throttled
+    gov.tick(governor_snapshot(proc, 60, 10), now=11)
+    assert (500, 1000.0) in gov.tracked and proc.priority != 0
+    gov.tick(governor_snapshot(proc, 30, 10), now=12)
+    assert not gov.tracked and proc.priority == 0
+    assert gov.decisions[-1]["action"] == "release"
+
+
+def test_governor_resumes_a_suspended_process_still_over_rss():
+    gov = backend.ResourceGovernor(cpu_threshold=80, rss_threshold_mb=100, sustain_seconds=10,
+                                   suspend_seconds=5, restrict_cpus=[0])
+    proc = GovernedProc()
+    for now in (0, 10, 20, 30):
+        gov.tick(governor_snapshot(proc, 0, 500), now=now)
+    assert proc.calls == ["nice", "suspend"]
+    # suspended: 0% CPU, but the RSS alone keeps it over the limit
+    gov.tick(governor_snapshot(proc, 0, 500), now=34)
+    assert proc.calls == ["nice", "suspend"]
+    gov.tick(governor_snapshot(proc, 0, 500), now=35)
+    assert proc.calls == ["nice", "suspend", "resume"]
+    gov.tick(governor_snapshot(proc, 0, 500), now=45)
+    assert proc.calls[-1] == "terminate" and not gov.tracked
+
+
+class SnapshotTable:
+    def __init__(self, snap):
+        self.snap = snap
+
+    def get(self, max_age_ms=None):
+        return self.snap
+
+
+def test_affinity_manager_restores_the_original_mask_on_stop():
+    topology = backend.CpuTopology()
+    topology.cores, topology.llc_domains = [(0, 1), (2, 3), (4, 5), (6, 7)], [tuple(range(8))]
+    manager = backend.AffinityManager(topology=topology, reserve_cores=1)
+    # a process a cpuset already confined to three CPUs
+    proc = AffinityProc([0, 1, 2])
+    proc.threads = lambda: []
+    manager.table = SnapshotTable(backend.ProcessSnapshot(0.0, [(500, 1000.0, 0, 0.0, 1, "app", proc)], 0.0))
+    manager.tick()
+    assert proc.cpus == [0, 1, 2, 3, 4, 5]
+    manager.stop()
+    assert proc.cpus == [0, 1, 2] and not manager.applied
+
+
+# --- Linux power backend ---
+
+def make_sysfs(root, cpus=4, offline=(3,)):
+    """Fake /sys/devices/system/cpu: cpufreq with EPP, three idle states, intel_pstate turbo switch."""
+    def put(path, value):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"{value}\n")
+
+    put(root / "intel_pstate" / "no_turbo", 1)
+    for i in range(cpus):
+        cpu = root / f"cpu{i}"
+        if i:
+            put(cpu / "online", 0 if i in offline else 1)
+        freq = cpu / "cpufreq"
+        for name, value in {"scaling_governor": "powersave", "scaling_available_governors": "performance powersave",
+                            "energy_performance_preference": "balance_power",
+                            "energy_performance_available_preferences": "default performance balance_performance balance_power power",
+                            "cpuinfo_min_freq": 800000, "cpuinfo_max_freq": 4200000,
+                            "scaling_min_freq": 800000, "scaling_max_freq": 3000000}.items():
+            put(freq / name, value)
+        for s, (name, latency) in enumerate([("POLL", 0), ("C1", 2), ("C6", 170)]):
+            put(cpu / "cpuidle" / f"state{s}" / "name", name)
+            put(cpu / "cpuidle" / f"state{s}" / "latency", latency)
+            put(cpu / "cpuidle" / f"state{s}" / "disable", 0)
+    return root
+
+
+def read(root, *parts):
+    return root.joinpath(*parts).read_text().strip()
+
+
+def test_power_profile_apply_and_restore(tmp_path):
+    root = make_sysfs(tmp_path / "cpu")
+    power = backend.LinuxPowerBackend(str(root))
+    before = power.snapshot()
+    previous = power.apply("latency")
+    assert previous == before
+    assert read(root, "intel_pstate", "no_turbo") == "0"
+    for i in range(4):
+        assert read(root, f"cpu{i}", "cpufreq", "scaling_governor") == "performance"
+        assert read(root, f"cpu{i}", "cpufreq", "energy_performance_preference") == "performance"
+        assert read(root, f"cpu{i}", "cpufreq", "scaling_min_freq") == "4200000"
+        # only idle states deeper than 10 us are disabled
+        assert [read(root, f"cpu{i}", "cpuidle", f"state{s}", "disable") for s in range(3)] == ["0", "0", "1"]
+    assert power.restore(previous) == 0
+    assert power.snapshot() == before
+
+
+def test_power_profile_rolls_back_on_failed_write(tmp_path):
+    root = make_sysfs(tmp_path / "cpu")
+    power = backend.LinuxPowerBackend(str(root))
+    before = power.snapshot()
+    # a directory where a file is expected makes that write fail half-way through the plan
+    target = root / "cpu2" / "cpufreq" / "energy_performance_preference"
+    target.unlink()
+    target.mkdir()
+    with pytest.raises(OSError):
+        power.apply("latency")
+    assert read(root, "cpu0", "cpufreq", "scaling_governor") == "powersave"
+    assert power.snapshot()["cpus"]["cpu0"] == before["cpus"]["cpu0"]
+
+
+def test_unpark_then_restore_takes_cores_offline_again(tmp_path):
+    root = make_sysfs(tmp_path / "cpu")
+    oc = backend.Overclocking_F(sysfs_root=str(root), state_file=str(tmp_path / "power.json"))
+    assert oc.linux is not None
+    assert oc.unpark_cpu_cores() == "Power Profile 'latency' Applied"
+    assert read(root, "cpu3", "online") == "1"
+    assert oc.restore_power_state() == "Power State Restored"
+    assert read(root, "cpu3", "online") == "0"
+    assert read(root, "cpu0", "cpufreq", "scaling_governor") == "powersave"
+    assert read(root, "intel_pstate", "no_turbo") == "1"
+
+
+def test_unknown_power_profile_is_an_error_string(tmp_path):
+    oc = backend.Overclocking_F(sysfs_root=str(tmp_path / "none"), state_file=str(tmp_path / "power.json"))
+    assert oc.apply_power_profile("turbo").startswith("Error applying power profile")
+
+
+# --- Registry tweak profiles ---
+
+KEY = "HKLM\\SOFTWARE\\Test"
+OTHER = "HKCU\\Software\\Test"
+
+
+def make_engine(profiles, keys=None):
+    registry = backend.MemoryRegistry(keys or {KEY: {"Existing": ("REG_DWORD", 1)}, OTHER: {}})
+    return backend.TweakEngine(registry, profiles, undo_path="undo.json"), registry
+
+
+def test_tweak_apply_then_reapply_skips_matching_values():
+    profile = [{"key": KEY, "name": "Existing", "type": "REG_DWORD", "value": 0},
+               {"key": KEY, "name": "New", "type": "REG_SZ", "value": "on"},
+               {"key": OTHER, "name": "Flag", "type": "REG_DWORD", "value": 1}]
+    engine, registry = make_engine({"p": profile})
+    result = engine.apply("p")
+    assert result["error"] is None
+    assert result["changed"] == ["Existing", "New", "Flag"] and result["keys_opened"] == 2
+    assert registry.keys[KEY.lower()] == {"Existing": ("REG_DWORD", 0), "New": ("REG_SZ", "on")}
+    # verify: a second apply reads everything back and writes nothing
+    writes = registry.writes
+    again = engine.apply("p")
+    assert again["changed"] == [] and again["skipped"] == 3
+    assert registry.writes == writes
+    assert len(engine.undo_stack) == 1
+
+
+def test_tweak_failure_part_way_rolls_back_earlier_writes():
+    profile = [{"key": KEY, "name": "Existing", "type": "REG_DWORD", "value": 0},
+               {"key": KEY, "name": "New", "type": "REG_DWORD", "value": 5},
+               {"key": OTHER, "name": "Denied", "type": "REG_DWORD", "value": 1}]
+    engine, registry = make_engine({"p": profile})
+    registry.fail_on.add("Denied")
+    result = engine.apply("p")
+    assert "Access is denied" in result["error"] and result["changed"] == []
+    assert registry.keys[KEY.lower()] == {"Existing": ("REG_DWORD", 1)}
+    assert registry.keys[OTHER.lower()] == {}
+    assert engine.undo_stack == []
+
+
+def test_tweak_undo_restores_previous_values_across_restarts():
+    profile = [{"key": KEY, "name": "Existing", "type": "REG_DWORD", "value": 0},
+               {"key": KEY, "name": "New", "type": "REG_DWORD", "value": 5}]
+    engine, registry = make_engine({"p": profile})
+    assert engine.apply("p")["error"] is None
+    # the undo stack is persisted, so a fresh engine can still undo
+    reloaded = backend.TweakEngine(registry, {}, undo_path="undo.json")
+    assert reloaded.undo() == {"profile": "p", "restored": 2, "failed": 0}
+    assert registry.keys[KEY.lower()] == {"Existing": ("REG_DWORD", 1)}
+    assert reloaded.undo() == {"profile": None, "restored": 0, "failed": 0}
+
+
+def test_tweak_large_profile_opens_each_key_once():
+    profile, registry = make_tweak_profile(200, keys=20)
+    engine = backend.TweakEngine(registry, {"big": profile}, undo_path=None)
+    result = engine.apply("big")
+    assert result["error"] is None and len(result["changed"]) == 200
+    assert result["keys_opened"] == registry.opens == 20
+    assert engine.apply("big")["skipped"] == 200